@@ -0,0 +1,95 @@
+"""Benchmark: reloading months of menus from the Parquet archive vs. the scrape CSVs.
+
+    python benchmarks/bench_archive.py [--days 120] [--items 40]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from food_record import format_frame, parse_frame  # noqa: E402
+from menu_archive import archive_frame, read_archive  # noqa: E402
+
+LOCATIONS = ['Fountain Dining Hall', 'Clark Dining Hall', 'Case Dining Hall', 'Oval Dining Hall']
+MEALS = ['Breakfast', 'Lunch', 'Dinner']
+
+
+def synthetic_menus(days, items_per_meal, foods=600, seed=0):
+    """One FoodRecord frame per menu day: every location and meal, drawn from a fixed food list."""
+    rng = np.random.default_rng(seed)
+    start = date(2025, 8, 18)
+    for d in range(days):
+        header = (start + timedelta(days=d)).strftime("%A, %B %d, %Y")
+        n = len(LOCATIONS) * len(MEALS) * items_per_meal
+        food = rng.integers(0, foods, n)
+        yield pd.DataFrame({
+            'date': header,
+            'location': np.repeat(LOCATIONS, n // len(LOCATIONS)),
+            'meal': np.tile(np.repeat(MEALS, items_per_meal), len(LOCATIONS)),
+            'food_name': [f"Food {i}" for i in food],
+            'serving_size': '1 each (57g)',
+            'serving_g': 57.0,
+            'calories': (food * 7 % 600).astype(float),
+            'protein_g': (food % 40).astype(float),
+            'carbohydrate_g': (food % 70).astype(float),
+            'fat_g': (food % 30).astype(float),
+            'sugars_g': (food % 20).astype(float),
+            'saturated_fat_g': (food % 10).astype(float),
+            'fiber_g': (food % 8).astype(float),
+            'sodium_mg': (food * 13 % 900).astype(float),
+            'cholesterol_mg': (food % 60).astype(float),
+        })
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=120)
+    parser.add_argument('--items', type=int, default=40, help="items per meal")
+    args = parser.parse_args()
+
+    work = tempfile.mkdtemp(prefix='bench_archive_')
+    try:
+        csvs = []
+        root = os.path.join(work, 'menu_archive')
+        for d, frame in enumerate(synthetic_menus(args.days, args.items)):
+            path = os.path.join(work, f"scrape_{d:04d}.csv")
+            format_frame(frame).to_csv(path, index=False)
+            csvs.append(path)
+            archive_frame(frame, root, run=f"run{d:04d}")
+        rows = sum(1 for _ in open(csvs[0])) - 1
+        print(f" {args.days} days x {rows} rows = {args.days * rows} rows")
+
+        csv_all, from_csv = timed(lambda: parse_frame(pd.concat([pd.read_csv(p, dtype=str) for p in csvs])))
+        pq_all, from_pq = timed(lambda: read_archive(root))
+        pq_cols, _ = timed(lambda: read_archive(root, ['food_name', 'calories', 'protein_g']))
+        last_month = (date(2025, 8, 18) + timedelta(days=args.days - 30)).isoformat()
+        pq_slice, sliced = timed(lambda: read_archive(root, ['food_name', 'protein_g'], start=last_month,
+                                                      locations=['Fountain Dining Hall']))
+
+        assert len(from_csv) == len(from_pq)
+        assert from_csv['protein_g'].sum() == from_pq['protein_g'].sum()
+
+        print(f" {'CSV read + parse, all columns':<40} {csv_all:7.3f}s")
+        print(f" {'archive, all columns':<40} {pq_all:7.3f}s  ({csv_all / pq_all:.1f}x)")
+        print(f" {'archive, 3 columns':<40} {pq_cols:7.3f}s  ({csv_all / pq_cols:.1f}x)")
+        print(f" {'archive, 2 columns, 30 days, 1 hall':<40} {pq_slice:7.3f}s  ({csv_all / pq_slice:.1f}x, "
+              f"{len(sliced)} rows)")
+    finally:
+        shutil.rmtree(work)
+
+
+if __name__ == '__main__':
+    main()
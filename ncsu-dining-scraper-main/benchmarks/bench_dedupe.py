@@ -0,0 +1,83 @@
+"""Benchmark: vectorized find_new_items() vs. the old iterrows loop.
+
+    python benchmarks/bench_dedupe.py [--rows 300000] [--history 5000] [--chunksize 50000]
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from deduplicate_data import find_new_items  # noqa: E402
+
+
+def legacy_dedupe(df, history):
+    """The loop deduplicate() used to run, kept here as the baseline."""
+    new_items = []
+    history_set = set(history)
+    for index, row in df.iterrows():
+        unique_id = f"{row['Food Name']}_{row['Calories']}"
+        if unique_id not in history_set:
+            new_items.append(row)
+            history_set.add(unique_id)
+    return pd.DataFrame(new_items)
+
+
+def synthetic_semester(rows, distinct_foods, seed=0):
+    """A semester of scrapes: the same few thousand foods repeated across days and halls."""
+    rng = np.random.default_rng(seed)
+    food = rng.integers(0, distinct_foods, rows)
+    return pd.DataFrame({
+        'Date': rng.choice(['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday'], rows),
+        'Location': rng.choice(['Fountain Dining Hall', 'Clark Dining Hall', 'Case Dining Hall'], rows),
+        'Meal': rng.choice(['Breakfast', 'Lunch', 'Dinner'], rows),
+        'Food Name': [f"Food {i}" for i in food],
+        'Calories': (food * 7 % 600).astype(str),
+        'Protein': [f"{p}g" for p in food % 40],
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--rows', type=int, default=300000)
+    parser.add_argument('--foods', type=int, default=8000)
+    parser.add_argument('--history', type=int, default=5000)
+    parser.add_argument('--chunksize', type=int, default=50000)
+    parser.add_argument('--legacy-rows', type=int, default=50000,
+                        help="iterrows is slow; time it on this many rows and scale up")
+    args = parser.parse_args()
+
+    df = synthetic_semester(args.rows, args.foods)
+    history = {f"Food {i}_{i * 7 % 600}" for i in range(args.history)}
+    print(f" {len(df)} rows, {df['Food Name'].nunique()} distinct foods, {len(history)} history IDs")
+
+    start = time.perf_counter()
+    new_items, _ = find_new_items([df], history)
+    vectorized = time.perf_counter() - start
+
+    chunks = [df.iloc[i:i + args.chunksize] for i in range(0, len(df), args.chunksize)]
+    start = time.perf_counter()
+    chunked_items, _ = find_new_items(chunks, history)
+    chunked = time.perf_counter() - start
+
+    sample = df.iloc[:args.legacy_rows]
+    start = time.perf_counter()
+    legacy_items = legacy_dedupe(sample, history)
+    legacy = (time.perf_counter() - start) * len(df) / len(sample)
+
+    # Same answer on the sample before comparing speed
+    sample_items, _ = find_new_items([sample], history)
+    assert list(sample_items['food_name']) == list(legacy_items['Food Name'])
+    assert len(new_items) == len(chunked_items)
+
+    print(f" new items: {len(new_items)}")
+    print(f" {'legacy iterrows (scaled)':<28} {legacy:8.2f}s")
+    print(f" {'vectorized, one frame':<28} {vectorized:8.2f}s  ({legacy / vectorized:.0f}x)")
+    print(f" {'vectorized, chunked':<28} {chunked:8.2f}s  ({legacy / chunked:.0f}x)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,86 @@
+"""Benchmark: near-duplicate matching with the trigram index vs. comparing every pair of names.
+
+    python benchmarks/bench_near_dedupe.py [--sizes 1000,4000,16000] [--queries 500]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from near_dedupe import NearDuplicateIndex, normalize_name, trigrams  # noqa: E402
+
+WORDS = ['chicken', 'grilled', 'breast', 'biscuit', 'buttermilk', 'scrambled', 'eggs', 'turkey', 'bacon', 'wheat',
+         'whole', 'pancakes', 'cheese', 'mac', 'vegan', 'black', 'bean', 'burger', 'rice', 'brown', 'fried', 'tofu',
+         'spicy', 'roasted', 'potatoes', 'sweet', 'salad', 'caesar', 'pasta', 'marinara', 'pizza', 'pepperoni',
+         'sausage', 'gravy', 'broccoli', 'steamed', 'soup', 'tomato', 'basil', 'wrap', 'hummus', 'falafel']
+
+
+def synthetic_history(n, seed=0):
+    """n distinct "Food Name_Calories" history IDs."""
+    rng = random.Random(seed)
+    ids = set()
+    while len(ids) < n:
+        name = ' '.join(w.title() for w in rng.sample(WORDS, rng.randint(2, 4)))
+        ids.add(f"{name} {rng.randint(1, 99)}_{rng.randint(5, 120) * 5}")
+    return sorted(ids)
+
+
+def variants(history, count, seed=1):
+    """Reworded / recalculated versions of history items: what a menu refresh looks like."""
+    rng = random.Random(seed)
+    out = []
+    for item_id in rng.sample(history, count):
+        name, _, calories = item_id.rpartition('_')
+        words = name.lower().split()
+        rng.shuffle(words)
+        out.append((', '.join(words) + rng.choice(['', 's', '!']), float(calories) + rng.choice([0, 5, -5])))
+    return out
+
+
+def brute_force(history, queries, similarity):
+    """The obvious version: every query against every known name."""
+    known = []
+    for item_id in history:
+        name, _, calories = item_id.rpartition('_')
+        known.append((trigrams(normalize_name(name)), float(calories)))
+    hits = 0
+    for name, calories in queries:
+        grams = trigrams(normalize_name(name))
+        for other, other_calories in known:
+            if len(grams & other) / len(grams | other) >= similarity and abs(calories - other_calories) <= 10:
+                hits += 1
+                break
+    return hits
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', default='1000,4000,16000', help="history sizes to try")
+    parser.add_argument('--queries', type=int, default=500)
+    args = parser.parse_args()
+
+    print(f" {'history':>8} {'build':>9} {'indexed':>10} {'brute force':>12}   matched")
+    for size in (int(s) for s in args.sizes.split(',')):
+        history = synthetic_history(size)
+        queries = variants(history, min(args.queries, size))
+
+        start = time.perf_counter()
+        index = NearDuplicateIndex.from_history(history)
+        build_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        matched = sum(1 for name, calories in queries if index.match(name, calories))
+        indexed_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        brute = brute_force(history, queries, index.similarity)
+        brute_s = time.perf_counter() - start
+
+        print(f" {size:>8} {build_s:8.3f}s {indexed_s:9.3f}s {brute_s:11.3f}s   "
+              f"{matched}/{len(queries)} (brute force {brute})  {brute_s / indexed_s:.0f}x")
+
+
+if __name__ == '__main__':
+    main()
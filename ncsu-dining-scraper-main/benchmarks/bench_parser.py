@@ -0,0 +1,93 @@
+"""Micro-benchmark: compiled single-pass label parser vs. the old per-row regexes.
+
+    python benchmarks/bench_parser.py [--repeat 20000]
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from nutrition_parser import html_to_text, parse_label, to_csv_fields  # noqa: E402
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures', 'labels')
+
+
+def legacy_parse(text):
+    """The row loop extract_dynamic_nutrition() used to run, kept here as the baseline."""
+    data = {}
+    for text_row in text.split("\n"):
+        row = text_row.strip()
+        if row.startswith("Calories"):
+            match = re.search(r'Calories\s+(\d+)', row)
+            if match: data['Calories'] = match.group(1)
+        g_match = re.search(r'(\d+(?:\.\d+)?)\s*g', row)
+        if g_match:
+            value = g_match.group(1)
+            if "Total Fat" in row: data['Total Fat'] = value + "g"
+            elif "Carbohydrate" in row: data['Total Carbohydrate'] = value + "g"
+            elif "Protein" in row: data['Protein'] = value + "g"
+            elif "Sugars" in row: data['Sugars'] = value + "g"
+            elif "Fiber" in row: data['Dietary Fiber'] = value + "g"
+            elif "Saturated Fat" in row: data['Saturated Fat'] = value + "g"
+        mg_match = re.search(r'(\d+(?:\.\d+)?)\s*mg', row)
+        if mg_match:
+            value = mg_match.group(1)
+            if "Sodium" in row: data['Sodium'] = value + "mg"
+            elif "Cholesterol" in row: data['Cholesterol'] = value + "mg"
+        if "Serving Size" in row:
+            raw = row.replace("Serving Size:", "").strip()
+            gram_match = re.search(r'\(\s*(\d+)\s*g\s*\)', raw) or re.search(r'(\d+)\s*g', raw)
+            data["Serving Size"] = raw
+            data["Serving Size (g)"] = gram_match.group(1) if gram_match else "1"
+    return data
+
+
+def load_fixtures():
+    labels = {}
+    for name in sorted(os.listdir(FIXTURES)):
+        with open(os.path.join(FIXTURES, name), encoding='utf-8') as f:
+            labels[name] = f.read()
+    return labels
+
+
+def timed(fn, inputs, repeat):
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for source in inputs:
+            fn(source)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--repeat', type=int, default=20000)
+    args = parser.parse_args()
+
+    labels = load_fixtures()
+    # The legacy code only ever saw text (Selenium's row.text), so give it the same
+    texts = [html_to_text(src) for src in labels.values()]
+
+    # Both parsers have to agree before the timings mean anything. Known differences:
+    # the old loop let "Includes 1g Added Sugars" overwrite the Total Sugars value,
+    # read "1,200mg" as 200mg and kept an empty serving size as ''.
+    for (name, src), text in zip(labels.items(), texts):
+        old, new = legacy_parse(text), to_csv_fields(parse_label(src))
+        mismatched = {k: (v, new.get(k)) for k, v in old.items() if new.get(k) != v}
+        print(f" {name:<28} {'OK' if not mismatched else mismatched}")
+
+    n = args.repeat * len(texts)
+    legacy = timed(legacy_parse, texts, args.repeat)
+    compiled_text = timed(parse_label, texts, args.repeat)
+    compiled_html = timed(parse_label, list(labels.values()), args.repeat)
+
+    print(f"\n {n} labels per run")
+    print(f" {'legacy per-row regex (text)':<32} {legacy / n * 1e6:7.2f} us/label  {n / legacy:10.0f} labels/s")
+    print(f" {'parse_label (text)':<32} {compiled_text / n * 1e6:7.2f} us/label  {n / compiled_text:10.0f} labels/s")
+    print(f" {'parse_label (raw HTML)':<32} {compiled_html / n * 1e6:7.2f} us/label  {n / compiled_html:10.0f} labels/s")
+    print(f" speedup on text: {legacy / compiled_text:.1f}x")
+
+
+if __name__ == '__main__':
+    main()
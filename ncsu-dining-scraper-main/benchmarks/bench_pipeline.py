@@ -0,0 +1,239 @@
+"""End-to-end benchmark: scrape -> dedupe -> upload against local stand-ins.
+
+Starts benchmarks/stand_in_server.py, points every phase at it and runs in a
+throwaway directory, so nothing touches NetNutrition, MyFitnessPal or the real
+CSVs and history. Reports items/sec, WebDriver calls per item and p50/p95 time
+per item for each phase. The HTTP scrape's p50/p95 are its per-label request
+spans; phases with no per-item timing (dedupe) show n/a.
+
+    python benchmarks/bench_pipeline.py [--engine selenium|http|both] [--latency-ms 20] [--no-upload]
+
+The Selenium phases need Chrome; without it only the HTTP scrape and dedupe run.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+sys.path.insert(0, os.path.dirname(__file__))
+import stand_in_server  # noqa: E402
+
+from metrics import percentile  # noqa: E402
+from selenium.webdriver.remote.webdriver import WebDriver  # noqa: E402
+
+_calls = {"count": 0, "seconds": 0.0}
+_calls_lock = threading.Lock()
+_original_execute = WebDriver.execute
+
+
+def _counting_execute(self, driver_command, params=None):
+    started = time.perf_counter()
+    try:
+        return _original_execute(self, driver_command, params)
+    finally:
+        with _calls_lock:
+            _calls["count"] += 1
+            _calls["seconds"] += time.perf_counter() - started
+
+
+class Phase:
+    """Times one phase and the gaps between the items it produces."""
+
+    def __init__(self, name):
+        self.name = name
+        self.items = 0
+        self.gaps = []
+        self.quantiles = None   # (p50, p95) measured some other way, when there are no gaps
+
+    def __enter__(self):
+        self.calls_before = dict(_calls)
+        self.started = self.last = time.perf_counter()
+        return self
+
+    def tick(self):
+        now = time.perf_counter()
+        self.gaps.append(now - self.last)
+        self.last = now
+        self.items += 1
+
+    def __exit__(self, *exc):
+        self.seconds = time.perf_counter() - self.started
+        self.driver_calls = _calls["count"] - self.calls_before["count"]
+        self.driver_seconds = _calls["seconds"] - self.calls_before["seconds"]
+        return False
+
+    def report(self):
+        return {
+            "items": self.items,
+            "seconds": round(self.seconds, 3),
+            "items_per_s": round(self.items / self.seconds, 2) if self.seconds else 0.0,
+            "driver_calls": self.driver_calls,
+            "driver_calls_per_item": round(self.driver_calls / self.items, 2) if self.items else 0.0,
+            "driver_s": round(self.driver_seconds, 3),
+            "p50_item_s": self._quantile(0.5),
+            "p95_item_s": self._quantile(0.95),
+        }
+
+    def _quantile(self, q):
+        if self.gaps:
+            return round(percentile(self.gaps, q), 4)
+        if self.quantiles:
+            return self.quantiles[0 if q == 0.5 else 1]
+        return None
+
+
+def chrome_available():
+    from ncsu_scraper import create_driver
+    try:
+        create_driver(headless=True).quit()
+        return True
+    except Exception as e:
+        print(f" Chrome not available ({str(e).splitlines()[0] if str(e) else type(e).__name__}); skipping Selenium phases.")
+        return False
+
+
+def bench_selenium_scrape(nn_url, max_days, bulk):
+    import ncsu_scraper
+    phase = Phase("scrape (selenium" + (", bulk)" if bulk else ")"))
+    record_item = ncsu_scraper.record_item
+
+    def timed_record(all_food_data, nutrients, writer=None):
+        record_item(all_food_data, nutrients, writer)
+        phase.tick()
+
+    ncsu_scraper.record_item = timed_record
+    try:
+        with phase:
+            ncsu_scraper.scrape_ncsu_dining(all_locations=True, max_days=max_days, headless=True,
+                                            bulk=bulk, base_url=nn_url)
+    finally:
+        ncsu_scraper.record_item = record_item
+    return phase
+
+
+def bench_http_scrape(nn_url, max_days):
+    import asyncio
+    from http_scraper import LABEL_ENDPOINT, SPAN_NAMES, scrape_http
+    from metrics import summary
+    from ncsu_scraper import save_results
+    phase = Phase("scrape (http)")
+    with phase:
+        rows = asyncio.run(scrape_http(base_url=nn_url, all_locations=True, max_days=max_days))
+        save_results(rows)
+    # Labels are fetched concurrently and handed back at once, so the per-item time is
+    # each label request's own span rather than the gap between rows
+    phase.items = len(rows)
+    labels = summary().get(SPAN_NAMES[LABEL_ENDPOINT])
+    if labels:
+        phase.quantiles = (labels["p50_s"], labels["p95_s"])
+    return phase
+
+
+def bench_dedupe():
+    import deduplicate_data
+    import pandas as pd
+    phase = Phase("dedupe")
+    with phase:
+        deduplicate_data.deduplicate()
+    # Throughput is measured on rows read, not on the (much smaller) upload queue
+    phase.items = len(pd.read_csv(deduplicate_data.FRESH_DATA_FILE))
+    # One vectorized pass: there is no per-item time to report
+    return phase
+
+
+def bench_upload(submit_url, profile, limit):
+    import pandas as pd
+    import uploader
+    from ncsu_scraper import create_driver
+
+    if limit:
+        pd.read_csv(uploader.UPLOAD_FILE).head(limit).to_csv(uploader.UPLOAD_FILE, index=False)
+
+    phase = Phase(f"upload ({profile or uploader.FILL_PROFILE})")
+    update_history = uploader.update_history
+
+    def timed_update(item_id):
+        # Called once per saved food
+        update_history(item_id)
+        phase.tick()
+
+    setup = uploader.setup_existing_driver
+    uploader.setup_existing_driver = lambda: create_driver(headless=True)
+    uploader.update_history = timed_update
+    submit_url_before, uploader.SUBMIT_URL = uploader.SUBMIT_URL, submit_url
+    try:
+        with phase:
+            uploader.main(profile)
+    finally:
+        uploader.setup_existing_driver = setup
+        uploader.update_history = update_history
+        uploader.SUBMIT_URL = submit_url_before
+    return phase
+
+
+def print_report(phases):
+    print(f"\n{'Phase':<24} | {'items':>5} | {'items/s':>8} | {'calls/item':>10} | {'p50':>8} | {'p95':>8} | {'total':>8}")
+    print("-" * 90)
+    def seconds(value):
+        return f"{value:>7.3f}s" if value is not None else f"{'n/a':>8}"
+
+    for p in phases:
+        r = p.report()
+        print(f"{p.name:<24} | {r['items']:>5} | {r['items_per_s']:>8.2f} | {r['driver_calls_per_item']:>10.1f} | "
+              f"{seconds(r['p50_item_s'])} | {seconds(r['p95_item_s'])} | {r['seconds']:>7.2f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--engine', choices=['selenium', 'http', 'both'], default='both')
+    parser.add_argument('--bulk', action='store_true', help="use the one-call label extraction in the Selenium scrape")
+    parser.add_argument('--lean', action='store_true', help="scrape with the lean browser profile")
+    parser.add_argument('--latency-ms', type=int, default=0, help="delay the stand-in adds to every response")
+    parser.add_argument('--max-days', type=int, default=0, help="days per location (0 = all in the fixture)")
+    parser.add_argument('--no-upload', action='store_true')
+    parser.add_argument('--upload-limit', type=int, default=20, help="foods to push through the submit form")
+    parser.add_argument('--profile', choices=['fast', 'human'], help="uploader fill profile")
+    parser.add_argument('--json', help="also write the report here")
+    args = parser.parse_args()
+    max_days = args.max_days or None
+    if args.lean:
+        from browser_profile import set_profile
+        set_profile('lean')
+
+    server, state, url = stand_in_server.start(latency_ms=args.latency_ms)
+    nn_url = url + stand_in_server.NN_PREFIX
+    print(f" Stand-in at {url} ({state.item_count()} items, {args.latency_ms}ms latency)")
+
+    WebDriver.execute = _counting_execute
+    workdir = tempfile.mkdtemp(prefix="bench_pipeline_")
+    cwd = os.getcwd()
+    os.chdir(workdir)
+    phases = []
+    try:
+        browser = args.engine != 'http' and chrome_available()
+        if browser:
+            phases.append(bench_selenium_scrape(nn_url, max_days, args.bulk))
+        if args.engine in ('http', 'both') or not browser:
+            phases.append(bench_http_scrape(nn_url, max_days))
+        phases.append(bench_dedupe())
+        if browser and not args.no_upload:
+            phases.append(bench_upload(url + stand_in_server.SUBMIT_PATH, args.profile, args.upload_limit))
+            print(f" Stand-in recorded {len(state.submissions)} submissions")
+    finally:
+        os.chdir(cwd)
+        WebDriver.execute = _original_execute
+        server.shutdown()
+
+    print_report(phases)
+    print(f" Working files left in {workdir}")
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump({p.name: p.report() for p in phases}, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,73 @@
+"""Benchmark: "highest-protein items at Fountain on a day" via MenuIndex vs. loading the CSV with pandas.
+
+    python benchmarks/bench_query.py [--days 120] [--items 40] [--repeat 2000]
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from bench_archive import synthetic_menus  # noqa: E402
+from food_record import format_frame, parse_frame  # noqa: E402
+from menu_query import MenuIndex  # noqa: E402
+
+
+def pandas_lookup(path, day_header):
+    """What answering the question took before: load, parse, filter, sort."""
+    df = parse_frame(pd.read_csv(path, dtype=str))
+    hits = df[(df['location'] == 'Fountain Dining Hall') & (df['date'] == day_header) & (df['protein_g'] >= 10)]
+    return hits.sort_values('protein_g', ascending=False).drop_duplicates('food_name').head(10)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=120)
+    parser.add_argument('--items', type=int, default=40, help="items per meal")
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    frame = pd.concat(synthetic_menus(args.days, args.items), ignore_index=True)
+    day_header = frame['date'].iloc[-1]
+    work = tempfile.mkdtemp(prefix='bench_query_')
+    try:
+        path = os.path.join(work, 'menus.csv')
+        format_frame(frame).to_csv(path, index=False)
+
+        start = time.perf_counter()
+        expected = pandas_lookup(path, day_header)
+        pandas_s = time.perf_counter() - start
+
+        start = time.perf_counter()
+        index = MenuIndex(frame)
+        build_s = time.perf_counter() - start
+
+        query = dict(location='Fountain', day=day_header, at_least={'protein_g': 10}, sort='protein_g')
+        items = index.query(**query)
+        assert [i['protein_g'] for i in items] == list(expected['protein_g'])
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            index.query(**query)
+        query_s = (time.perf_counter() - start) / args.repeat
+
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            index.query(at_least={'protein_g': 30}, at_most={'calories': 300}, sort='protein_g_per_100g')
+        range_s = (time.perf_counter() - start) / args.repeat
+    finally:
+        shutil.rmtree(work)
+
+    print(f" {len(frame)} rows ({args.days} days)")
+    print(f" {'pandas: load CSV + filter + sort':<38} {pandas_s * 1000:9.3f} ms")
+    print(f" {'MenuIndex build (once per load)':<38} {build_s * 1000:9.3f} ms")
+    print(f" {'MenuIndex: Fountain, one day, top 10':<38} {query_s * 1000:9.3f} ms  ({pandas_s / query_s:.0f}x)")
+    print(f" {'MenuIndex: ranges over every day':<38} {range_s * 1000:9.3f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,299 @@
+"""Local stand-ins for NetNutrition and the MyFitnessPal food-submit form.
+
+Serves the menu in fixtures/netnutrition_menu.json with the labels in
+fixtures/labels, through the same pages and endpoints the scrapers use:
+disclaimer, #unitsPanel, section.card days, item groups, the #nutritionLabel
+modal, and the JSON panel endpoints the HTTP engine calls. /food/submit is a
+two-step form with the IDs uploader.py fills, plus an occasional "similar
+foods" warning.
+
+    python benchmarks/stand_in_server.py --port 8765 [--latency-ms 20]
+"""
+import argparse
+import html
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+FIXTURES = os.path.join(os.path.dirname(__file__), 'fixtures')
+NN_PREFIX = '/NetNutrition/ncstate-dining'
+SUBMIT_PATH = '/food/submit'
+
+
+def load_menu(path=os.path.join(FIXTURES, 'netnutrition_menu.json')):
+    """Expands the fixture into units -> days -> meals -> groups -> items with stable OIDs.
+
+    Child units come back as (name, oid, days, parent_oid) after their parent,
+    whose days are None.
+    """
+    with open(path, encoding='utf-8') as f:
+        spec = json.load(f)
+    labels = {}
+    for name in os.listdir(os.path.join(FIXTURES, 'labels')):
+        with open(os.path.join(FIXTURES, 'labels', name), encoding='utf-8') as f:
+            body = f.read()
+        if not body.lstrip().startswith('<'):
+            # Plain-text recordings get wrapped the way the site renders them
+            rows = ''.join(f'<tr><td>{html.escape(line)}</td></tr>' for line in body.splitlines()[2:])
+            head = body.splitlines()[:2]
+            body = (f'<div id="nutritionLabel"><div class="cbo_nn_LabelHeader">{html.escape(head[0])}</div>'
+                    f'<div>{html.escape(head[1])}</div><table><tbody>{rows}</tbody></table></div>')
+        labels[name] = body
+
+    menus, items = {}, {}
+    next_menu, next_item = 100, 1000
+
+    def expand(unit):
+        # A unit with "children" has no menu of its own, only a list of child units
+        nonlocal next_menu, next_item
+        if 'children' in unit:
+            return [expand(child) for child in unit['children']]
+        days = []
+        for header in spec['days']:
+            meals = []
+            for meal in spec['meals']:
+                groups = []
+                for group, foods in spec['groups'].items():
+                    entries = []
+                    for food, label in foods:
+                        items[next_item] = labels[label]
+                        entries.append((food, next_item))
+                        next_item += 1
+                    groups.append((group, entries))
+                menus[next_menu] = groups
+                meals.append((meal, next_menu))
+                next_menu += 1
+            days.append((header, meals))
+        return (unit['name'], unit['oid'], days)
+
+    units = []
+    for unit in spec['units']:
+        expanded = expand(unit)
+        units.append((unit['name'], unit['oid'], None) if 'children' in unit else expanded)
+        if 'children' in unit:
+            units.extend((name, oid, days, unit['oid']) for name, oid, days in expanded)
+    return units, menus, items
+
+
+HOME_PAGE = """<!DOCTYPE html>
+<html><head><title>NetNutrition</title>
+<style>.hidden {{ display: none; }} #nutritionModal {{ position: fixed; top: 10%; left: 30%; background: #fff; }}</style>
+</head><body>
+<div id="cbo_nn_mobileDisclaimer"><div><section>
+  <div>Disclaimer</div><div>Nutrition information is provided as a guide.</div>
+  <div><div></div><div><button type="button" onclick="acceptDisclaimer()">Continue</button></div></div>
+</section></div></div>
+<div id="unitsPanel">{units}</div>
+<div id="menuPanel" class="hidden"></div>
+<div id="itemPanel" class="hidden"></div>
+<div id="nutritionModal" class="hidden">
+  <div id="labelHost"></div>
+  <button id="btn_nn_nutrition_close" type="button" onclick="closeLabel()">Close</button>
+</div>
+<script>
+const base = {base!r};
+function show(id, on) {{ document.getElementById(id).classList.toggle('hidden', !on); }}
+function acceptDisclaimer() {{ document.getElementById('cbo_nn_mobileDisclaimer').style.display = 'none'; }}
+async function post(path, data) {{
+    const r = await fetch(base + path, {{method: 'POST', body: new URLSearchParams(data),
+        headers: {{'X-Requested-With': 'XMLHttpRequest'}}}});
+    return (r.headers.get('Content-Type') || '').includes('json') ? r.json() : r.text();
+}}
+function panel(payload, id) {{ return payload.panels.find(p => p.id === id).html; }}
+async function unitsSelectUnit(event, oid) {{
+    event.preventDefault();
+    document.getElementById('menuPanel').innerHTML = panel(await post('/Unit/SelectUnitFromUnitsList', {{unitOid: oid}}), 'menuPanel');
+    show('unitsPanel', false); show('menuPanel', true);
+}}
+async function menuListSelectMenu(event, oid) {{
+    event.preventDefault();
+    document.getElementById('itemPanel').innerHTML = panel(await post('/Menu/SelectMenu', {{menuOid: oid}}), 'itemPanel');
+    show('menuPanel', false); show('itemPanel', true);
+}}
+function backToDays(event) {{
+    event.preventDefault();
+    document.getElementById('itemPanel').innerHTML = '';
+    show('itemPanel', false); show('menuPanel', true);
+}}
+function toggleGroup(row) {{
+    document.querySelectorAll('.' + row.dataset.group).forEach(tr => tr.classList.toggle('hidden'));
+}}
+async function getItemNutritionLabelOnClick(event, oid) {{
+    event.preventDefault();
+    document.getElementById('labelHost').innerHTML = await post('/NutritionDetail/ShowItemNutritionLabel', {{detailOid: oid}});
+    show('nutritionModal', true);
+}}
+function closeLabel() {{ show('nutritionModal', false); }}
+</script></body></html>"""
+
+SUBMIT_STEP_1 = """<!DOCTYPE html><html><body>
+<h1>Submit a food</h1>{notice}
+<form method="post" action="{path}/step1">
+  <input id="brand" name="brand" type="text">
+  <input id="description" name="description" type="text">
+  <input type="submit" value="Continue">
+</form></body></html>"""
+
+SUBMIT_DUPLICATE = """<!DOCTYPE html><html><body>
+<p>We found foods similar to "{description}".</p>
+<form method="post" action="{path}/step2form">
+  <input type="hidden" name="description" value="{description}">
+  <button type="submit">Create Food</button>
+</form></body></html>"""
+
+SUBMIT_STEP_2 = """<!DOCTYPE html><html><body>
+<h1>{description}</h1>
+<form method="post" action="{path}/save">
+  <input type="hidden" name="description" value="{description}">
+  <input id="serving" name="serving"> <input id="unit" name="unit">
+  <input id="caloriesCapitalized" name="calories">
+  <input id="total_fat" name="total_fat"> <input id="carbohydrates" name="carbohydrates">
+  <input id="protein" name="protein">
+  <input type="submit" name="action" value="Save Changes">
+  <input type="submit" name="action" value="Save and Create Another">
+</form></body></html>"""
+
+
+class StandIn:
+    def __init__(self, latency_ms=0, duplicate_every=5, menu_path=None):
+        self.units, self.menus, self.items = load_menu(*([menu_path] if menu_path else []))
+        self.latency = latency_ms / 1000
+        self.duplicate_every = duplicate_every
+        self.submissions = []
+        self.requests = 0
+        self.lock = threading.Lock()
+
+    def top_units(self):
+        # Child units are only listed by their parent's panel
+        return [unit for unit in self.units if len(unit) == 3]
+
+    def home(self):
+        links = ''.join(
+            f'<div class="unit"><a href="#" onclick="unitsSelectUnit(event, {oid})">{html.escape(name)}</a></div>'
+            for name, oid, _ in self.top_units()
+        )
+        return HOME_PAGE.format(units=links, base=NN_PREFIX)
+
+    def unit_panel(self, oid):
+        for name, unit_oid, days, *_ in self.units:
+            if unit_oid == oid and days is None:
+                links = ''.join(
+                    f'<div class="unit"><a href="#" onclick="childUnitsSelectUnit(event, {c_oid})">{html.escape(c_name)}</a></div>'
+                    for c_name, c_oid, _, *parent in self.units if parent == [oid]
+                )
+                return {"success": True, "panels": [{"id": "childUnitsPanel", "html": links}]}
+            if unit_oid == oid:
+                cards = ''.join(
+                    f'<section class="card"><header>{html.escape(header)}</header>'
+                    + ''.join(f'<div class="cbo_nn_menuLinkCell"><a href="#" onclick="menuListSelectMenu(event, {m_oid})">{html.escape(meal)}</a></div>'
+                              for meal, m_oid in meals)
+                    + '</section>'
+                    for header, meals in days
+                )
+                return {"success": True, "panels": [{"id": "menuPanel", "html": cards}]}
+        return {"success": False, "panels": []}
+
+    def menu_panel(self, oid):
+        rows = []
+        for g_idx, (group, entries) in enumerate(self.menus.get(oid, [])):
+            rows.append(f'<tr class="cbo_nn_itemGroupRow" data-group="g{g_idx}" onclick="toggleGroup(this)"><td>{html.escape(group)}</td></tr>')
+            rows += [
+                f'<tr class="cbo_nn_itemRow g{g_idx} hidden"><td><a href="#" id="showNutrition_{i_oid}" '
+                f'onclick="getItemNutritionLabelOnClick(event, {i_oid})">{html.escape(food)}</a></td></tr>'
+                for food, i_oid in entries
+            ]
+        body = f'<nav><a href="#" onclick="backToDays(event)">Back</a></nav><table>{"".join(rows)}</table>'
+        return {"success": True, "panels": [{"id": "itemPanel", "html": body}]}
+
+    def item_count(self):
+        return sum(len(entries) for groups in self.menus.values() for _, entries in groups)
+
+
+def make_handler(state):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def _send(self, body, content_type='text/html; charset=utf-8', status=200):
+            if state.latency:
+                time.sleep(state.latency)
+            with state.lock:
+                state.requests += 1
+            data = body.encode('utf-8') if isinstance(body, str) else body
+            self.send_response(status)
+            self.send_header('Content-Type', content_type)
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def _json(self, payload):
+            self._send(json.dumps(payload), 'application/json')
+
+        def _form(self):
+            length = int(self.headers.get('Content-Length') or 0)
+            return {k: v[0] for k, v in parse_qs(self.rfile.read(length).decode('utf-8')).items()}
+
+        def do_GET(self):
+            path = urlparse(self.path).path.rstrip('/')
+            if path == NN_PREFIX:
+                self._send(state.home())
+            elif path == SUBMIT_PATH:
+                self._send(SUBMIT_STEP_1.format(path=SUBMIT_PATH, notice=''))
+            elif path == '/stats':
+                self._json({"submissions": len(state.submissions), "requests": state.requests})
+            else:
+                self._send('not found', status=404)
+
+        def do_POST(self):
+            path = urlparse(self.path).path
+            form = self._form()
+            if path in (NN_PREFIX + '/Unit/SelectUnitFromUnitsList', NN_PREFIX + '/Unit/SelectUnitFromChildUnitsList'):
+                self._json(state.unit_panel(int(form.get('unitOid', 0))))
+            elif path == NN_PREFIX + '/Menu/SelectMenu':
+                self._json(state.menu_panel(int(form.get('menuOid', 0))))
+            elif path == NN_PREFIX + '/NutritionDetail/ShowItemNutritionLabel':
+                self._send(state.items.get(int(form.get('detailOid', 0)), ''))
+            elif path == SUBMIT_PATH + '/step1':
+                description = html.escape(form.get('description', ''))
+                # Every few foods MyFitnessPal asks whether one of its matches will do
+                if state.duplicate_every and sum(map(ord, description)) % state.duplicate_every == 0:
+                    self._send(SUBMIT_DUPLICATE.format(path=SUBMIT_PATH, description=description))
+                else:
+                    self._send(SUBMIT_STEP_2.format(path=SUBMIT_PATH, description=description))
+            elif path == SUBMIT_PATH + '/step2form':
+                self._send(SUBMIT_STEP_2.format(path=SUBMIT_PATH, description=html.escape(form.get('description', ''))))
+            elif path == SUBMIT_PATH + '/save':
+                with state.lock:
+                    state.submissions.append(form)
+                notice = '<p>Saved.</p>'
+                self._send(SUBMIT_STEP_1.format(path=SUBMIT_PATH, notice=notice))
+            else:
+                self._send('not found', status=404)
+
+    return Handler
+
+
+def start(port=0, latency_ms=0, menu_path=None):
+    """Starts the stand-in on a background thread. Returns (server, state, base_url)."""
+    state = StandIn(latency_ms, menu_path=menu_path)
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--latency-ms', type=int, default=0)
+    args = parser.parse_args()
+    server, state, url = start(args.port, args.latency_ms)
+    print(f" NetNutrition stand-in: {url}{NN_PREFIX}  ({state.item_count()} items)")
+    print(f" Food submit stand-in:  {url}{SUBMIT_PATH}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,103 @@
+import json
+import threading
+
+# --- CONFIGURATION ---
+# 'default' is the classic full browser; 'lean' is headless, stops waiting once the DOM
+# is parsed and never fetches images, fonts, media or analytics
+PROFILE = 'default'
+# Chrome DevTools URL patterns the lean profile blocks. Stylesheets still load: the
+# visibility checks (offsetParent, invisibility_of_element) depend on them.
+BLOCKED_URLS = [
+    "*.png", "*.jpg", "*.jpeg", "*.gif", "*.webp", "*.svg", "*.ico", "*.bmp",
+    "*.woff", "*.woff2", "*.ttf", "*.otf", "*.eot",
+    "*.mp4", "*.webm", "*.mp3", "*.ogg", "*.m4a",
+    "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+    "*hotjar.com*", "*newrelic.com*", "*nr-data.net*", "*facebook.net*",
+]
+# Blocked requests never download, so what they would have cost is estimated
+# from a typical size per resource type (Chrome's Network.ResourceType)
+TYPICAL_BYTES = {"Image": 30_000, "Font": 40_000, "Media": 500_000, "Script": 60_000, "Other": 10_000}
+
+_totals = {"requests": 0, "blocked": 0, "bytes": 0, "saved": 0}
+_totals_lock = threading.Lock()
+
+
+def set_profile(name):
+    global PROFILE
+    PROFILE = name
+
+
+def is_lean():
+    return PROFILE == 'lean'
+
+
+def apply_lean_options(options):
+    """Lean additions to ChromeOptions (call before the driver starts)."""
+    options.add_argument("--headless=new")
+    options.add_argument("--window-size=1920,1080")
+    options.add_argument("--blink-settings=imagesEnabled=false")
+    options.add_argument("--mute-audio")
+    options.add_argument("--disable-extensions")
+    # driver.get() returns at DOMContentLoaded; our waits cover the rest
+    options.page_load_strategy = 'eager'
+    # Network events go to the performance log so each run can report its traffic
+    options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+    options.add_experimental_option("perfLoggingPrefs", {"enableNetwork": True, "enablePage": False})
+    return options
+
+
+def start_blocking(driver):
+    """Turns on request blocking for a freshly started lean driver."""
+    driver.execute_cdp_cmd("Network.enable", {})
+    driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": BLOCKED_URLS})
+    driver.lean_traffic = True
+
+
+def drain_traffic(driver):
+    """Folds the network events logged since the last call into the run totals.
+
+    Chrome buffers the performance log until it is read, so this runs on every
+    trip back to the home page as well as before the driver quits.
+    """
+    if not getattr(driver, "lean_traffic", False):
+        return
+    try:
+        entries = driver.get_log("performance")
+    except Exception:
+        return
+    requests = blocked = transferred = saved = 0
+    for entry in entries:
+        message = json.loads(entry["message"])["message"]
+        method = message.get("method")
+        if method == "Network.requestWillBeSent":
+            requests += 1
+        elif method == "Network.loadingFinished":
+            transferred += message["params"].get("encodedDataLength", 0)
+        elif method == "Network.loadingFailed" and message["params"].get("blockedReason"):
+            blocked += 1
+            saved += TYPICAL_BYTES.get(message["params"].get("type"), TYPICAL_BYTES["Other"])
+    with _totals_lock:
+        _totals["requests"] += requests
+        _totals["blocked"] += blocked
+        _totals["bytes"] += int(transferred)
+        _totals["saved"] += saved
+
+
+def reset_traffic():
+    """Starts a new run's totals (the daemon keeps one process for many runs)."""
+    with _totals_lock:
+        for key in _totals:
+            _totals[key] = 0
+
+
+def traffic_report():
+    with _totals_lock:
+        return dict(_totals)
+
+
+def print_traffic_report():
+    t = traffic_report()
+    if not t["requests"]:
+        return
+    print(f" 🌐 Lean profile: {t['blocked']} of {t['requests']} requests blocked (~{t['saved'] / 1e6:.2f} MB saved), "
+          f"{t['bytes'] / 1e6:.2f} MB transferred")
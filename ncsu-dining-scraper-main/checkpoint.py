@@ -0,0 +1,156 @@
+import csv
+import json
+import os
+import threading
+
+from food_record import CSV_COLUMNS
+from metrics import span
+
+# --- CONFIGURATION ---
+MANIFEST_FILE = 'scrape_progress.jsonl'
+# Every finished run is also appended here as Parquet (see menu_archive.py); None turns it off
+ARCHIVE_DIR = 'menu_archive'
+
+
+class StreamingWriter:
+    """Appends each scraped row to the CSV exactly once, flushed as it goes."""
+
+    def __init__(self, path, resume=False):
+        self.path = path
+        self.count = 0
+        self._lock = threading.Lock()
+        # Callers pass ProgressManifest.resumed: only an unfinished run's rows are continued
+        append = resume and os.path.exists(path) and os.path.getsize(path) > 0
+        self._file = open(path, 'a' if append else 'w', newline='', encoding='utf-8')
+        self._writer = csv.DictWriter(self._file, fieldnames=CSV_COLUMNS, extrasaction='ignore')
+        # Missing fields stay empty so pandas reads them back as NaN, like before
+        if not append:
+            self._writer.writeheader()
+            self._file.flush()
+
+    def write(self, row):
+        with self._lock:
+            self._writer.writerow(row)
+            self._file.flush()
+            self.count += 1
+
+    def close(self):
+        self._file.close()
+
+
+def set_archive(path):
+    global ARCHIVE_DIR
+    ARCHIVE_DIR = path
+
+
+def archive_run(records, resumed_csv=None):
+    """Appends a run's FoodRecords to the archive (the CSV is overwritten by the next run; this isn't).
+
+    A resumed run only holds the rows scraped since the crash, so it passes
+    resumed_csv and the whole streamed CSV is archived instead.
+    """
+    if not ARCHIVE_DIR or not (records or resumed_csv):
+        return None
+    try:
+        from menu_archive import archive_csv, archive_records
+    except ImportError:
+        print(" pyarrow isn't installed, so this run was not archived.")
+        return None
+    with span("archive write"):
+        if resumed_csv:
+            if not os.path.exists(resumed_csv):
+                return None
+            run = archive_csv(resumed_csv, ARCHIVE_DIR)
+            source = resumed_csv
+        else:
+            run = archive_records(records, ARCHIVE_DIR)
+            source = f"{len(records)} rows"
+    print(f" 🗄 Archived {source} to {ARCHIVE_DIR}/ (run {run})")
+    return run
+
+
+def meal_key(loc_name, day_header, meal_name):
+    return f"{loc_name}|{day_header}|{meal_name}"
+
+
+def day_key(loc_name, day_header):
+    return f"{loc_name}|{day_header}"
+
+
+class ProgressManifest:
+    """Append-only log of what has been scraped, so --resume can skip it.
+
+    One JSON line per mark: ["locations" | "days" | "meals", key] once that is done,
+    ["item", meal_key, index] for each item of a meal still in progress. Marking
+    an item appends one line instead of rewriting the file; resuming replays the
+    log and compacts it, dropping the item lines of meals that were finished.
+    """
+
+    def __init__(self, path=MANIFEST_FILE, resume=False):
+        self.path = path
+        self._lock = threading.Lock()
+        self._done = {"locations": set(), "days": set(), "meals": set()}
+        self._items = {}
+        # finish_run deletes the log, so one still here is an unfinished run's
+        self.resumed = resume and os.path.exists(path)
+        if self.resumed:
+            self._replay()
+        self._compact()
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def _replay(self):
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    kind, key, *index = json.loads(line)
+                except ValueError:
+                    # The last line of a crashed run may be cut short
+                    continue
+                if kind == "item":
+                    self._items.setdefault(key, set()).add(index[0])
+                else:
+                    self._done[kind].add(key)
+                    if kind == "meals":
+                        self._items.pop(key, None)
+
+    def _compact(self):
+        tmp = self.path + ".tmp"
+        with open(tmp, 'w', encoding='utf-8') as f:
+            for kind, keys in self._done.items():
+                for key in sorted(keys):
+                    f.write(json.dumps([kind, key]) + "\n")
+            for key, indices in self._items.items():
+                for index in sorted(indices):
+                    f.write(json.dumps(["item", key, index]) + "\n")
+        # Atomic swap: a crash mid-write never leaves a half manifest behind
+        os.replace(tmp, self.path)
+
+    def _append(self, *event):
+        self._file.write(json.dumps(event) + "\n")
+        self._file.flush()
+
+    def is_done(self, kind, key):
+        return key in self._done[kind]
+
+    def mark_done(self, kind, key):
+        with self._lock:
+            self._done[kind].add(key)
+            if kind == "meals":
+                self._items.pop(key, None)
+            self._append(kind, key)
+
+    def item_done(self, key, index):
+        return index in self._items.get(key, ())
+
+    def mark_item(self, key, index):
+        with self._lock:
+            self._items.setdefault(key, set()).add(index)
+            self._append("item", key, index)
+
+    def close(self):
+        self._file.close()
+
+    def clear(self):
+        self.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
@@ -0,0 +1,149 @@
+import time
+from datetime import datetime, timedelta
+
+from selenium.common.exceptions import WebDriverException
+
+from metrics import span
+from browser_profile import set_profile
+from ncsu_scraper import MAX_DAYS, close_driver, create_driver, scrape_ncsu_dining
+
+# --- CONFIGURATION ---
+SCHEDULE = ("06:30", "10:30", "16:00")   # Local times to scrape: ahead of breakfast, lunch and dinner
+HEALTH_CHECK = 300                       # Seconds between browser checks while waiting for the next run
+RESTART_AFTER_RUNS = 12                  # Fresh Chrome every so often so a long-lived one can't bloat
+
+
+def next_run(now, schedule=SCHEDULE, every=None):
+    """The next scheduled time after now: every N minutes, or the next HH:MM in schedule."""
+    if every:
+        return now + timedelta(minutes=every)
+    times = sorted(datetime.strptime(t, "%H:%M").time() for t in schedule)
+    for t in times:
+        candidate = datetime.combine(now.date(), t)
+        if candidate > now:
+            return candidate
+    return datetime.combine(now.date() + timedelta(days=1), times[0])
+
+
+class WarmBrowser:
+    """One Chrome kept open between runs, replaced only when it dies or has done enough runs."""
+
+    def __init__(self, headless=True):
+        self.headless = headless
+        self.driver = None
+        self.runs = 0
+
+    def alive(self):
+        if self.driver is None:
+            return False
+        try:
+            self.driver.execute_script("return 1")
+            return True
+        except WebDriverException:
+            return False
+
+    def get(self):
+        if not self.alive():
+            self.restart("not running" if self.driver is None else "stopped responding")
+        return self.driver
+
+    def restart(self, reason):
+        print(f" 🔄 Starting Chrome ({reason})")
+        self.quit()
+        with span("daemon browser start"):
+            self.driver = create_driver(self.headless)
+        self.runs = 0
+
+    def quit(self):
+        if self.driver is not None:
+            try:
+                close_driver(self.driver)
+            except Exception:
+                pass
+            self.driver = None
+
+
+def wait_until(when, browser):
+    """Sleeps until `when`, checking on the browser now and then so the next run starts warm."""
+    while True:
+        remaining = (when - datetime.now()).total_seconds()
+        if remaining <= 0:
+            return
+        time.sleep(min(remaining, HEALTH_CHECK))
+        if browser.driver is not None and not browser.alive():
+            browser.restart("stopped responding while idle")
+
+
+def run_once(browser, **scrape_kwargs):
+    """One scrape on the warm browser; a dead browser is replaced and the run resumed once."""
+    for attempt in range(2):
+        try:
+            with span("daemon run"):
+                rows = scrape_ncsu_dining(driver=browser.get(), resume=attempt > 0, **scrape_kwargs)
+            break
+        except WebDriverException as e:
+            # The manifest isn't cleared on a crash, so the retry skips what was already written
+            print(f" Browser failed mid-run ({str(e).splitlines()[0]}); retrying on a fresh one.")
+            browser.restart("crashed")
+    else:
+        rows = None
+
+    browser.runs += 1
+    if browser.runs >= RESTART_AFTER_RUNS:
+        browser.restart(f"{browser.runs} runs")
+    return rows
+
+
+def run_daemon(schedule=SCHEDULE, every=None, run_now=False, headless=True, **scrape_kwargs):
+    """Keeps one Chrome (and its NetNutrition session) open and scrapes on a schedule until Ctrl-C."""
+    browser = WarmBrowser(headless)
+    browser.get()
+    try:
+        when = datetime.now() if run_now else next_run(datetime.now(), schedule, every)
+        while True:
+            print(f"\n 💤 Next scrape at {when:%a %H:%M}")
+            wait_until(when, browser)
+            started = time.perf_counter()
+            try:
+                rows = run_once(browser, **scrape_kwargs)
+                print(f" Run finished: {len(rows or [])} items in {time.perf_counter() - started:.1f}s")
+            except Exception as e:
+                # A bad run (CSV/manifest I/O, SQLite, the archive...) shouldn't end the daemon
+                print(f" Run failed after {time.perf_counter() - started:.1f}s ({type(e).__name__}: {e}); "
+                      f"trying again at the next scheduled time.")
+            when = next_run(datetime.now(), schedule, every)
+    except KeyboardInterrupt:
+        print("\n Stopping daemon...")
+    finally:
+        browser.quit()
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Scrape on a schedule with one warm Chrome session.")
+    parser.add_argument("--at", default=",".join(SCHEDULE), help="comma-separated local HH:MM run times")
+    parser.add_argument("--every", type=int, help="run every N minutes instead of at fixed times")
+    parser.add_argument("--now", action="store_true", help="also run once right away")
+    parser.add_argument("--visible", action="store_true", help="show the browser window")
+    parser.add_argument("--lean", action="store_true", help="block images/fonts/media/analytics, eager page loads")
+    parser.add_argument("--all-locations", action="store_true")
+    parser.add_argument("--max-days", type=int, default=MAX_DAYS, help="days per location (0 = every day)")
+    parser.add_argument("--bulk", action="store_true")
+    parser.add_argument("--cache", action="store_true")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip meals whose item list hasn't changed since the last run")
+    args = parser.parse_args()
+    if args.lean: set_profile('lean')
+
+    scrape_kwargs = {"all_locations": args.all_locations, "max_days": args.max_days or None, "bulk": args.bulk}
+    if args.cache:
+        from nutrition_cache import NutritionCache
+        scrape_kwargs["cache"] = NutritionCache()
+    if args.incremental:
+        from menu_fingerprints import MenuFingerprints
+        scrape_kwargs["fingerprints"] = MenuFingerprints()
+
+    run_daemon(tuple(args.at.split(",")), args.every, args.now, not args.visible, **scrape_kwargs)
+    for store in (scrape_kwargs.get("cache"), scrape_kwargs.get("fingerprints")):
+        if store:
+            store.close()
@@ -1,63 +1,141 @@
-import pandas as pd
-import os
-import json
-
-# Configuration
-FRESH_DATA_FILE = 'nc_state_dining_menu.csv'
-HISTORY_FILE = 'upload_history.json'
-UPLOAD_QUEUE_FILE = 'to_upload.csv'
-
-def deduplicate():
-    # 1. Load the fresh scrape
-    if not os.path.exists(FRESH_DATA_FILE):
-        print(f" Error: {FRESH_DATA_FILE} not found. Run the scraper first.")
-        return
-
-    df = pd.read_csv(FRESH_DATA_FILE)
-    print(f" Loaded {len(df)} items from the latest scrape.")
-
-    # 2. Load (or create) the history file
-    # The history file stores unique IDs of foods we've already seen.
-    # We'll use "Food Name + Calories" as a unique signature.
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, 'r') as f:
-            history = json.load(f)
-        print(f" Loaded history: {len(history)} items previously processed.")
-    else:
-        history = []
-        print(" No history found. Creating a new history file.")
-
-    # 3. Filter for NEW items
-    new_items = []
-    
-    # We convert the list to a set for instant O(1) lookups
-    history_set = set(history)
-
-    for index, row in df.iterrows():
-        # Create a unique signature for this food
-        # Example: "Buttermilk Biscuit_190"
-        # This allows for different versions of the same food if macros change
-        unique_id = f"{row['Food Name']}_{row['Calories']}"
-
-        if unique_id not in history_set:
-            new_items.append(row)
-            # Add to temporary set so we don't add duplicates from the *current* scrape
-            # (e.g. if 'Buttermilk Biscuit' appears on Monday AND Tuesday menu)
-            history_set.add(unique_id) 
-
-    # 4. Save the queue
-    if new_items:
-        queue_df = pd.DataFrame(new_items)
-        queue_df.to_csv(UPLOAD_QUEUE_FILE, index=False)
-        print(f"\n Success! Found {len(new_items)} new items.")
-        print(f" Saved to '{UPLOAD_QUEUE_FILE}' - These are ready for upload.")
-        
-        # NOTE: We do NOT update the history.json yet. 
-        # We only update history after the Uploader Bot confirms success.
-    else:
-        print("\n No new items found. You are up to date")
-        # Create an empty file just so the next script doesn't crash
-        pd.DataFrame(columns=df.columns).to_csv(UPLOAD_QUEUE_FILE, index=False)
-
-if __name__ == "__main__":
-    deduplicate()
\ No newline at end of file
+import pandas as pd
+import os
+
+from food_record import CSV_COLUMNS, canonical_id, csv_signatures, format_frame, from_frame, parse_frame, signatures, to_frame
+from history_store import HistoryStore
+from near_dedupe import REPORT_FILE, merge_near_duplicates
+
+# Configuration
+FRESH_DATA_FILE = 'nc_state_dining_menu.csv'
+HISTORY_FILE = 'upload_history.db'
+UPLOAD_QUEUE_FILE = 'to_upload.csv'
+# Also drop near-duplicates (renamed/recalculated foods; see near_dedupe.py). Off unless --fuzzy:
+# a wrong merge means a food is never uploaded, so every merge is listed in near_duplicates.csv
+FUZZY_MATCH = False
+
+def hash_strings(values):
+    return pd.util.hash_pandas_object(pd.Series(values, dtype=object), index=False).to_numpy()
+
+def is_record_frame(df):
+    # FoodRecord frames (the archive) name columns after the record; CSVs use 'Food Name'
+    return 'food_name' in df.columns
+
+def signature_hashes(df):
+    """64-bit hash of the "Food Name_Calories" signature (FoodRecord.signature) of every row, in one pass."""
+    # Example signature: "Buttermilk Biscuit_190"
+    # This allows for different versions of the same food if macros change
+    return hash_strings(signatures(df) if is_record_frame(df) else csv_signatures(df))
+
+def find_new_items(chunks, history_ids):
+    """Rows whose signature is neither in history nor earlier in the input.
+
+    chunks is any iterable of DataFrames (one file, many files, read_csv chunks or
+    menu_archive batches), so a whole semester never has to sit in memory at once.
+    The new items come back as a FoodRecord frame (numbers, not '12g' strings); CSV
+    rows are parsed only once the repeats are gone.
+    """
+    # History IDs are the same "Food Name_Calories" strings, so they hash identically once
+    # older ones like 'Biscuit_190.0' are put in canonical form
+    history = pd.DataFrame({'_sig': hash_strings([canonical_id(i) for i in history_ids])})
+
+    total = 0
+    kept = []
+    for chunk in chunks:
+        total += len(chunk)
+        chunk = chunk.assign(_sig=signature_hashes(chunk))
+        # Anti-join against history, then drop repeats inside this chunk
+        # (e.g. if 'Buttermilk Biscuit' appears on Monday AND Tuesday menu)
+        merged = chunk.merge(history, on='_sig', how='left', indicator=True)
+        fresh = merged[merged['_merge'] == 'left_only'].drop(columns='_merge').drop_duplicates('_sig')
+        if not is_record_frame(fresh):
+            fresh = parse_frame(fresh).assign(_sig=fresh['_sig'])
+        kept.append(fresh)
+
+    if not kept:
+        return pd.DataFrame(), total
+    # Repeats that span chunks/files are dropped here, keeping the first sighting
+    new_items = pd.concat(kept, ignore_index=True).drop_duplicates('_sig').drop(columns='_sig')
+    return new_items, total
+
+def read_scrapes(files, chunksize=None):
+    # Everything is read as text; parse_frame() turns the nutrient columns into numbers
+    for path in files:
+        if chunksize:
+            yield from pd.read_csv(path, chunksize=chunksize, dtype=str)
+        else:
+            yield pd.read_csv(path, dtype=str)
+
+def drop_near_duplicates(new_items, history_ids):
+    """Removes new items that are only a reworded or recalculated version of a known food."""
+    kept, index = merge_near_duplicates(from_frame(new_items), history_ids)
+    merged = index.report(REPORT_FILE)
+    print(f" Merged {merged} near-duplicates into foods already known (see '{REPORT_FILE}'){':' if merged else '.'}")
+    for merge in index.merges[:5]:
+        print(f"   {merge['Food Name']!r} -> {merge['Merged Into']!r}: {merge['Reason']}")
+    if merged > 5:
+        print(f"   ... and {merged - 5} more")
+    return to_frame(kept)
+
+def deduplicate(files=None, chunksize=None, archive=None, since=None, fuzzy=FUZZY_MATCH):
+    # 1. Load the fresh scrape(s): CSV files, or the Parquet archive (menu_archive.py)
+    if archive:
+        if not os.path.isdir(archive):
+            print(f" Error: {archive} not found. Run the scraper first.")
+            return
+        source = f"the archive{f' since {since}' if since else ''}"
+    else:
+        files = files or [FRESH_DATA_FILE]
+        missing = [f for f in files if not os.path.exists(f)]
+        if missing:
+            print(f" Error: {', '.join(missing)} not found. Run the scraper first.")
+            return
+        source = f"{len(files)} scrape file(s)"
+
+    # 2. Load (or create) the history store
+    # The history store keeps unique IDs of foods we've already seen.
+    # We'll use "Food Name + Calories" as a unique signature.
+    # (An old upload_history.json is imported automatically the first time.)
+    store = HistoryStore(HISTORY_FILE)
+    if len(store):
+        print(f" Loaded history: {len(store)} items previously processed.")
+    else:
+        print(" No history found. Creating a new history file.")
+    history_ids = store.ids()
+    store.close()
+
+    # 3. Filter for NEW items
+    if archive:
+        from menu_archive import iter_archive
+        # Typed columns straight from Parquet: nothing to parse
+        chunks = iter_archive(archive, start=since, **({'batch_size': chunksize} if chunksize else {}))
+    else:
+        chunks = read_scrapes(files, chunksize)
+    new_items, total = find_new_items(chunks, history_ids)
+    print(f" Loaded {total} items from {source}.")
+    if fuzzy:
+        new_items = drop_near_duplicates(new_items, history_ids)
+
+    # 4. Save the queue
+    if len(new_items):
+        format_frame(new_items).to_csv(UPLOAD_QUEUE_FILE, index=False)
+        print(f"\n Success! Found {len(new_items)} new items.")
+        print(f" Saved to '{UPLOAD_QUEUE_FILE}' - These are ready for upload.")
+        
+        # NOTE: We do NOT update the history store yet. 
+        # We only update history after the Uploader Bot confirms success.
+    else:
+        print("\n No new items found. You are up to date")
+        # Create an empty file just so the next script doesn't crash
+        pd.DataFrame(columns=CSV_COLUMNS).to_csv(UPLOAD_QUEUE_FILE, index=False)
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Queue scraped foods that haven't been uploaded yet.")
+    parser.add_argument("files", nargs="*", help=f"scrape CSVs to dedupe (default: {FRESH_DATA_FILE})")
+    parser.add_argument("--chunksize", type=int, help="read the CSVs this many rows at a time")
+    parser.add_argument("--archive", nargs="?", const="menu_archive", help="read the Parquet archive instead of CSVs")
+    parser.add_argument("--since", help="with --archive: only menus from this day on (YYYY-MM-DD)")
+    parser.add_argument("--fuzzy", action="store_true",
+                        help="also drop near-duplicates of known foods (listed in near_duplicates.csv)")
+    args = parser.parse_args()
+    deduplicate(args.files, args.chunksize, args.archive, args.since, fuzzy=args.fuzzy or FUZZY_MATCH)
@@ -0,0 +1,249 @@
+import re
+
+import pandas as pd
+
+# --- CONFIGURATION ---
+# Every column the scraper can fill, in the order they appear in the CSV
+CSV_COLUMNS = [
+    'Date', 'Location', 'Meal', 'Food Name', 'Serving Size', 'Serving Size (g)',
+    'Calories', 'Protein', 'Total Carbohydrate', 'Total Fat', 'Sugars',
+    'Saturated Fat', 'Dietary Fiber', 'Sodium', 'Cholesterol',
+]
+DATE_FORMAT = "%A, %B %d, %Y"       # NetNutrition's day header, e.g. "Monday, October 13, 2025"
+# What the scraper and pandas write for "no value"
+MISSING_TEXT = ('', 'N/A', 'nan', 'NaN', '-', 'None')
+NUMBER = re.compile(r'\s*(\d+(?:\.\d+)?)')
+
+# CSV column -> record attribute, for the text columns
+TEXT_FIELDS = {
+    'Date': 'date',
+    'Location': 'location',
+    'Meal': 'meal',
+    'Food Name': 'food_name',
+    'Serving Size': 'serving_size',
+}
+# CSV column -> (record attribute, unit suffix the CSV has always used)
+NUMERIC_FIELDS = {
+    'Serving Size (g)': ('serving_g', ''),
+    'Calories': ('calories', ''),
+    'Protein': ('protein_g', 'g'),
+    'Total Carbohydrate': ('carbohydrate_g', 'g'),
+    'Total Fat': ('fat_g', 'g'),
+    'Sugars': ('sugars_g', 'g'),
+    'Saturated Fat': ('saturated_fat_g', 'g'),
+    'Dietary Fiber': ('fiber_g', 'g'),
+    'Sodium': ('sodium_mg', 'mg'),
+    'Cholesterol': ('cholesterol_mg', 'mg'),
+}
+TEXT_ATTRS = tuple(TEXT_FIELDS.values())
+NUMERIC_ATTRS = tuple(attr for attr, _ in NUMERIC_FIELDS.values())
+
+
+def to_number(value):
+    """'12g' / '480mg' / '190' / 12 -> float. None for N/A, '-', '' and NaN."""
+    if value is None:
+        return None
+    if isinstance(value, (int, float)):
+        return None if value != value else float(value)
+    match = NUMBER.match(str(value))
+    return float(match.group(1)) if match else None
+
+
+def to_text(value):
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    value = str(value).strip()
+    return None if value in MISSING_TEXT else value
+
+
+def format_number(value, suffix=''):
+    """190.0 -> '190', 3.5 -> '3.5g' (with suffix 'g'). None stays None."""
+    if value is None:
+        return None
+    value = float(value)
+    return f"{int(value) if value.is_integer() else value}{suffix}"
+
+
+
+def canonical_id(item_id):
+    """A history ID in FoodRecord.signature form: 'Biscuit_190.0' -> 'Biscuit_190', 'Biscuit_nan' -> 'Biscuit_N/A'.
+
+    Older uploaders wrote the calories however pandas printed them, which was a
+    float whenever the scrape had a blank calorie value.
+    """
+    name, sep, calories = str(item_id).rpartition('_')
+    if not sep:
+        return str(item_id)
+    if name in MISSING_TEXT:
+        name = 'None'
+    return f"{name}_{format_number(to_number(calories)) or 'N/A'}"
+
+class FoodRecord:
+    """One scraped food with its nutrients as numbers.
+
+    Text fields (date, location, meal, food_name, serving_size) are str, the
+    nutrient fields (serving_g, calories, *_g, *_mg) are float, and anything the
+    label didn't have is None rather than 'N/A' / 'nan'. Slotted, so a large
+    in-memory run holds a fixed set of attributes per item instead of a dict of
+    strings.
+    """
+
+    __slots__ = TEXT_ATTRS + NUMERIC_ATTRS
+
+    def __init__(self, **fields):
+        for attr in self.__slots__:
+            setattr(self, attr, fields.pop(attr, None))
+        if fields:
+            raise TypeError(f"Unknown FoodRecord fields: {', '.join(fields)}")
+
+    @classmethod
+    def from_row(cls, row):
+        """A scraped dict or CSV row ('Total Fat': '12g', ...) -> record. Parses each value once."""
+        record = cls.__new__(cls)
+        for column, attr in TEXT_FIELDS.items():
+            setattr(record, attr, to_text(row.get(column)))
+        for column, (attr, _) in NUMERIC_FIELDS.items():
+            setattr(record, attr, to_number(row.get(column)))
+        return record
+
+    def to_row(self):
+        """Record -> the CSV's strings ('12g', '480mg'). Missing values are left out."""
+        row = {}
+        for column, attr in TEXT_FIELDS.items():
+            value = getattr(self, attr)
+            if value is not None:
+                row[column] = value
+        for column, (attr, suffix) in NUMERIC_FIELDS.items():
+            value = getattr(self, attr)
+            if value is not None:
+                row[column] = format_number(value, suffix)
+        return row
+
+    @property
+    def uploadable(self):
+        return self.food_name is not None and self.calories is not None
+
+    @property
+    def signature(self):
+        """The "Food Name_Calories" ID stored in history, e.g. "Buttermilk Biscuit_190"."""
+        return f"{self.food_name}_{format_number(self.calories) or 'N/A'}"
+
+    def __eq__(self, other):
+        if not isinstance(other, FoodRecord):
+            return NotImplemented
+        return all(getattr(self, a) == getattr(other, a) for a in self.__slots__)
+
+    def __repr__(self):
+        fields = ", ".join(f"{a}={getattr(self, a)!r}" for a in self.__slots__ if getattr(self, a) is not None)
+        return f"FoodRecord({fields})"
+
+
+# --- Columnar conversion ---
+# A "frame" is a DataFrame with one column per record attribute: object columns for
+# text, float64 columns (NaN = missing) for the nutrients.
+
+def to_frame(records):
+    """Records -> frame, one column array per attribute."""
+    columns = {attr: [getattr(r, attr) for r in records] for attr in FoodRecord.__slots__}
+    frame = pd.DataFrame(columns, columns=list(FoodRecord.__slots__))
+    return frame.astype({attr: 'float64' for attr in NUMERIC_ATTRS})
+
+
+def from_frame(frame):
+    """Frame -> records. NaN becomes None."""
+    records = []
+    text = [frame[a].tolist() if a in frame else [None] * len(frame) for a in TEXT_ATTRS]
+    numbers = [frame[a].tolist() if a in frame else [None] * len(frame) for a in NUMERIC_ATTRS]
+    for i in range(len(frame)):
+        record = FoodRecord.__new__(FoodRecord)
+        for attr, values in zip(TEXT_ATTRS, text):
+            value = values[i]
+            setattr(record, attr, None if value is None or value != value else value)
+        for attr, values in zip(NUMERIC_ATTRS, numbers):
+            value = values[i]
+            setattr(record, attr, None if value is None or value != value else float(value))
+        records.append(record)
+    return records
+
+
+def parse_numbers(values):
+    """Vectorized to_number() over a column of CSV strings -> float64, NaN for missing."""
+    # Plain numbers, then the same with the '12g' / '480mg' unit dropped, both in C;
+    # only what is still unparsed after that goes through the regex
+    numbers = pd.to_numeric(values, errors='coerce')
+    rest = numbers.isna() & values.notna()
+    if rest.any():
+        text = values[rest].astype(str).str.strip()
+        numbers[rest] = pd.to_numeric(text.str.rstrip('gmkcal '), errors='coerce')
+        rest &= numbers.isna()
+        if rest.any():
+            numbers[rest] = pd.to_numeric(text[rest].str.extract(NUMBER, expand=False), errors='coerce')
+    return numbers.astype('float64')
+
+
+def parse_frame(df):
+    """CSV-style DataFrame ('12g', 'N/A', ...) -> frame, parsing each column in one vectorized pass."""
+    frame = pd.DataFrame(index=df.index)
+    for column, attr in TEXT_FIELDS.items():
+        if column in df:
+            values = df[column].astype(object)
+            frame[attr] = values.where(values.notna() & ~values.astype(str).str.strip().isin(MISSING_TEXT), None)
+        else:
+            frame[attr] = None
+    for column, (attr, _) in NUMERIC_FIELDS.items():
+        if column in df:
+            frame[attr] = parse_numbers(df[column])
+        else:
+            frame[attr] = float('nan')
+    return frame
+
+
+def number_text(values, suffix=''):
+    """Vectorized format_number() over a float column; NaN stays NaN."""
+    values = values.astype('float64')
+    text = values.astype(str)
+    whole = values.round() == values
+    text = text.where(~whole, text.str[:-2])  # '190.0' -> '190'
+    return (text + suffix).where(values.notna())
+
+
+def format_frame(frame):
+    """Frame -> DataFrame with the CSV's columns and strings, ready for to_csv()."""
+    df = pd.DataFrame(index=frame.index)
+    for column in CSV_COLUMNS:
+        if column in TEXT_FIELDS:
+            df[column] = frame[TEXT_FIELDS[column]]
+        else:
+            attr, suffix = NUMERIC_FIELDS[column]
+            df[column] = number_text(frame[attr], suffix)
+    return df
+
+
+def signatures(frame):
+    """FoodRecord.signature for every row of a frame."""
+    names = frame['food_name'].astype(object)
+    names = names.where(names.notna(), 'None').astype(str)
+    return names + '_' + number_text(frame['calories']).fillna('N/A')
+
+
+def csv_signatures(df):
+    """signatures() straight from a CSV-style DataFrame, parsing only what isn't canonical already."""
+    calories = df['Calories'].astype(str).str.strip()
+    # '190' is exactly what format_number() would give back; anything else goes through a float
+    plain = calories.str.fullmatch(r'0|[1-9]\d*').fillna(False).astype(bool)
+    if not plain.all():
+        rest = ~plain
+        calories[rest] = number_text(parse_numbers(df['Calories'][rest])).fillna('N/A')
+    names = df['Food Name'].astype(str)
+    names = names.where(names.notna() & ~names.isin(MISSING_TEXT), 'None')
+    return names + '_' + calories
+
+
+def iso_days(dates):
+    """Vectorized day header -> 'YYYY-MM-DD' ('Monday, October 13, 2025' -> '2025-10-13'); NaN if it doesn't parse."""
+    return pd.to_datetime(pd.Series(dates, dtype=object), format=DATE_FORMAT, errors='coerce').dt.strftime('%Y-%m-%d')
+
+
+def read_records(path):
+    """A scrape or upload-queue CSV -> records."""
+    return from_frame(parse_frame(pd.read_csv(path, dtype=str)))
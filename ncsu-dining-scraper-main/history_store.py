@@ -0,0 +1,198 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+import uuid
+
+from food_record import canonical_id
+
+# --- CONFIGURATION ---
+HISTORY_DB = 'upload_history.db'
+LEGACY_HISTORY_FILE = 'upload_history.json'
+
+
+class HistoryStore:
+    """IDs of foods already uploaded ("Food Name_Calories"), indexed in SQLite.
+
+    Membership checks hit an in-memory set; appends go to the database in one
+    transaction per batch instead of rewriting a JSON list per item. The first
+    time it opens next to an old upload_history.json, that file is imported.
+    """
+
+    def __init__(self, path=HISTORY_DB, legacy_json=LEGACY_HISTORY_FILE):
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS history (id TEXT PRIMARY KEY, added_at REAL NOT NULL)")
+        self._conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn.commit()
+        self._ids = {row[0] for row in self._conn.execute("SELECT id FROM history")}
+
+        if legacy_json and os.path.exists(legacy_json) and not self._meta("migrated_from"):
+            self.migrate_from_json(legacy_json)
+
+    def _meta(self, key):
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def __contains__(self, item_id):
+        return item_id in self._ids
+
+    def __len__(self):
+        return len(self._ids)
+
+    def ids(self):
+        return set(self._ids)
+
+    def add(self, item_id):
+        self.add_many([item_id])
+
+    def add_many(self, item_ids):
+        """Atomic batch append: either every new ID lands or none do."""
+        now = time.time()
+        with self._lock:
+            new_ids = [i for i in dict.fromkeys(item_ids) if i not in self._ids]
+            if not new_ids:
+                return 0
+            with self._conn:
+                self._conn.executemany(
+                    "INSERT OR IGNORE INTO history (id, added_at) VALUES (?, ?)",
+                    [(i, now) for i in new_ids],
+                )
+            self._ids.update(new_ids)
+            return len(new_ids)
+
+    def migrate_from_json(self, json_path):
+        with open(json_path, 'r') as f:
+            history = json.load(f)
+        # 'Biscuit_190.0' from the old JSON is stored as 'Biscuit_190', what signatures look like now
+        added = self.add_many(canonical_id(i) for i in history)
+        with self._lock, self._conn:
+            self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated_from', ?)", (json_path,))
+        print(f" Migrated {added} IDs from {json_path} into {self.path}")
+        return added
+
+    def compact(self):
+        """Checkpoint the WAL and rebuild the file to drop free pages."""
+        with self._lock:
+            self._conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+            self._conn.execute("VACUUM")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+class UploadJournal:
+    """Per-item upload state, so a crash or retry never submits the same food twice.
+
+    claimed -> submitting -> done, or claimed -> failed (safe to try again).
+    "submitting" is written just before the save button is clicked; an item left
+    there by a dead run may or may not have reached MyFitnessPal, so it is never
+    retried automatically (see `history_store.py journal` / `release`).
+    """
+
+    def __init__(self, path=HISTORY_DB):
+        self.path = path
+        self.run = uuid.uuid4().hex[:8]
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS upload_journal ("
+            " id TEXT PRIMARY KEY, state TEXT NOT NULL, run TEXT NOT NULL, session TEXT,"
+            " attempts INTEGER NOT NULL DEFAULT 0, updated_at REAL NOT NULL)"
+        )
+        self._conn.commit()
+
+    def claim(self, item_id, session=None):
+        """True if this run may upload item_id now (and nobody else will)."""
+        now = time.time()
+        with self._lock, self._conn:
+            row = self._conn.execute("SELECT state, run FROM upload_journal WHERE id = ?", (item_id,)).fetchone()
+            if row is None:
+                self._conn.execute(
+                    "INSERT INTO upload_journal (id, state, run, session, attempts, updated_at) VALUES (?, 'claimed', ?, ?, 1, ?)",
+                    (item_id, self.run, session, now),
+                )
+                return True
+            state, run = row
+            # A claim left by a dead run never got as far as saving, so it is safe to take over
+            if state == 'failed' or (state == 'claimed' and run != self.run):
+                self._conn.execute(
+                    "UPDATE upload_journal SET state = 'claimed', run = ?, session = ?, attempts = attempts + 1, updated_at = ? WHERE id = ?",
+                    (self.run, session, now, item_id),
+                )
+                return True
+            return False
+
+    def _set(self, item_id, state, only_from=None):
+        query = "UPDATE upload_journal SET state = ?, updated_at = ? WHERE id = ?"
+        params = [state, time.time(), item_id]
+        if only_from:
+            query += " AND state = ?"
+            params.append(only_from)
+        with self._lock, self._conn:
+            self._conn.execute(query, params)
+
+    def submitting(self, item_id):
+        self._set(item_id, 'submitting')
+
+    def done(self, item_id):
+        self._set(item_id, 'done')
+
+    def failed(self, item_id):
+        # Once the save was clicked the outcome is unknown, so that state sticks
+        self._set(item_id, 'failed', only_from='claimed')
+
+    def release(self, item_id):
+        """Marks an in-doubt item as safe to retry (after checking it isn't on MyFitnessPal)."""
+        self._set(item_id, 'failed', only_from='submitting')
+
+    def counts(self):
+        with self._lock:
+            return dict(self._conn.execute("SELECT state, COUNT(*) FROM upload_journal GROUP BY state"))
+
+    def in_doubt(self):
+        """Items a previous run started saving but never confirmed."""
+        with self._lock:
+            return [row[0] for row in self._conn.execute(
+                "SELECT id FROM upload_journal WHERE state = 'submitting' AND run != ? ORDER BY updated_at", (self.run,)
+            )]
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Inspect or maintain the upload history store.")
+    parser.add_argument("command", choices=["stats", "migrate", "compact", "journal", "release"])
+    parser.add_argument("--json", default=LEGACY_HISTORY_FILE, help="legacy history file to import")
+    parser.add_argument("ids", nargs="*", help="item IDs for 'release' (default: every in-doubt item)")
+    args = parser.parse_args()
+
+    if args.command in ("journal", "release"):
+        journal = UploadJournal()
+        in_doubt = journal.in_doubt()
+        if args.command == "release":
+            for item_id in args.ids or in_doubt:
+                journal.release(item_id)
+            print(f" Released {len(args.ids or in_doubt)} item(s) for retry")
+        else:
+            print(f" Upload journal: {journal.counts()}")
+            for item_id in in_doubt:
+                print(f"   in doubt: {item_id}")
+        journal.close()
+        raise SystemExit
+
+    store = HistoryStore(legacy_json=None)
+    if args.command == "migrate":
+        store.migrate_from_json(args.json)
+    elif args.command == "compact":
+        store.compact()
+    print(f" {len(store)} IDs in {store.path}")
+    store.close()
@@ -0,0 +1,334 @@
+import asyncio
+import re
+import time
+from html.parser import HTMLParser
+
+import aiohttp
+
+from checkpoint import archive_run, meal_key
+from food_record import FoodRecord
+from menu_fingerprints import menu_fingerprint
+from metrics import span, write_metrics
+from ncsu_scraper import BASE_URL, MAX_DAYS, clean_text, is_dining_hall, save_results
+from nutrition_parser import parse_label, to_csv_fields
+
+# --- CONFIGURATION ---
+# NetNutrition endpoints the page's own JavaScript calls (relative to BASE_URL)
+UNIT_ENDPOINT = "/Unit/SelectUnitFromUnitsList"
+CHILD_UNIT_ENDPOINT = "/Unit/SelectUnitFromChildUnitsList"
+MENU_ENDPOINT = "/Menu/SelectMenu"
+LABEL_ENDPOINT = "/NutritionDetail/ShowItemNutritionLabel"
+
+MAX_CONCURRENCY = 8   # Requests in flight against the host at once
+REQUEST_TIMEOUT = 20  # Seconds per request
+RETRIES = 3
+
+# Each request is timed under the name of the browser step it replaces
+SPAN_NAMES = {
+    "": "navigate home",
+    UNIT_ENDPOINT: "location click",
+    CHILD_UNIT_ENDPOINT: "location click",
+    MENU_ENDPOINT: "meal click",
+    LABEL_ENDPOINT: "label (http)",
+}
+
+# The OIDs live in the onclick handlers, e.g. "unitsSelectUnit(event, 12)"
+UNIT_OID = re.compile(r'(?:unitsSelectUnit|childUnitsSelectUnit)\(\s*(?:event\s*,\s*)?(\d+)')
+MENU_OID = re.compile(r'menuListSelectMenu\(\s*(?:event\s*,\s*)?(\d+)')
+ITEM_OID = re.compile(r'showNutrition_(\d+)')
+
+
+class _LinkCollector(HTMLParser):
+    """Collects every <a> with its attributes, its text and the section.card it sits in."""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.links = []      # (attrs, text, section_index)
+        self.headers = []    # header text per section.card
+        self._section = -1
+        self._in_header = False
+        self._link = None
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == "section" and "card" in (attrs.get("class") or "").split():
+            self._section += 1
+            self.headers.append("")
+        elif tag == "header" and self._section >= 0:
+            self._in_header = True
+        elif tag == "a":
+            self._link = [attrs, ""]
+
+    def handle_endtag(self, tag):
+        if tag == "header":
+            self._in_header = False
+        elif tag == "a" and self._link is not None:
+            attrs, text = self._link
+            self.links.append((attrs, clean_text(text) if text.strip() else "", self._section))
+            self._link = None
+
+    def handle_data(self, data):
+        if self._link is not None:
+            self._link[1] += data
+        if self._in_header:
+            self.headers[self._section] = clean_text(self.headers[self._section] + " " + data)
+
+
+def _collect(fragment):
+    parser = _LinkCollector()
+    parser.feed(fragment)
+    return parser
+
+
+def _find_oid(attrs, pattern):
+    for key in ("onclick", "href", "id"):
+        match = pattern.search(attrs.get(key) or "")
+        if match:
+            return match.group(1)
+    return None
+
+
+def _succeeded(results, what):
+    """Results of gather(..., return_exceptions=True) minus the failures, which are logged.
+
+    Only Exceptions are dropped: the pipeline's Stopped, Ctrl-C and cancellation
+    still end the scrape.
+    """
+    kept = []
+    for result in results:
+        if isinstance(result, BaseException):
+            if not isinstance(result, Exception):
+                raise result
+            print(f"    {what} failed: {result}")
+            continue
+        kept.append(result)
+    return kept
+
+
+def _panel(payload, panel_id):
+    """NetNutrition answers with {"panels": [{"id": ..., "html": ...}]}; pick one by id."""
+    if isinstance(payload, str):
+        return payload
+    for panel in payload.get("panels", []):
+        if panel.get("id") == panel_id:
+            return panel.get("html", "")
+    return ""
+
+
+def parse_units(page_html):
+    """[(name, oid)] for every location link inside #unitsPanel."""
+    start = page_html.find('id="unitsPanel"')
+    fragment = page_html[start:] if start != -1 else page_html
+    units = []
+    for attrs, text, _ in _collect(fragment).links:
+        oid = _find_oid(attrs, UNIT_OID)
+        if oid and text:
+            units.append((text, oid))
+    return units
+
+
+def parse_menus(menu_html):
+    """[(day_header, [(meal_name, menu_oid)])] in the order the site lists the days."""
+    parser = _collect(menu_html)
+    days = [(header, []) for header in parser.headers]
+    for attrs, text, section in parser.links:
+        oid = _find_oid(attrs, MENU_OID)
+        if oid and text and section >= 0:
+            days[section][1].append((text, oid))
+    return days
+
+
+def parse_items(item_html):
+    """[(food_name, detail_oid)] for every a[id^='showNutrition'] on a meal."""
+    items = []
+    for attrs, text, _ in _collect(item_html).links:
+        oid = _find_oid(attrs, ITEM_OID)
+        if oid and (attrs.get("id") or "").startswith("showNutrition"):
+            items.append((text or "N/A", oid))
+    return items
+
+
+def parse_label_html(label_html):
+    """Same fields extract_dynamic_nutrition() reads, but straight from the label HTML."""
+    data = to_csv_fields(parse_label(label_html))
+    if "Serving Size" not in data:
+        data["Serving Size"] = "N/A"
+        data["Serving Size (g)"] = "1"
+    return data
+
+
+class NetNutritionClient:
+    """Keep-alive HTTP session against NetNutrition with a cap on in-flight requests."""
+
+    def __init__(self, base_url=BASE_URL, max_concurrency=MAX_CONCURRENCY):
+        self.base_url = base_url.rstrip("/")
+        self.max_concurrency = max_concurrency
+        self.requests_made = 0
+        self._session = None
+        self._limit = None
+
+    async def __aenter__(self):
+        connector = aiohttp.TCPConnector(limit=self.max_concurrency, keepalive_timeout=30)
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+            headers={"X-Requested-With": "XMLHttpRequest"},
+        )
+        self._limit = asyncio.Semaphore(self.max_concurrency)
+        return self
+
+    async def __aexit__(self, *exc):
+        await self._session.close()
+
+    async def _request(self, method, path, data=None):
+        url = self.base_url + path
+        for attempt in range(RETRIES):
+            try:
+                async with self._limit:
+                    self.requests_made += 1
+                    with span(SPAN_NAMES.get(path, path), attempt=attempt, **(data or {})):
+                        async with self._session.request(method, url, data=data) as resp:
+                            resp.raise_for_status()
+                            if "json" in resp.headers.get("Content-Type", ""):
+                                return await resp.json(content_type=None)
+                            return await resp.text()
+            except (aiohttp.ClientError, asyncio.TimeoutError):
+                if attempt == RETRIES - 1:
+                    raise
+                await asyncio.sleep(0.5 * (attempt + 1))
+
+    async def home(self):
+        # The first GET also hands out the session cookies the POST endpoints need
+        return await self._request("GET", "")
+
+    async def unit(self, unit_oid):
+        return await self._request("POST", UNIT_ENDPOINT, {"unitOid": unit_oid})
+
+    async def child_unit(self, unit_oid):
+        return await self._request("POST", CHILD_UNIT_ENDPOINT, {"unitOid": unit_oid})
+
+    async def menu(self, menu_oid):
+        return await self._request("POST", MENU_ENDPOINT, {"menuOid": menu_oid})
+
+    async def label(self, detail_oid):
+        return await self._request("POST", LABEL_ENDPOINT, {"detailOid": detail_oid})
+
+
+async def _scrape_meal(client, loc_name, day_header, meal_name, menu_oid, on_row=None, fingerprints=None):
+    # A meal that still fails after RETRIES is skipped, like "Could not click meal." in the browser
+    try:
+        items = parse_items(_panel(await client.menu(menu_oid), "itemPanel"))
+    except Exception as e:
+        print(f"    -> {loc_name} | {day_header} | {meal_name}: could not load meal ({e})")
+        return []
+
+    # Same item list as the last run? Reuse those rows and skip every label request
+    key = meal_key(loc_name, day_header, meal_name)
+    if fingerprints:
+        fingerprint = menu_fingerprint((f"showNutrition_{oid}", name) for name, oid in items)
+        rows = fingerprints.unchanged(key, fingerprint)
+        if rows is not None:
+            print(f"    -> {loc_name} | {day_header} | {meal_name}: unchanged ({len(rows)} items)")
+            if on_row:
+                for row in rows:
+                    await asyncio.get_running_loop().run_in_executor(None, on_row, row)
+            return rows
+    print(f"    -> {loc_name} | {day_header} | {meal_name}: {len(items)} items")
+
+    async def one(f_name, detail_oid):
+        try:
+            nutrients = parse_label_html(_panel(await client.label(detail_oid), "nutritionLabel"))
+        except Exception as e:
+            print(f"      Label {detail_oid} failed: {e}")
+            return None
+        nutrients['Food Name'] = f_name
+        nutrients['Meal'] = meal_name
+        nutrients['Location'] = loc_name
+        nutrients['Date'] = day_header
+        if on_row:
+            # on_row may block (a full pipeline queue), so keep it off the event loop
+            await asyncio.get_running_loop().run_in_executor(None, on_row, nutrients)
+        return nutrients
+
+    rows = await asyncio.gather(*(one(name, oid) for name, oid in items), return_exceptions=True)
+    rows = [row for row in _succeeded(rows, "Label") if row]
+    if fingerprints and len(rows) == len(items):
+        fingerprints.put(key, fingerprint, rows)
+    return rows
+
+
+async def _scrape_location(client, loc_name, unit_oid, max_days, on_row=None, fingerprints=None, child=False):
+    try:
+        payload = await (client.child_unit(unit_oid) if child else client.unit(unit_oid))
+    except Exception as e:
+        print(f"Skipping {loc_name} ({e})")
+        return []
+
+    menu_html = _panel(payload, "menuPanel")
+    if not menu_html:
+        # Some units answer with a list of their own units (e.g. the stations in a food court)
+        children = parse_units(_panel(payload, "childUnitsPanel"))
+        if not children:
+            print(f"Skipping {loc_name} (no menu)")
+            return []
+        print(f"{loc_name}: {[name for name, _ in children]}")
+        per_child = await asyncio.gather(
+            *(_scrape_location(client, f"{loc_name} - {name}", oid, max_days, on_row, fingerprints, child=True)
+              for name, oid in children),
+            return_exceptions=True,
+        )
+        return [row for rows in _succeeded(per_child, loc_name) for row in rows]
+
+    days = parse_menus(menu_html)
+    if max_days is not None:
+        days = days[:max_days]
+
+    meals = [
+        _scrape_meal(client, loc_name, day_header, meal_name, menu_oid, on_row, fingerprints)
+        for day_header, day_meals in days
+        for meal_name, menu_oid in day_meals
+    ]
+    rows = []
+    for meal_rows in _succeeded(await asyncio.gather(*meals, return_exceptions=True), f"{loc_name} meal"):
+        rows.extend(meal_rows)
+    return rows
+
+
+async def scrape_http(base_url=BASE_URL, all_locations=False, max_days=MAX_DAYS, max_concurrency=MAX_CONCURRENCY, on_row=None,
+                      fingerprints=None):
+    """Browserless scrape: same rows as scrape_ncsu_dining(), fetched in parallel over HTTP.
+
+    on_row(row) is called as each label arrives, before the ordered list is returned.
+    """
+    async with NetNutritionClient(base_url, max_concurrency) as client:
+        units = parse_units(await client.home())
+        print(f"Found Locations: {[name for name, _ in units]}")
+        if not all_locations:
+            units = [(name, oid) for name, oid in units if is_dining_hall(name)]
+
+        # Results come back grouped per location so the CSV keeps the Selenium ordering
+        per_location = await asyncio.gather(
+            *(_scrape_location(client, name, oid, max_days, on_row, fingerprints) for name, oid in units),
+            return_exceptions=True,
+        )
+        per_location = _succeeded(per_location, "Location")
+        print(f" {client.requests_made} HTTP requests")
+
+    all_food_data = []
+    for rows in per_location:
+        all_food_data.extend(FoodRecord.from_row(row) for row in rows)
+    return all_food_data
+
+
+def scrape_ncsu_dining_http(**kwargs):
+    start = time.perf_counter()
+    all_food_data = asyncio.run(scrape_http(**kwargs))
+    print(f" Scraped {len(all_food_data)} items in {time.perf_counter() - start:.1f}s")
+    save_results(all_food_data)
+    archive_run(all_food_data)
+    write_metrics("scrape")
+    return all_food_data
+
+
+if __name__ == '__main__':
+    scrape_ncsu_dining_http()
@@ -0,0 +1,188 @@
+import os
+import time
+import uuid
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
+
+from food_record import NUMERIC_ATTRS, TEXT_ATTRS, iso_days, parse_frame, to_frame
+
+# --- CONFIGURATION ---
+ARCHIVE_DIR = 'menu_archive'
+ROW_GROUP_SIZE = 64 * 1024
+
+# One directory per menu day and location: menu_archive/day=2025-10-13/location=Fountain%20Dining%20Hall/
+PARTITIONING = ds.partitioning(pa.schema([('day', pa.string()), ('location', pa.string())]), flavor='hive')
+
+# Names repeat on every menu, so they are stored once per file and referenced by index
+NAME = pa.dictionary(pa.int32(), pa.string())
+SCHEMA = pa.schema(
+    [('day', pa.string()), ('location', pa.string())]
+    + [(attr, NAME) for attr in TEXT_ATTRS if attr != 'location']
+    + [(attr, pa.float64()) for attr in NUMERIC_ATTRS]
+    + [('run', pa.string()), ('scraped_at', pa.timestamp('s'))]
+)
+RECORD_COLUMNS = list(TEXT_ATTRS + NUMERIC_ATTRS)
+
+
+def new_run_id():
+    """'20251013T120501123456-3fa9c1': sorts by time, and two writes in the same instant still differ."""
+    return f"{datetime.now().strftime('%Y%m%dT%H%M%S%f')}-{uuid.uuid4().hex[:6]}"
+
+
+def archive_frame(frame, root=ARCHIVE_DIR, run=None):
+    """Appends a FoodRecord frame to the archive as one new Parquet file per (day, location).
+
+    Earlier runs are never touched, so the same menu scraped twice is in the
+    archive twice; read_archive(latest=True) keeps only the newest run of each.
+    Returns the run ID the files were written under.
+    """
+    if not len(frame):
+        return None
+    run = run or new_run_id()
+    frame = frame.assign(
+        day=iso_days(frame['date']).to_numpy(),
+        run=run,
+        scraped_at=pd.Timestamp.now().floor('s'),
+    )
+    table = pa.Table.from_pandas(frame, schema=SCHEMA, preserve_index=False)
+    ds.write_dataset(
+        table, root, format='parquet', partitioning=PARTITIONING,
+        basename_template=f"run-{run}-{{i}}.parquet",
+        existing_data_behavior='overwrite_or_ignore',
+        max_rows_per_group=ROW_GROUP_SIZE,
+    )
+    return run
+
+
+def archive_records(records, root=ARCHIVE_DIR, run=None):
+    return archive_frame(to_frame(records), root, run)
+
+
+def archive_csv(path, root=ARCHIVE_DIR, run=None):
+    """Imports a scrape CSV (e.g. an old nc_state_dining_menu.csv) into the archive."""
+    return archive_frame(parse_frame(pd.read_csv(path, dtype=str)), root, run)
+
+
+def _filter(start=None, end=None, locations=None, meals=None):
+    conditions = []
+    if start:
+        conditions.append(ds.field('day') >= start)
+    if end:
+        conditions.append(ds.field('day') <= end)
+    if locations:
+        conditions.append(ds.field('location').isin(list(locations)))
+    if meals:
+        conditions.append(ds.field('meal').isin(list(meals)))
+    combined = None
+    for condition in conditions:
+        combined = condition if combined is None else combined & condition
+    return combined
+
+
+def scan(root=ARCHIVE_DIR, columns=None, start=None, end=None, locations=None, meals=None, batch_size=None):
+    """A pyarrow Scanner over the archive.
+
+    start / end are 'YYYY-MM-DD' days (inclusive) and, with locations, prune
+    whole partition directories before any file is opened. Only the listed
+    columns are read from the files that are left.
+    """
+    dataset = ds.dataset(root, format='parquet', partitioning=PARTITIONING, schema=SCHEMA)
+    kwargs = {'batch_size': batch_size} if batch_size else {}
+    return dataset.scanner(columns=columns, filter=_filter(start, end, locations, meals), **kwargs)
+
+
+def read_archive(root=ARCHIVE_DIR, columns=None, start=None, end=None, locations=None, meals=None, latest=True):
+    """The archived rows as a FoodRecord frame (name columns come back as pandas categoricals).
+
+    latest keeps only the newest run of each (day, location), so a menu scraped
+    several times a day is counted once.
+    """
+    if not os.path.isdir(root):
+        return pd.DataFrame(columns=columns or RECORD_COLUMNS)
+    wanted = list(columns or RECORD_COLUMNS)
+    read = wanted + [c for c in ('day', 'location', 'run') if latest and c not in wanted]
+    frame = scan(root, read, start, end, locations, meals).to_table().to_pandas()
+    if latest and len(frame):
+        newest = frame.groupby(['day', 'location'], observed=True, dropna=False)['run'].transform('max')
+        frame = frame[frame['run'] == newest].reset_index(drop=True)
+    return frame[wanted]
+
+
+def iter_archive(root=ARCHIVE_DIR, columns=None, start=None, end=None, locations=None, batch_size=ROW_GROUP_SIZE):
+    """Yields FoodRecord frames one record batch at a time, partition by partition, every run included."""
+    if not os.path.isdir(root):
+        return
+    for batch in scan(root, columns or RECORD_COLUMNS, start, end, locations, batch_size=batch_size).to_batches():
+        if batch.num_rows:
+            yield batch.to_pandas()
+
+
+def partitions(root=ARCHIVE_DIR):
+    """[(day, location, rows)] for every partition, from the Parquet footers only."""
+    if not os.path.isdir(root):
+        return []
+    dataset = ds.dataset(root, format='parquet', partitioning=PARTITIONING, schema=SCHEMA)
+    counts = {}
+    for fragment in dataset.get_fragments():
+        key = ds.get_partition_keys(fragment.partition_expression)
+        key = (key.get('day'), key.get('location'))
+        counts[key] = counts.get(key, 0) + fragment.metadata.num_rows
+    return sorted((day or '?', location, rows) for (day, location), rows in counts.items())
+
+
+def compact(root=ARCHIVE_DIR):
+    """Merges every partition's per-run files into one, so scans open one file per (day, location).
+
+    The rows (and their run column) are kept as they are, so read_archive()
+    returns the same thing before and after.
+    """
+    merged = 0
+    for folder, _, names in os.walk(root):
+        files = sorted(os.path.join(folder, n) for n in names if n.endswith('.parquet'))
+        if len(files) < 2:
+            continue
+        table = ds.dataset(files, format='parquet').to_table()
+        newest = max(table.column('run').to_pylist())
+        # Written under a name the dataset scan ignores, then swapped in
+        tmp = os.path.join(folder, '_compacting.tmp')
+        pq.write_table(table, tmp, row_group_size=ROW_GROUP_SIZE)
+        target = os.path.join(folder, f"run-{newest}-compact.parquet")
+        os.replace(tmp, target)
+        for path in files:
+            if path != target:
+                os.remove(path)
+        merged += len(files)
+    return merged
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Parquet archive of every scrape, partitioned by day and location.")
+    parser.add_argument("command", choices=["add", "list", "show", "compact"])
+    parser.add_argument("files", nargs="*", help="scrape CSVs for 'add'")
+    parser.add_argument("--root", default=ARCHIVE_DIR)
+    parser.add_argument("--from", dest="start", help="first day, YYYY-MM-DD")
+    parser.add_argument("--to", dest="end", help="last day, YYYY-MM-DD")
+    parser.add_argument("--location", action="append", help="repeat for several locations")
+    parser.add_argument("--columns", help="comma-separated, e.g. food_name,calories,protein_g")
+    args = parser.parse_args()
+
+    if args.command == "add":
+        for path in args.files:
+            run = archive_csv(path, args.root)
+            print(f" Archived {path} (run {run})")
+    elif args.command == "compact":
+        print(f" Merged {compact(args.root)} run files")
+    elif args.command == "list":
+        for day, location, rows in partitions(args.root):
+            print(f" {day}  {location:<35} {rows:>6} rows")
+    else:
+        started = time.perf_counter()
+        frame = read_archive(args.root, args.columns.split(",") if args.columns else None,
+                             args.start, args.end, args.location)
+        print(frame.to_string(max_rows=40))
+        print(f" {len(frame)} rows in {time.perf_counter() - started:.2f}s")
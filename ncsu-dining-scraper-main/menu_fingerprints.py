@@ -0,0 +1,64 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+# --- CONFIGURATION ---
+FINGERPRINT_FILE = 'menu_fingerprints.db'
+KEEP_DAYS = 14        # Menus whose date has long passed are dropped after this
+
+
+def menu_fingerprint(items):
+    """Hash of a meal's item list [(showNutrition id, food name)], in menu order."""
+    digest = hashlib.sha1()
+    for item_id, food_name in items:
+        digest.update(f"{item_id}\t{food_name}\n".encode('utf-8'))
+    return digest.hexdigest()
+
+
+class MenuFingerprints:
+    """Last-seen item list fingerprint of every (location, date, meal), plus the rows scraped for it.
+
+    A meal whose fingerprint hasn't changed since the last run is replayed from
+    here instead of being walked again, so re-running the scraper during the day
+    only opens labels for the meals that were actually edited.
+    """
+
+    def __init__(self, path=FINGERPRINT_FILE, keep_days=KEEP_DAYS):
+        self.path = path
+        self.keep = keep_days * 86400
+        self.reused = 0
+        self.changed = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS meals ("
+            " key TEXT PRIMARY KEY, fingerprint TEXT NOT NULL,"
+            " rows TEXT NOT NULL, scraped_at REAL NOT NULL)"
+        )
+        self._conn.execute("DELETE FROM meals WHERE scraped_at < ?", (time.time() - self.keep,))
+        self._conn.commit()
+
+    def unchanged(self, key, fingerprint):
+        """The rows stored for this meal if its fingerprint still matches, else None."""
+        with self._lock:
+            row = self._conn.execute("SELECT fingerprint, rows FROM meals WHERE key = ?", (key,)).fetchone()
+        if row and row[0] == fingerprint:
+            self.reused += 1
+            return json.loads(row[1])
+        self.changed += 1
+        return None
+
+    def put(self, key, fingerprint, rows):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO meals (key, fingerprint, rows, scraped_at) VALUES (?, ?, ?, ?)",
+                (key, fingerprint, json.dumps(rows), time.time()),
+            )
+            self._conn.commit()
+
+    def close(self):
+        print(f" Menu fingerprints: {self.reused} meals unchanged, {self.changed} scraped")
+        with self._lock:
+            self._conn.close()
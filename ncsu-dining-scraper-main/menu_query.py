@@ -0,0 +1,325 @@
+import json
+import os
+import threading
+import time
+from datetime import date, datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import numpy as np
+import pandas as pd
+
+from checkpoint import ARCHIVE_DIR
+from deduplicate_data import FRESH_DATA_FILE
+from food_record import DATE_FORMAT, NUMERIC_ATTRS, iso_days, parse_frame
+
+# --- CONFIGURATION ---
+PORT = 8766               # Local query endpoint: http://127.0.0.1:8766/query?location=Fountain&day=today
+LIMIT = 10                # Items returned when the caller doesn't say
+# Nutrients that get a per-100g density column, e.g. protein_g_per_100g
+DENSITY_ATTRS = tuple(a for a in NUMERIC_ATTRS if a != 'serving_g')
+# Served-with-no-grams labels get Serving Size (g) = 1, which would make every density 100x
+MIN_SERVING_G = 2.0
+OUTPUT_ATTRS = ('serving_g', 'calories', 'protein_g', 'carbohydrate_g', 'fat_g')
+
+
+def load_frame(source=None, since=None):
+    """A FoodRecord frame from the archive (a directory) or a scrape CSV.
+
+    With no source: the archive if there is one, else nc_state_dining_menu.csv.
+    """
+    source = source or (ARCHIVE_DIR if ARCHIVE_DIR and os.path.isdir(ARCHIVE_DIR) else FRESH_DATA_FILE)
+    if os.path.isdir(source):
+        from menu_archive import read_archive
+        return read_archive(source, start=since)
+    return parse_frame(pd.read_csv(source, dtype=str))
+
+
+class MenuIndex:
+    """Everything a lookup needs, computed once per load.
+
+    - groups: (location, day, meal) -> row numbers, with None standing for "any",
+      so "Fountain, today, any meal" is one dict hit
+    - columns: every nutrient as a float64 array, plus <nutrient>_per_100g from
+      Serving Size (g)
+    - ranked / ranked_desc: per column, the row numbers sorted by value (NaN
+      dropped), used for range filters and top-N over the whole index without a scan
+    """
+
+    def __init__(self, frame):
+        self.size = len(frame)
+        self.names = frame['food_name'].astype(object).to_numpy()
+        self.locations = frame['location'].astype(object).to_numpy()
+        self.dates = frame['date'].astype(object).to_numpy()
+        self.meals = frame['meal'].astype(object).to_numpy()
+        self.days = iso_days(self.dates).to_numpy(dtype=object)
+
+        self.columns = {a: frame[a].to_numpy(dtype='float64') for a in NUMERIC_ATTRS}
+        grams = self.columns['serving_g']
+        grams = np.where(grams >= MIN_SERVING_G, grams, np.nan)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            for a in DENSITY_ATTRS:
+                self.columns[f"{a}_per_100g"] = self.columns[a] / grams * 100.0
+
+        self.ranked, self.ranked_desc = {}, {}
+        for name, values in self.columns.items():
+            order = np.argsort(values, kind='stable')
+            order = order[~np.isnan(values[order])]
+            self.ranked[name] = (order, values[order])
+            # Its own stable sort (not order[::-1]) so ties stay in menu order, like a group sort
+            desc = np.argsort(-values, kind='stable')
+            self.ranked_desc[name] = desc[~np.isnan(values[desc])]
+
+        # One groupby per combination of fields; a field left out of the key is stored as None ("any")
+        keyed = pd.DataFrame({'location': self.locations, 'day': self.days, 'meal': self.meals})
+        self.groups = {}
+        for fields in (('location', 'day', 'meal'), ('location', 'day'), ('location', 'meal'), ('location',),
+                       ('day', 'meal'), ('day',), ('meal',)):
+            for key, rows in keyed.groupby(list(fields), dropna=False, sort=False).indices.items():
+                key = dict(zip(fields, key if isinstance(key, tuple) else (key,)))
+                key = tuple(None if pd.isna(v) else v for v in (key.get('location'), key.get('day'), key.get('meal')))
+                # Rows with no parsable day also land under (loc, None, meal); merge rather than overwrite
+                if key in self.groups:
+                    rows = np.union1d(self.groups[key], rows)
+                self.groups[key] = rows.astype(np.int64)
+
+        self.location_names = sorted({l for l in self.locations if isinstance(l, str)})
+        self.meal_names = sorted({m for m in self.meals if isinstance(m, str)})
+        self.day_names = sorted({d for d in self.days if isinstance(d, str)})
+
+    # --- resolving what the user typed ---
+
+    def resolve_locations(self, text):
+        """'Fountain' -> ['Fountain Dining Hall']: exact name, else every name containing it."""
+        if not text:
+            return [None]
+        if text in self.location_names:
+            return [text]
+        return [l for l in self.location_names if text.lower() in l.lower()]
+
+    def resolve_day(self, text):
+        if not text:
+            return None
+        lowered = text.lower()
+        if lowered in ('today', 'tomorrow'):
+            return (date.today() + timedelta(days=lowered == 'tomorrow')).isoformat()
+        try:
+            return datetime.strptime(text.strip(), DATE_FORMAT).date().isoformat()
+        except ValueError:
+            return text.strip()
+
+    def resolve_meal(self, text):
+        if not text:
+            return None
+        return next((m for m in self.meal_names if m.lower() == text.lower()), text)
+
+    def resolve_column(self, text):
+        """'protein' -> 'protein_g', 'protein/100g' -> 'protein_g_per_100g'."""
+        if text in self.columns:
+            return text
+        base, per_100g = text, False
+        for suffix in ('_per_100g', '/100g', '_100g'):
+            if base.endswith(suffix):
+                base, per_100g = base[:-len(suffix)], True
+        match = next((a for a in NUMERIC_ATTRS if a == base or a.startswith(base + '_')), None)
+        if match is None:
+            raise KeyError(f"unknown column: {text}")
+        return f"{match}_per_100g" if per_100g else match
+
+    # --- lookups ---
+
+    def _candidates(self, location, day, meal):
+        """Row numbers for the selection, or None for "the whole index"."""
+        day, meal = self.resolve_day(day), self.resolve_meal(meal)
+        locations = self.resolve_locations(location)
+        if locations == [None] and day is None and meal is None:
+            return None
+        parts = [self.groups.get((loc, day, meal)) for loc in locations]
+        parts = [p for p in parts if p is not None]
+        if not parts:
+            return np.empty(0, dtype=np.int64)
+        return parts[0] if len(parts) == 1 else np.concatenate(parts)
+
+    def query(self, location=None, day=None, meal=None, at_least=None, at_most=None,
+              sort=None, ascending=False, limit=LIMIT, distinct=True):
+        """Rows matching the selection and every range, best first by `sort`.
+
+        at_least / at_most: {column: value}, e.g. {'protein_g': 20} and
+        {'calories': 500}. distinct keeps one row per food name (the menu repeats
+        a food at every meal).
+        """
+        rows = self._candidates(location, day, meal)
+        bounds = {}
+        for name, value in (at_least or {}).items():
+            bounds.setdefault(self.resolve_column(name), [-np.inf, np.inf])[0] = float(value)
+        for name, value in (at_most or {}).items():
+            bounds.setdefault(self.resolve_column(name), [-np.inf, np.inf])[1] = float(value)
+
+        # Whole index: each range is two binary searches on its sorted column, not a scan
+        mask = None
+        for name, (low, high) in bounds.items():
+            if rows is None:
+                order, values = self.ranked[name]
+                inside = np.zeros(self.size, dtype=bool)
+                inside[order[np.searchsorted(values, low, 'left'):np.searchsorted(values, high, 'right')]] = True
+                mask = inside if mask is None else mask & inside
+            else:
+                values = self.columns[name][rows]
+                rows = rows[(values >= low) & (values <= high)]
+
+        sort = self.resolve_column(sort) if sort else None
+        if rows is None:
+            # Walk the precomputed order of the sort column (or row order) and keep what's in range
+            if sort is None:
+                ordered = np.arange(self.size)
+            else:
+                ordered = self.ranked[sort][0] if ascending else self.ranked_desc[sort]
+            if mask is not None:
+                ordered = ordered[mask[ordered]]
+        elif sort is None:
+            ordered = rows
+        else:
+            values = self.columns[sort][rows]
+            keep = ~np.isnan(values)
+            rows, values = rows[keep], values[keep]
+            ordered = rows[np.argsort(values if ascending else -values, kind='stable')]
+
+        picked, seen = [], set()
+        for row in ordered:
+            if distinct:
+                if self.names[row] in seen:
+                    continue
+                seen.add(self.names[row])
+            picked.append(row)
+            if limit and len(picked) >= limit:
+                break
+        shown = list(dict.fromkeys(OUTPUT_ATTRS + tuple(bounds) + ((sort,) if sort else ())))
+        return [self.row(r, shown) for r in picked]
+
+    def row(self, r, columns=OUTPUT_ATTRS):
+        item = {'food_name': self.names[r], 'location': self.locations[r], 'day': self.days[r],
+                'meal': self.meals[r]}
+        for name in columns:
+            value = self.columns[name][r]
+            item[name] = None if np.isnan(value) else round(float(value), 2)
+        return item
+
+    def summary(self):
+        return {'rows': self.size, 'locations': self.location_names, 'days': self.day_names, 'meals': self.meal_names}
+
+
+def parse_bounds(pairs):
+    """['protein_g=20', 'calories=500'] -> {'protein_g': 20.0, 'calories': 500.0}"""
+    bounds = {}
+    for pair in pairs or []:
+        name, _, value = pair.partition('=')
+        bounds[name.strip()] = float(value)
+    return bounds
+
+
+class QueryService:
+    """The index behind a small local HTTP endpoint. /reload rebuilds it after a scrape."""
+
+    def __init__(self, source=None, since=None):
+        self.source, self.since = source, since
+        self.index = None
+        self._lock = threading.Lock()
+        self.reload()
+
+    def reload(self):
+        started = time.perf_counter()
+        index = MenuIndex(load_frame(self.source, self.since))
+        with self._lock:
+            self.index = index
+        print(f" Indexed {index.size} rows in {(time.perf_counter() - started) * 1000:.0f}ms")
+        return index
+
+    def handle(self, path, params):
+        index = self.index
+        if path == '/query':
+            one = {k: v[-1] for k, v in params.items()}
+            started = time.perf_counter()
+            items = index.query(
+                one.get('location'), one.get('day'), one.get('meal'),
+                at_least={k[4:]: v for k, v in one.items() if k.startswith('min_')},
+                at_most={k[4:]: v for k, v in one.items() if k.startswith('max_')},
+                sort=one.get('sort'), ascending=one.get('order') == 'asc',
+                limit=int(one.get('limit', LIMIT)), distinct=one.get('distinct', '1') != '0',
+            )
+            return {'took_ms': round((time.perf_counter() - started) * 1000, 3), 'count': len(items), 'items': items}
+        if path == '/reload':
+            return self.reload().summary()
+        if path in ('', '/'):
+            return index.summary()
+        return None
+
+
+def make_handler(service):
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            try:
+                payload, status = service.handle(url.path.rstrip('/'), parse_qs(url.query)), 200
+                if payload is None:
+                    payload, status = {'error': 'not found'}, 404
+            except (KeyError, ValueError) as e:
+                payload, status = {'error': str(e).strip("'")}, 400
+            data = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+    return Handler
+
+
+def serve(service, port=PORT):
+    server = ThreadingHTTPServer(('127.0.0.1', port), make_handler(service))
+    server.daemon_threads = True
+    return server
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Look up scraped menus, e.g. the highest-protein items at Fountain today.")
+    parser.add_argument("--source", help=f"archive directory or scrape CSV (default: {ARCHIVE_DIR}/ or {FRESH_DATA_FILE})")
+    parser.add_argument("--since", help="with an archive: only index menus from this day on (YYYY-MM-DD)")
+    parser.add_argument("--location", help="name or part of it, e.g. Fountain")
+    parser.add_argument("--day", help="today, tomorrow, YYYY-MM-DD or the menu's day header")
+    parser.add_argument("--meal")
+    parser.add_argument("--sort", help="column to rank by, e.g. protein_g or protein_g_per_100g")
+    parser.add_argument("--asc", action="store_true", help="lowest first")
+    parser.add_argument("--min", action="append", metavar="COL=X", help="e.g. --min protein_g=20")
+    parser.add_argument("--max", action="append", metavar="COL=Y", help="e.g. --max calories=500")
+    parser.add_argument("--limit", type=int, default=LIMIT)
+    parser.add_argument("--all-rows", action="store_true", help="keep every sighting, not one row per food")
+    parser.add_argument("--serve", action="store_true", help=f"answer GET /query on 127.0.0.1:{PORT}")
+    parser.add_argument("--port", type=int, default=PORT)
+    args = parser.parse_args()
+
+    service = QueryService(args.source, args.since)
+    if args.serve:
+        server = serve(service, args.port)
+        print(f" Menu queries on http://127.0.0.1:{args.port}/query?location=Fountain&day=today&sort=protein_g")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            server.shutdown()
+        raise SystemExit
+
+    started = time.perf_counter()
+    try:
+        items = service.index.query(args.location, args.day, args.meal, parse_bounds(args.min),
+                                    parse_bounds(args.max), args.sort, args.asc, args.limit, not args.all_rows)
+    except KeyError as e:
+        raise SystemExit(f" {str(e).strip(chr(39))}")
+    took = (time.perf_counter() - started) * 1000
+    if items:
+        print(pd.DataFrame(items).to_string(index=False))
+    else:
+        print(" No matching items.")
+    print(f" {len(items)} item(s) in {took:.3f}ms")
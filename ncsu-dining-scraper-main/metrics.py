@@ -0,0 +1,137 @@
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# --- CONFIGURATION ---
+JSONL_FILE = 'metrics.jsonl'          # One line per finished span, appended across runs
+PROM_FILE = 'metrics_{job}.prom'      # Prometheus text format, rewritten at the end of a run
+QUANTILES = (0.5, 0.95, 0.99)
+WINDOW = 2000                         # Recent samples kept per span for the quantiles
+# Chatty progress output ([DEBUG] lines, Live Data Feed, Saved progress); --debug or NCSU_DEBUG=1
+DEBUG = os.environ.get('NCSU_DEBUG') == '1'
+
+_spans = {}
+_lock = threading.Lock()
+_jsonl = None
+
+
+def set_debug(on):
+    global DEBUG
+    DEBUG = on
+
+
+def debug(*args, **kwargs):
+    if DEBUG:
+        print(*args, **kwargs)
+
+
+def percentile(values, q):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def record(name, seconds, ok=True, **labels):
+    """Adds one finished span to the totals and to JSONL_FILE."""
+    global _jsonl
+    line = json.dumps({"ts": round(time.time(), 3), "span": name, "s": round(seconds, 6), "ok": ok, **labels})
+    with _lock:
+        entry = _spans.setdefault(name, {"samples": [], "count": 0, "total": 0.0, "errors": 0, "max": 0.0})
+        entry["count"] += 1
+        entry["total"] += seconds
+        entry["max"] = max(entry["max"], seconds)
+        if not ok:
+            entry["errors"] += 1
+        entry["samples"].append(seconds)
+        if len(entry["samples"]) > WINDOW:
+            del entry["samples"][:-WINDOW]
+        if JSONL_FILE:
+            if _jsonl is None:
+                _jsonl = open(JSONL_FILE, 'a', encoding='utf-8')
+            _jsonl.write(line + "\n")
+
+
+@contextmanager
+def span(name, **labels):
+    """Times the block: with span("modal open", location=loc_name): ...
+
+    A block that raises is still recorded (ok=false) and the exception goes on
+    up, so wrapping a step never changes how the caller handles its errors.
+    """
+    started = time.perf_counter()
+    ok = False
+    try:
+        yield
+        ok = True
+    finally:
+        record(name, time.perf_counter() - started, ok, **labels)
+
+
+def summary():
+    """{name: {count, total_s, mean_s, p50_s, p95_s, p99_s, max_s, errors}} for every span so far."""
+    with _lock:
+        return {
+            name: {
+                "count": e["count"],
+                "total_s": round(e["total"], 4),
+                "mean_s": round(e["total"] / e["count"], 4),
+                **{f"p{int(q * 100)}_s": round(percentile(e["samples"], q), 4) for q in QUANTILES},
+                "max_s": round(e["max"], 4),
+                "errors": e["errors"],
+            }
+            for name, e in _spans.items()
+        }
+
+
+def prometheus_text(job):
+    lines = [
+        "# HELP ncsu_span_seconds Time spent in each instrumented step.",
+        "# TYPE ncsu_span_seconds summary",
+    ]
+    errors = []
+    with _lock:
+        spans = {name: (list(e["samples"]), e["total"], e["count"], e["errors"]) for name, e in _spans.items()}
+    for name, (samples, total, count, n_errors) in sorted(spans.items()):
+        labels = f'job="{job}",span="{name}"'
+        for q in QUANTILES:
+            lines.append(f'ncsu_span_seconds{{{labels},quantile="{q}"}} {percentile(samples, q):.6f}')
+        lines.append(f"ncsu_span_seconds_sum{{{labels}}} {total:.6f}")
+        lines.append(f"ncsu_span_seconds_count{{{labels}}} {count}")
+        errors.append(f"ncsu_span_errors_total{{{labels}}} {n_errors}")
+    lines += ["# HELP ncsu_span_errors_total Spans that ended in an exception.",
+              "# TYPE ncsu_span_errors_total counter"] + errors
+    return "\n".join(lines) + "\n"
+
+
+def export(job):
+    """Flushes the JSONL stream and (re)writes the Prometheus file for this job."""
+    with _lock:
+        if _jsonl:
+            _jsonl.flush()
+    if not _spans:
+        return None
+    path = PROM_FILE.format(job=job)
+    # Written beside and swapped in, so a textfile collector never reads half a file
+    with open(path + ".tmp", "w", encoding='utf-8') as f:
+        f.write(prometheus_text(job))
+    os.replace(path + ".tmp", path)
+    return path
+
+
+def print_summary():
+    report = summary()
+    if not report:
+        return
+    print(f"\n{'Step':<28} | {'n':>5} | {'total':>8} | {'mean':>7} | {'p95':>7} | {'err':>4}")
+    print("-" * 72)
+    for name, r in sorted(report.items(), key=lambda kv: -kv[1]["total_s"]):
+        print(f"{name:<28} | {r['count']:>5} | {r['total_s']:>7.1f}s | {r['mean_s']:>6.2f}s | {r['p95_s']:>6.2f}s | {r['errors']:>4}")
+
+
+def write_metrics(job):
+    """End-of-run hook: print where the time went and write the metrics files."""
+    print_summary()
+    path = export(job)
+    if path:
+        print(f" Metrics: {JSONL_FILE}, {path}")
@@ -1,293 +1,614 @@
-import pandas as pd
-import re
-import time
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.common.exceptions import TimeoutException, StaleElementReferenceException
-from webdriver_manager.chrome import ChromeDriverManager
-
-def clean_text(text):
-    """Removes non-ascii characters and extra whitespace."""
-    if not text:
-        return "N/A"
-    return re.sub(r'\s+', ' ', text).strip()
-
-def extract_dynamic_nutrition(driver):
-    data = {}
-    
-    # 1. Scrape Macros & Calories from the Table
-    try:
-        rows = driver.find_elements(By.CSS_SELECTOR, "#nutritionLabel table tbody tr")
-        for row in rows:
-            text = row.text.strip()
-            
-            # Calories (Start of line)
-            if text.startswith("Calories"):
-                match = re.search(r'Calories\s+(\d+)', text)
-                if match: data['Calories'] = match.group(1)
-
-            # Grams (Fat, Protein, Carbs)
-            g_match = re.search(r'(\d+(?:\.\d+)?)\s*g', text)
-            if g_match:
-                value = g_match.group(1)
-                if "Total Fat" in text: data['Total Fat'] = value + "g"
-                elif "Carbohydrate" in text: data['Total Carbohydrate'] = value + "g"
-                elif "Protein" in text: data['Protein'] = value + "g"
-                elif "Sugars" in text: data['Sugars'] = value + "g"
-                elif "Fiber" in text: data['Dietary Fiber'] = value + "g"
-                elif "Saturated Fat" in text: data['Saturated Fat'] = value + "g"
-
-            # Milligrams (Sodium, Cholesterol)
-            mg_match = re.search(r'(\d+(?:\.\d+)?)\s*mg', text)
-            if mg_match:
-                value = mg_match.group(1)
-                if "Sodium" in text: data['Sodium'] = value + "mg"
-                elif "Cholesterol" in text: data['Cholesterol'] = value + "mg"
-    except:
-        pass
-
-    # 2. Scrape Serving Size (FIXED XPATH)
-    try:
-        # FIX: We add "//*[@id='nutritionLabel']" to the front.
-        # This forces Python to look ONLY inside the currently open popup box.
-        serving_el = driver.find_element(By.XPATH, "//*[@id='nutritionLabel']//*[contains(text(), 'Serving Size')]/..")
-        
-        raw_serving = serving_el.text.replace("Serving Size:", "").strip()
-        data["Serving Size"] = raw_serving
-        
-        # Debugging: Print what we found to the terminal so you can verify
-        print(f"      [DEBUG] Found Serving Text: '{raw_serving}'")
-
-        # Regex Strategy
-        gram_match = re.search(r'\(\s*(\d+)\s*g\s*\)', raw_serving)
-        gram_match_B = re.search(r'(\d+)\s*g', raw_serving) # Fallback for "115g" without parens
-        
-        if gram_match:
-            data["Serving Size (g)"] = gram_match.group(1)
-        elif gram_match_B:
-            data["Serving Size (g)"] = gram_match_B.group(1)
-        else:
-            data["Serving Size (g)"] = "1"
-            
-    except Exception as e:
-        # If we can't find it, print why
-        print(f"      [DEBUG] Serving Size Error: {e}")
-        data["Serving Size"] = "N/A"
-        data["Serving Size (g)"] = "1"
-
-    return data
-
-def safe_click(driver, element):
-    """Robust click with JS fallback."""
-    try:
-        driver.execute_script("arguments[0].scrollIntoView({block:'center'});", element)
-        time.sleep(0.1)
-        element.click()
-    except Exception:
-        driver.execute_script("arguments[0].click();", element)
-
-def scrape_ncsu_dining():
-    print("Setting up Google Chrome...")
-    
-    # --- CHROME SETUP ---
-    service = Service(ChromeDriverManager().install())
-    options = webdriver.ChromeOptions()
-    options.add_argument("start-maximized")
-    options.add_argument('--no-sandbox')
-    options.add_argument('--disable-dev-shm-usage')
-    
-    driver = webdriver.Chrome(service=service, options=options)
-    wait = WebDriverWait(driver, 5)
-
-    base_url = "https://netmenu2.cbord.com/NetNutrition/ncstate-dining"
-    print(f"Navigating to {base_url}")
-    driver.get(base_url)
-
-    # --- DISCLAIMER POPUP ---
-    try:
-        
-        btn = wait.until(EC.element_to_be_clickable((By.XPATH, '//*[@id="cbo_nn_mobileDisclaimer"]/div/section/div[3]/div[2]/button')))
-        safe_click(driver, btn)
-        time.sleep(1)
-        print(" Accepted Disclaimer")
-    except TimeoutException:
-        print(" No disclaimer found.")
-
-    all_food_data = []
-
-    # --- GET LOCATIONS ---
-    try:
-        wait.until(EC.presence_of_element_located((By.ID, "unitsPanel")))
-        # We grab text first to avoid Stale Elements later
-        loc_elements = driver.find_elements(By.CSS_SELECTOR, "#unitsPanel .unit a")
-        locations = [l.text for l in loc_elements if l.text]
-        print(f"Found Locations: {locations}")
-    except Exception:
-        print("Could not find locations. Exiting.")
-        driver.quit()
-        return
-
-    # --- MAIN LOOP ---
-    for loc_name in locations:
-        # Filter: Only scrape Dining Halls (Fountain/Clark/Oval) to save time?
-        # Remove this if check if you want ALL cafes.
-        if "Fountain" not in loc_name and "Clark" not in loc_name and "Oval" not in loc_name:
-             continue 
-
-        print(f"\n--- Entering {loc_name} ---")
-        
-        # Click Location
-        try:
-            loc_link = wait.until(EC.element_to_be_clickable((By.LINK_TEXT, loc_name)))
-            safe_click(driver, loc_link)
-        except Exception:
-            print(f"Skipping {loc_name} (Click failed)")
-            continue
-
-        # Get Days (Limit to first 2 days for testing speed)
-        try:
-            days = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "section.card")))
-        except:
-            # If no menu, go back
-            driver.execute_script("window.history.go(-1)")
-            continue
-
-        # Loop through days by INDEX to prevent Stale Elements
-        for i in range(min(len(days), 2)):
-            # Refresh DOM reference
-            days = driver.find_elements(By.CSS_SELECTOR, "section.card")
-            if i >= len(days): break
-            
-            day_header = days[i].find_element(By.TAG_NAME, "header").text
-            print(f"  Processing: {day_header}")
-
-            # Get Meals
-            meals = days[i].find_elements(By.CSS_SELECTOR, ".cbo_nn_menuLinkCell a")
-            meal_names = [m.text for m in meals]
-
-            for meal_name in meal_names:
-                print(f"    -> Meal: {meal_name}")
-                
-                # Click Meal (Robust Finding)
-                try:
-                    current_day = driver.find_elements(By.CSS_SELECTOR, "section.card")[i]
-                    meal_link = current_day.find_element(By.PARTIAL_LINK_TEXT, meal_name)
-                    safe_click(driver, meal_link)
-                except Exception:
-                    print("      Could not click meal.")
-                    continue
-
-                # Expand Categories (JS Optimization)
-                try:
-                    wait.until(EC.presence_of_element_located((By.CLASS_NAME, "cbo_nn_itemGroupRow")))
-                    driver.execute_script("document.querySelectorAll('.cbo_nn_itemGroupRow').forEach(b => b.click())")
-                    time.sleep(1) # Wait for animation
-                except:
-                    pass
-
-                # Get Food Items
-                food_links = driver.find_elements(By.CSS_SELECTOR, "a[id^='showNutrition']")
-                print(f"      Found {len(food_links)} items.")
-
-                # Loop Foods by INDEX
-                # Loop Foods by INDEX
-                # Loop Foods by INDEX
-                for f_idx in range(len(food_links)):
-                    try:
-                        # Re-find list to avoid Stale Elements
-                        current_foods = driver.find_elements(By.CSS_SELECTOR, "a[id^='showNutrition']")
-                        if f_idx >= len(current_foods): break
-                        
-                        food_el = current_foods[f_idx]
-                        f_name = clean_text(food_el.text)
-                        
-                        # Open Modal
-                        safe_click(driver, food_el)
-                        wait.until(EC.visibility_of_element_located((By.ID, "nutritionLabel")))
-                        
-                        # --- DYNAMIC EXTRACTION ---
-                        nutrients = extract_dynamic_nutrition(driver)
-                        nutrients['Food Name'] = f_name
-                        nutrients['Meal'] = meal_name
-                        nutrients['Location'] = loc_name
-                        nutrients['Date'] = day_header
-                        
-                        all_food_data.append(nutrients)
-
-                        if len(all_food_data) % 10 == 0:
-                            temp_df = pd.DataFrame(all_food_data)
-                            # Ensure columns exist before saving
-                            cols = ['Date', 'Location', 'Meal', 'Food Name', 'Serving Size (g)', 'Calories', 'Protein', 'Total Carbohydrate', 'Total Fat', 'Sugars']
-                            for c in cols:
-                                if c not in temp_df.columns: temp_df[c] = 'N/A'
-                            
-                            temp_df = temp_df[cols] # Reorder
-                            temp_df.to_csv("nc_state_dining_menu.csv", index=False)
-                            print(f"    💾 Saved progress ({len(all_food_data)} items)")
-                       
-                        if len(all_food_data) % 5 == 0:
-                            print(f"\n--- 📊 Live Data Feed ({len(all_food_data)} items collected) ---")
-                            recent_items = all_food_data[-5:]
-                            
-                            # Print Header
-                            print(f"{'Food Name':<25} | {'Cal':<5} | {'Prot':<5} | {'Carb':<5} | {'Fat':<5}")
-                            print("-" * 65)
-                            
-                            for item in recent_items:
-                                name = item.get('Food Name', 'Unknown')[:23]
-                                cal = item.get('Calories', '-')
-                                prot = item.get('Protein', '-')
-                                carb = item.get('Total Carbohydrate', '-')
-                                fat = item.get('Total Fat', '-')
-                                
-                                print(f"{name:<25} | {cal:<5} | {prot:<5} | {carb:<5} | {fat:<5}")
-                            print("-" * 65)
-                        
-                        # Close Modal (Must be indented inside the TRY block)
-                        close_btn = driver.find_element(By.ID, "btn_nn_nutrition_close")
-                        safe_click(driver, close_btn)
-                        wait.until(EC.invisibility_of_element_located((By.ID, "nutritionLabel")))
-                        
-                    except Exception as e:
-                        # Force close modal if something broke
-                        try:
-                            driver.find_element(By.ID, "btn_nn_nutrition_close").click()
-                        except:
-                            pass
-
-                # Go Back to Day View
-                try:
-                    back_btn = driver.find_element(By.CSS_SELECTOR, "#itemPanel nav a")
-                    safe_click(driver, back_btn)
-                    time.sleep(1) 
-                except:
-                    driver.back()
-
-        # Go Back to Locations (Home)
-        driver.get(base_url) 
-        try:
-             # Handle disclaimer if it reappears
-            wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Continue')]"))).click()
-        except:
-            pass
-
-    driver.quit()
-    
-    # Save Data
-    if all_food_data:
-        df = pd.DataFrame(all_food_data)
-        # Ensure standard columns exist
-        cols = ['Date', 'Location', 'Meal', 'Food Name', 'Serving Size', 'Calories', 'Protein', 'Total Carbohydrate', 'Total Fat', 'Sugars']
-        for c in cols:
-            if c not in df.columns: df[c] = 'N/A'
-            
-        df.to_csv("nc_state_dining_menu.csv", index=False)
-        print("\n✅ Success! Data saved to nc_state_dining_menu.csv")
-    else:
-        print("\n❌ No data scraped.")
-
-if __name__ == '__main__':
-    scrape_ncsu_dining()
+import os
+import re
+from contextlib import nullcontext
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.chrome.service import Service
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.common.exceptions import TimeoutException, StaleElementReferenceException, WebDriverException
+from webdriver_manager.chrome import ChromeDriverManager
+
+from browser_profile import (
+    apply_lean_options, drain_traffic, is_lean, print_traffic_report, reset_traffic, set_profile, start_blocking,
+)
+from checkpoint import ProgressManifest, StreamingWriter, archive_run, day_key, meal_key, set_archive
+from food_record import FoodRecord, format_frame, to_frame
+from nutrition_parser import parse_label, to_csv_fields
+from menu_fingerprints import menu_fingerprint
+from metrics import debug, set_debug, span, write_metrics
+from waits import Waiter, element_hidden_js, js_true
+
+def clean_text(text):
+    """Removes non-ascii characters and extra whitespace."""
+    if not text:
+        return "N/A"
+    return re.sub(r'\s+', ' ', text).strip()
+
+# --- CONFIGURATION ---
+BASE_URL = "https://netmenu2.cbord.com/NetNutrition/ncstate-dining"
+OUTPUT_FILE = "nc_state_dining_menu.csv"
+# Only scrape Dining Halls by default to save time. Pass all_locations=True for ALL cafes.
+DINING_HALLS = ("Fountain", "Clark", "Oval")
+MAX_DAYS = 2
+# Where the resolved chromedriver path is remembered between runs
+DRIVER_PATH_FILE = '.chromedriver_path'
+# A warm session has usually accepted the disclaimer already; don't wait long for it
+WARM_DISCLAIMER_TIMEOUT = 1
+
+def is_dining_hall(loc_name):
+    return any(hall in loc_name for hall in DINING_HALLS)
+
+def parse_label_rows(row_texts):
+    """Turns the text of each #nutritionLabel table row into macro fields."""
+    fields = to_csv_fields(parse_label("\n".join(row_texts)))
+    return {k: v for k, v in fields.items() if not k.startswith("Serving Size")}
+
+def parse_serving_text(raw_serving):
+    """Splits 'Serving Size: 1 biscuit (57g)' into the display text and grams."""
+    parsed = parse_label("Serving Size: " + raw_serving)
+    return {"Serving Size": raw_serving, "Serving Size (g)": str(parsed.get('serving_g', 1))}
+
+def extract_dynamic_nutrition(driver):
+    data = {}
+    
+    # 1. Scrape Macros & Calories from the Table
+    try:
+        rows = driver.find_elements(By.CSS_SELECTOR, "#nutritionLabel table tbody tr")
+        data.update(parse_label_rows([row.text for row in rows]))
+    except:
+        pass
+
+    # 2. Scrape Serving Size (FIXED XPATH)
+    try:
+        # FIX: We add "//*[@id='nutritionLabel']" to the front.
+        # This forces Python to look ONLY inside the currently open popup box.
+        serving_el = driver.find_element(By.XPATH, "//*[@id='nutritionLabel']//*[contains(text(), 'Serving Size')]/..")
+        
+        raw_serving = serving_el.text.replace("Serving Size:", "").strip()
+        
+        # Debugging: Print what we found to the terminal so you can verify
+        debug(f"      [DEBUG] Found Serving Text: '{raw_serving}'")
+
+        data.update(parse_serving_text(raw_serving))
+            
+    except Exception as e:
+        # If we can't find it, print why
+        debug(f"      [DEBUG] Serving Size Error: {e}")
+        data["Serving Size"] = "N/A"
+        data["Serving Size (g)"] = "1"
+
+    return data
+
+# --- BULK EXTRACTION (one script per step instead of one round trip per row) ---
+ITEMS_VISIBLE_JS = """
+const items = document.querySelectorAll("a[id^='showNutrition']");
+return items.length > 0 && Array.from(items).every(a => a.offsetParent !== null);
+"""
+
+ITEM_IDS_JS = """
+return Array.from(document.querySelectorAll("a[id^='showNutrition']"))
+    .map(a => ({id: a.id, name: a.textContent}));
+"""
+
+OPEN_LABEL_JS = """
+const [itemId, timeoutMs, done] = arguments;
+const label = () => document.getElementById('nutritionLabel');
+// READ_LABEL_JS leaves a marker in the label it read; a fresh label won't have it
+const ready = el => el && el.offsetParent !== null && el.querySelector('table') && !el.querySelector('[data-nn-read]');
+const item = document.getElementById(itemId);
+if (!item) { done(false); return; }
+item.scrollIntoView({block: 'center'});
+item.click();
+const started = Date.now();
+(function poll() {
+    if (ready(label())) done(true);
+    else if (Date.now() - started > timeoutMs) done(false);
+    else setTimeout(poll, 25);
+})();
+"""
+
+READ_LABEL_JS = """
+const label = document.getElementById('nutritionLabel');
+if (!label) return null;
+const rows = Array.from(label.querySelectorAll('table tbody tr')).map(tr => tr.innerText);
+const serving = document.evaluate(
+    "//*[@id='nutritionLabel']//*[contains(text(), 'Serving Size')]/..",
+    document, null, XPathResult.FIRST_ORDERED_NODE_TYPE, null).singleNodeValue;
+const marker = document.createElement('i');
+marker.setAttribute('data-nn-read', '1');
+marker.style.display = 'none';
+label.appendChild(marker);
+const close = document.getElementById('btn_nn_nutrition_close');
+if (close) close.click();
+return {rows: rows, serving: serving ? serving.innerText : null};
+"""
+
+def get_item_ids(driver):
+    """Every showNutrition link on the open meal as [(element_id, food_name)] in one call."""
+    return [(item['id'], clean_text(item['name'])) for item in driver.execute_script(ITEM_IDS_JS)]
+
+def extract_nutrition_bulk(driver, item_id, timeout=5):
+    """Opens the label for item_id and reads it whole: two driver round trips per item."""
+    if not driver.execute_async_script(OPEN_LABEL_JS, item_id, timeout * 1000):
+        return None
+    label = driver.execute_script(READ_LABEL_JS)
+    if not label:
+        return None
+
+    data = parse_label_rows(label['rows'])
+    if label['serving']:
+        data.update(parse_serving_text(label['serving'].replace("Serving Size:", "").strip()))
+    else:
+        data["Serving Size"] = "N/A"
+        data["Serving Size (g)"] = "1"
+    return data
+
+def safe_click(driver, element):
+    """Robust click with JS fallback."""
+    try:
+        # An instant (non-smooth) scroll is done by the time the script returns
+        driver.execute_script("arguments[0].scrollIntoView({block:'center'});", element)
+        element.click()
+    except Exception:
+        driver.execute_script("arguments[0].click();", element)
+
+_driver_path = None
+
+def chromedriver_path(refresh=False):
+    """Resolves chromedriver once per machine instead of once per run.
+
+    ChromeDriverManager().install() is only called when nothing is cached (or the
+    cached driver stopped working). If its download host can't be reached we
+    return None and let Selenium find a driver on its own.
+    """
+    global _driver_path
+    if not refresh:
+        if _driver_path is False:
+            # Already failed this run; don't wait on the download host again
+            return None
+        if _driver_path and os.path.exists(_driver_path):
+            return _driver_path
+        if os.path.exists(DRIVER_PATH_FILE):
+            with open(DRIVER_PATH_FILE) as f:
+                cached = f.read().strip()
+            if os.path.exists(cached):
+                _driver_path = cached
+                return cached
+    try:
+        _driver_path = ChromeDriverManager().install()
+    except Exception as e:
+        print(f" Could not resolve chromedriver ({e}); using whatever Selenium finds.")
+        _driver_path = False
+        return None
+    with open(DRIVER_PATH_FILE, 'w') as f:
+        f.write(_driver_path)
+    return _driver_path
+
+def chrome_service(refresh=False):
+    path = chromedriver_path(refresh)
+    return Service(path) if path else Service()
+
+def create_driver(headless=False):
+    # --- CHROME SETUP ---
+    options = webdriver.ChromeOptions()
+    lean = is_lean()
+    if lean:
+        apply_lean_options(options)
+    elif headless:
+        options.add_argument("--headless=new")
+        options.add_argument("--window-size=1920,1080")
+    else:
+        options.add_argument("start-maximized")
+    options.add_argument('--no-sandbox')
+    options.add_argument('--disable-dev-shm-usage')
+
+    try:
+        driver = webdriver.Chrome(service=chrome_service(), options=options)
+    except WebDriverException:
+        # Chrome updated under a cached driver: resolve again once
+        if not os.path.exists(DRIVER_PATH_FILE):
+            raise
+        os.remove(DRIVER_PATH_FILE)
+        driver = webdriver.Chrome(service=chrome_service(refresh=True), options=options)
+    if lean:
+        start_blocking(driver)
+    return driver
+
+def close_driver(driver):
+    """Quits the driver after counting what its last pages downloaded."""
+    drain_traffic(driver)
+    driver.quit()
+
+def open_home(driver, wait, base_url=BASE_URL, disclaimer_timeout=None):
+    """Loads the NetNutrition home page and clicks through the disclaimer."""
+    drain_traffic(driver)
+    with span("navigate home"):
+        driver.get(base_url)
+
+    # --- DISCLAIMER POPUP ---
+    try:
+        
+        btn = wait.until(EC.element_to_be_clickable((By.XPATH, '//*[@id="cbo_nn_mobileDisclaimer"]/div/section/div[3]/div[2]/button')), "disclaimer", disclaimer_timeout)
+        safe_click(driver, btn)
+        wait.settle(element_hidden_js("cbo_nn_mobileDisclaimer"), "disclaimer closed")
+        print(" Accepted Disclaimer")
+    except TimeoutException:
+        print(" No disclaimer found.")
+
+def return_home(driver, wait, base_url=BASE_URL, disclaimer_timeout=None):
+    """Goes back to the location list between locations."""
+    drain_traffic(driver)
+    with span("navigate home"):
+        driver.get(base_url)
+    try:
+        # Handle disclaimer if it reappears
+        wait.until(EC.element_to_be_clickable((By.XPATH, "//button[contains(text(), 'Continue')]")), "disclaimer (again)", disclaimer_timeout).click()
+    except Exception:
+        pass
+
+def get_locations(driver, wait):
+    wait.until(EC.presence_of_element_located((By.ID, "unitsPanel")), "units panel")
+    # We grab text first to avoid Stale Elements later
+    loc_elements = driver.find_elements(By.CSS_SELECTOR, "#unitsPanel .unit a")
+    return [l.text for l in loc_elements if l.text]
+
+def enter_location(driver, wait, loc_name):
+    """Clicks a location and returns how many days it publishes (None if it failed)."""
+    # Click Location
+    try:
+        with span("location click", location=loc_name):
+            loc_link = wait.until(EC.element_to_be_clickable((By.LINK_TEXT, loc_name)), "location link")
+            safe_click(driver, loc_link)
+    except Exception:
+        print(f"Skipping {loc_name} (Click failed)")
+        return None
+
+    # Get Days
+    try:
+        days = wait.until(EC.presence_of_all_elements_located((By.CSS_SELECTOR, "section.card")), "day cards")
+    except:
+        # If no menu, go back
+        driver.execute_script("window.history.go(-1)")
+        return None
+    return len(days)
+
+def record_item(all_food_data, nutrients, writer=None):
+    # Kept in memory as a FoodRecord (numbers, slotted); the CSV gets the scraped strings
+    all_food_data.append(FoodRecord.from_row(nutrients))
+
+    # Each row is appended to the CSV once instead of rewriting the whole file
+    if writer:
+        writer.write(nutrients)
+        if writer.count % 10 == 0:
+            debug(f"    💾 Saved progress ({writer.count} items)")
+   
+    if len(all_food_data) % 5 == 0:
+        debug(f"\n--- 📊 Live Data Feed ({len(all_food_data)} items collected) ---")
+        recent_items = all_food_data[-5:]
+        
+        # Print Header
+        debug(f"{'Food Name':<25} | {'Cal':<5} | {'Prot':<5} | {'Carb':<5} | {'Fat':<5}")
+        debug("-" * 65)
+        
+        for item in recent_items:
+            name = (item.food_name or 'Unknown')[:23]
+            cal, prot, carb, fat = (
+                '-' if v is None else f"{v:g}" for v in (item.calories, item.protein_g, item.carbohydrate_g, item.fat_g)
+            )
+            
+            debug(f"{name:<25} | {cal:<5} | {prot:<5} | {carb:<5} | {fat:<5}")
+        debug("-" * 65)
+
+def scrape_meal(driver, wait, loc_name, i, day_header, meal_name, on_item, host_slot=nullcontext(), bulk=False, cache=None, manifest=None, fingerprints=None):
+    """Opens one meal of day i, reads every item's label and hands each row to on_item."""
+    print(f"    -> Meal: {meal_name}")
+    progress_key = meal_key(loc_name, day_header, meal_name)
+    
+    # Click Meal (Robust Finding)
+    try:
+        with host_slot, span("meal click", location=loc_name, meal=meal_name):
+            current_day = driver.find_elements(By.CSS_SELECTOR, "section.card")[i]
+            meal_link = current_day.find_element(By.PARTIAL_LINK_TEXT, meal_name)
+            safe_click(driver, meal_link)
+    except Exception:
+        print("      Could not click meal.")
+        return
+
+    # Expand Categories (JS Optimization)
+    try:
+        with span("category expansion", location=loc_name, meal=meal_name):
+            wait.until(EC.presence_of_element_located((By.CLASS_NAME, "cbo_nn_itemGroupRow")), "item groups")
+            driver.execute_script("document.querySelectorAll('.cbo_nn_itemGroupRow').forEach(b => b.click())")
+            # Done once every item link is actually on screen
+            wait.settle(js_true(ITEMS_VISIBLE_JS), "categories expanded")
+    except:
+        pass
+
+    # Same item list as the last run? Replay those rows instead of opening every label
+    replay = items = None
+    if fingerprints:
+        items = get_item_ids(driver)
+        fingerprint = menu_fingerprint(items)
+        replay = fingerprints.unchanged(progress_key, fingerprint)
+        meal_rows = []
+        forward = on_item
+        on_item = lambda nutrients: (meal_rows.append(dict(nutrients)), forward(nutrients))
+
+    if replay is not None:
+        print(f"      Unchanged since last run ({len(replay)} items).")
+        for f_idx, nutrients in enumerate(replay):
+            if manifest and manifest.item_done(progress_key, f_idx): continue
+            forward(nutrients)
+            if manifest: manifest.mark_item(progress_key, f_idx)
+    elif bulk:
+        # Grab every item ID once, then open each label by ID
+        if items is None: items = get_item_ids(driver)
+        print(f"      Found {len(items)} items.")
+        driver.set_script_timeout(10)
+
+        for f_idx, (item_id, f_name) in enumerate(items):
+            if manifest and manifest.item_done(progress_key, f_idx): continue
+            try:
+                # Seen this food before? Reuse the label and skip the modal
+                nutrients = cache.get(item_id, f_name, loc_name) if cache else None
+                if nutrients is None:
+                    # Open, read and close happen in the same two script calls here
+                    with host_slot, span("label (bulk)", location=loc_name, item=item_id):
+                        nutrients = extract_nutrition_bulk(driver, item_id)
+                    if nutrients is None:
+                        continue
+                    if cache: cache.put(nutrients, item_id, f_name, loc_name)
+                nutrients['Food Name'] = f_name
+                nutrients['Meal'] = meal_name
+                nutrients['Location'] = loc_name
+                nutrients['Date'] = day_header
+                on_item(nutrients)
+                if manifest: manifest.mark_item(progress_key, f_idx)
+            except Exception:
+                try:
+                    driver.execute_script("var b = document.getElementById('btn_nn_nutrition_close'); if (b) b.click();")
+                except:
+                    pass
+    else:
+        # Get Food Items
+        food_links = driver.find_elements(By.CSS_SELECTOR, "a[id^='showNutrition']")
+        print(f"      Found {len(food_links)} items.")
+
+        # Loop Foods by INDEX
+        for f_idx in range(len(food_links)):
+            if manifest and manifest.item_done(progress_key, f_idx): continue
+            try:
+                # Re-find list to avoid Stale Elements
+                current_foods = driver.find_elements(By.CSS_SELECTOR, "a[id^='showNutrition']")
+                if f_idx >= len(current_foods): break
+            
+                food_el = current_foods[f_idx]
+                f_name = clean_text(food_el.text)
+
+                # Seen this food before? Reuse the label and skip the modal
+                if cache:
+                    item_id = food_el.get_attribute('id')
+                    nutrients = cache.get(item_id, f_name, loc_name)
+                    if nutrients is not None:
+                        nutrients.update({'Food Name': f_name, 'Meal': meal_name, 'Location': loc_name, 'Date': day_header})
+                        on_item(nutrients)
+                        if manifest: manifest.mark_item(progress_key, f_idx)
+                        continue
+            
+                # Open Modal
+                with host_slot, span("modal open", location=loc_name, item=f_name):
+                    safe_click(driver, food_el)
+                    wait.until(EC.visibility_of_element_located((By.ID, "nutritionLabel")), "modal open")
+            
+                # --- DYNAMIC EXTRACTION ---
+                with span("extraction", location=loc_name, item=f_name):
+                    nutrients = extract_dynamic_nutrition(driver)
+                if cache: cache.put(nutrients, item_id, f_name, loc_name)
+                nutrients['Food Name'] = f_name
+                nutrients['Meal'] = meal_name
+                nutrients['Location'] = loc_name
+                nutrients['Date'] = day_header
+            
+                on_item(nutrients)
+                if manifest: manifest.mark_item(progress_key, f_idx)
+            
+                # Close Modal (Must be indented inside the TRY block)
+                with span("modal close", location=loc_name, item=f_name):
+                    close_btn = driver.find_element(By.ID, "btn_nn_nutrition_close")
+                    safe_click(driver, close_btn)
+                    wait.until(EC.invisibility_of_element_located((By.ID, "nutritionLabel")), "modal close")
+            
+            except Exception as e:
+                # Force close modal if something broke
+                try:
+                    driver.find_element(By.ID, "btn_nn_nutrition_close").click()
+                except:
+                    pass
+
+    # Only a complete meal is remembered, so a half-scraped one is walked again next time
+    if fingerprints and replay is None and len(meal_rows) == len(items):
+        fingerprints.put(progress_key, fingerprint, meal_rows)
+
+    if manifest: manifest.mark_done("meals", progress_key)
+
+    # Go Back to Day View
+    try:
+        with span("back to days", location=loc_name):
+            back_btn = driver.find_element(By.CSS_SELECTOR, "#itemPanel nav a")
+            safe_click(driver, back_btn)
+            wait.settle(EC.presence_of_element_located((By.CSS_SELECTOR, "section.card .cbo_nn_menuLinkCell a")), "back to days")
+    except:
+        driver.back()
+
+def scrape_day(driver, wait, loc_name, i, on_item, host_slot=nullcontext(), bulk=False, cache=None, manifest=None, fingerprints=None):
+    """Scrapes every meal of the i-th day card of the location currently open."""
+    # Refresh DOM reference
+    days = driver.find_elements(By.CSS_SELECTOR, "section.card")
+    if i >= len(days): return False
+    
+    day_header = days[i].find_element(By.TAG_NAME, "header").text
+    if manifest and manifest.is_done("days", day_key(loc_name, day_header)):
+        print(f"  Already done: {day_header}")
+        return True
+    print(f"  Processing: {day_header}")
+
+    # Get Meals
+    meals = days[i].find_elements(By.CSS_SELECTOR, ".cbo_nn_menuLinkCell a")
+    meal_names = [m.text for m in meals]
+
+    for meal_name in meal_names:
+        if manifest and manifest.is_done("meals", meal_key(loc_name, day_header, meal_name)): continue
+        scrape_meal(driver, wait, loc_name, i, day_header, meal_name, on_item, host_slot, bulk, cache, manifest, fingerprints)
+
+    if manifest: manifest.mark_done("days", day_key(loc_name, day_header))
+    return True
+
+def scrape_ncsu_dining(all_locations=False, max_days=MAX_DAYS, headless=False, bulk=False, cache=None, resume=False, base_url=BASE_URL, on_row=None, fingerprints=None, driver=None):
+    # A driver passed in (the daemon's warm one) is reused and left running
+    owns_driver = driver is None
+    reset_traffic()
+    if owns_driver:
+        print("Setting up Google Chrome...")
+        driver = create_driver(headless)
+    wait = Waiter(driver, 5)
+    disclaimer_timeout = None if owns_driver else WARM_DISCLAIMER_TIMEOUT
+
+    # Everything below runs in the try so a crash, Ctrl-C or the pipeline's Stopped
+    # still quits the driver and closes the CSV (finish_run/archive_run are skipped)
+    writer = manifest = None
+    try:
+        print(f"Navigating to {base_url}")
+        open_home(driver, wait, base_url, disclaimer_timeout)
+
+        # Rows stream straight to the CSV; the manifest remembers what is already in it
+        manifest = ProgressManifest(resume=resume)
+        writer = StreamingWriter(OUTPUT_FILE, manifest.resumed)
+        all_food_data = []
+        def on_item(nutrients):
+            record_item(all_food_data, nutrients, writer)
+            # e.g. the pipeline's dedupe queue; may block to apply backpressure
+            if on_row: on_row(nutrients)
+
+        # --- GET LOCATIONS ---
+        try:
+            locations = get_locations(driver, wait)
+            print(f"Found Locations: {locations}")
+        except Exception:
+            print("Could not find locations. Exiting.")
+            return
+
+        # --- MAIN LOOP ---
+        for loc_name in locations:
+            # Filter: Only scrape Dining Halls (see DINING_HALLS) to save time.
+            if not all_locations and not is_dining_hall(loc_name):
+                 continue 
+            if manifest.is_done("locations", loc_name):
+                print(f"\n--- {loc_name} already done ---")
+                continue
+
+            print(f"\n--- Entering {loc_name} ---")
+        
+            n_days = enter_location(driver, wait, loc_name)
+            if n_days is None:
+                continue
+
+            # Loop through days by INDEX to prevent Stale Elements
+            for i in range(n_days if max_days is None else min(n_days, max_days)):
+                if not scrape_day(driver, wait, loc_name, i, on_item, bulk=bulk, cache=cache, manifest=manifest, fingerprints=fingerprints): break
+            manifest.mark_done("locations", loc_name)
+
+            # Go Back to Locations (Home)
+            return_home(driver, wait, base_url, disclaimer_timeout)
+    finally:
+        if owns_driver: close_driver(driver)
+        else: drain_traffic(driver)
+        if writer: writer.close()
+        if manifest: manifest.close()
+
+    finish_run(writer, manifest)
+    # Resumed: rows from before the crash are only in the streamed CSV, so archive all of it
+    archive_run(all_food_data, OUTPUT_FILE if manifest.resumed else None)
+    print_traffic_report()
+    write_metrics("scrape")
+    return all_food_data
+
+def finish_run(writer, manifest):
+    if writer.count:
+        print(f"\n✅ Success! {writer.count} new rows appended to {writer.path}")
+    else:
+        print("\n❌ No data scraped.")
+    # Whole run finished: the next run starts fresh unless it is resumed mid-way
+    manifest.clear()
+
+def save_results(all_food_data):
+    # Save Data
+    if all_food_data:
+        # FoodRecords -> column arrays -> the CSV's columns (food_record.CSV_COLUMNS) in one go
+        format_frame(to_frame(all_food_data)).to_csv(OUTPUT_FILE, index=False)
+        print(f"\n✅ Success! Data saved to {OUTPUT_FILE}")
+    else:
+        print("\n❌ No data scraped.")
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Scrape NC State dining menus from NetNutrition.")
+    parser.add_argument("--engine", choices=["selenium", "http"], default="selenium",
+                        help="'http' talks to NetNutrition directly (no Chrome needed)")
+    parser.add_argument("--workers", type=int, default=1,
+                        help="number of headless Chrome workers sharing (location, day) units")
+    parser.add_argument("--max-inflight", type=int, default=2,
+                        help="page loads allowed to hit the host at once in worker mode")
+    parser.add_argument("--all-locations", action="store_true",
+                        help=f"scrape every unit, not only {'/'.join(DINING_HALLS)}")
+    parser.add_argument("--max-days", type=int, default=MAX_DAYS,
+                        help="days per location (0 = every day the menu publishes)")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--lean", action="store_true",
+                        help="headless, eager page loads, no images/fonts/media/analytics")
+    parser.add_argument("--bulk", action="store_true",
+                        help="read each nutrition label with one script call instead of row by row")
+    parser.add_argument("--cache", action="store_true",
+                        help="reuse labels already scraped this week instead of opening the modal")
+    parser.add_argument("--resume", action="store_true",
+                        help="continue a crashed run from scrape_progress.jsonl instead of starting over")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip meals whose item list hasn't changed since the last run")
+    parser.add_argument("--no-archive", action="store_true",
+                        help="don't append this run to the Parquet archive (menu_archive/)")
+    parser.add_argument("--debug", action="store_true",
+                        help="print [DEBUG] lines, the Live Data Feed and save progress")
+    args = parser.parse_args()
+    if args.debug: set_debug(True)
+    if args.lean: set_profile('lean')
+    if args.no_archive: set_archive(None)
+    max_days = args.max_days or None
+    cache = None
+    if args.cache:
+        from nutrition_cache import NutritionCache
+        cache = NutritionCache()
+    fingerprints = None
+    if args.incremental:
+        from menu_fingerprints import MenuFingerprints
+        fingerprints = MenuFingerprints()
+
+    exit_code = 0
+    if args.engine == "http":
+        from http_scraper import scrape_ncsu_dining_http
+        scrape_ncsu_dining_http(all_locations=args.all_locations, max_days=max_days, fingerprints=fingerprints)
+    elif args.workers > 1:
+        from parallel_scraper import IncompleteRun, scrape_ncsu_dining_parallel
+        try:
+            scrape_ncsu_dining_parallel(workers=args.workers, max_inflight=args.max_inflight,
+                                        all_locations=args.all_locations, max_days=max_days, bulk=args.bulk,
+                                        cache=cache, resume=args.resume, fingerprints=fingerprints)
+        except IncompleteRun as e:
+            print(f"\n❌ {e}")
+            exit_code = 1
+    else:
+        scrape_ncsu_dining(all_locations=args.all_locations, max_days=max_days, headless=args.headless,
+                           bulk=args.bulk, cache=cache, resume=args.resume, fingerprints=fingerprints)
+    if cache:
+        cache.close()
+    if fingerprints:
+        fingerprints.close()
+    raise SystemExit(exit_code)
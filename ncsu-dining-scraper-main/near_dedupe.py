@@ -0,0 +1,179 @@
+import csv
+import re
+import unicodedata
+from collections import Counter
+
+from food_record import format_number, to_number
+
+# --- CONFIGURATION ---
+NAME_SIMILARITY = 0.8       # Trigram Jaccard similarity two names need to count as the same food
+CALORIE_TOLERANCE = 10      # kcal, or ...
+CALORIE_TOLERANCE_PCT = 5   # ... this % of the larger value, whichever is more
+MACRO_TOLERANCE = 2         # g of protein / carbs / fat, or ...
+MACRO_TOLERANCE_PCT = 10    # ... this %, whichever is more (only checked when both sides have the value)
+MAX_POSTING = 5000          # Trigrams on more names than this are too common to narrow anything down
+REPORT_FILE = 'near_duplicates.csv'
+
+MACROS = ('protein_g', 'carbohydrate_g', 'fat_g')
+PUNCTUATION = re.compile(r'[^\w\s]+')
+SPACES = re.compile(r'\s+')
+
+
+def singular(word):
+    # Good enough for menus: 'eggs' -> 'egg', 'pancakes' -> 'pancake', 'swiss' stays
+    return word[:-1] if len(word) > 3 and word.endswith('s') and not word.endswith('ss') else word
+
+
+def normalize_name(name):
+    """'Chicken,  Grilled Breasts!' and 'grilled chicken breast' -> 'breast chicken grilled'."""
+    text = unicodedata.normalize('NFKD', str(name)).encode('ascii', 'ignore').decode('ascii')
+    text = PUNCTUATION.sub(' ', text.lower().replace('&', ' and '))
+    return ' '.join(sorted(singular(word) for word in SPACES.sub(' ', text).split()))
+
+
+def trigrams(normalized):
+    padded = f"  {normalized} "
+    return frozenset(padded[i:i + 3] for i in range(len(padded) - 2))
+
+
+def within(a, b, absolute, percent):
+    return abs(a - b) <= max(absolute, max(abs(a), abs(b)) * percent / 100)
+
+
+class NearDuplicateIndex:
+    """Known foods, findable by normalized name and by shared name trigrams.
+
+    match() looks a food up in two steps:
+      1. same name after normalize_name() (case, spacing, punctuation, plurals, word order)
+      2. names sharing enough trigrams, found through an inverted index so only
+         the foods that share a trigram with the query are ever compared
+    Either way the calories (and any macros both sides have) must agree within
+    the tolerances, so a recalculated "190" vs "200" kcal biscuit merges but a
+    renamed, different dish doesn't.
+    """
+
+    def __init__(self, similarity=NAME_SIMILARITY, calorie_tolerance=CALORIE_TOLERANCE,
+                 calorie_pct=CALORIE_TOLERANCE_PCT, macro_tolerance=MACRO_TOLERANCE, macro_pct=MACRO_TOLERANCE_PCT):
+        self.similarity = similarity
+        self.calorie_tolerance = calorie_tolerance
+        self.calorie_pct = calorie_pct
+        self.macro_tolerance = macro_tolerance
+        self.macro_pct = macro_pct
+        self.entries = []        # (name, normalized, trigrams, calories, macros, source)
+        self.by_name = {}        # normalized -> entry numbers
+        self.postings = {}       # trigram -> entry numbers
+        self.merges = []
+
+    @classmethod
+    def from_history(cls, history_ids, **tolerances):
+        """Index of every "Food Name_Calories" ID already uploaded (history has no macros)."""
+        index = cls(**tolerances)
+        for item_id in history_ids:
+            name, _, calories = str(item_id).rpartition('_')
+            index.add(name, to_number(calories), source='history')
+        return index
+
+    def add(self, name, calories, macros=None, source='this run'):
+        normalized = normalize_name(name)
+        grams = trigrams(normalized)
+        n = len(self.entries)
+        self.entries.append((name, normalized, grams, calories, macros or {}, source))
+        self.by_name.setdefault(normalized, []).append(n)
+        for gram in grams:
+            self.postings.setdefault(gram, []).append(n)
+
+    def _nutrients_agree(self, calories, macros, entry):
+        _, _, _, other_calories, other_macros, _ = entry
+        if calories is None or other_calories is None:
+            return None
+        if not within(calories, other_calories, self.calorie_tolerance, self.calorie_pct):
+            return None
+        reasons = [] if calories == other_calories else [f"calories {other_calories:g} -> {calories:g}"]
+        for macro in MACROS:
+            a, b = macros.get(macro), other_macros.get(macro)
+            if a is None or b is None:
+                continue
+            if not within(a, b, self.macro_tolerance, self.macro_pct):
+                return None
+            if a != b:
+                reasons.append(f"{macro} {b:g} -> {a:g}")
+        return reasons
+
+    def match(self, name, calories, macros=None):
+        """(matched entry, reason, similarity) for a known food this one duplicates, else None."""
+        macros = macros or {}
+        normalized = normalize_name(name)
+        for n in self.by_name.get(normalized, ()):
+            entry = self.entries[n]
+            nutrients = self._nutrients_agree(calories, macros, entry)
+            if nutrients is not None:
+                what = "same name" if entry[0] == name else "same name after normalizing"
+                return entry, "; ".join([what] + nutrients), 1.0
+
+        # Blocking: count shared trigrams per known food via the postings lists.
+        # Jaccard >= t needs at least t * |query trigrams| in common, minus any
+        # too-common trigrams that weren't counted.
+        grams = trigrams(normalized)
+        shared = Counter()
+        skipped = 0
+        for gram in grams:
+            posting = self.postings.get(gram, ())
+            if len(posting) > MAX_POSTING:
+                skipped += 1
+                continue
+            shared.update(posting)
+        needed = self.similarity * len(grams) - skipped
+
+        best = None
+        for n, count in shared.items():
+            if count < needed:
+                continue
+            entry = self.entries[n]
+            similarity = len(grams & entry[2]) / len(grams | entry[2])
+            if similarity < self.similarity or (best and similarity <= best[2]):
+                continue
+            nutrients = self._nutrients_agree(calories, macros, entry)
+            if nutrients is not None:
+                best = (entry, "; ".join([f"similar name ({similarity:.2f})"] + nutrients), similarity)
+        return best
+
+    def match_record(self, record):
+        """match() for a FoodRecord; a hit is remembered for report()."""
+        macros = {m: getattr(record, m) for m in MACROS}
+        hit = self.match(record.food_name, record.calories, macros)
+        if hit:
+            entry, reason, similarity = hit
+            self.merges.append({
+                'Food Name': record.food_name, 'Calories': format_number(record.calories),
+                'Merged Into': entry[0], 'Merged Calories': format_number(entry[3]), 'Source': entry[5],
+                'Similarity': round(similarity, 3), 'Reason': reason,
+            })
+        return hit
+
+    def add_record(self, record):
+        self.add(record.food_name, record.calories, {m: getattr(record, m) for m in MACROS})
+
+    def report(self, path=REPORT_FILE):
+        """Writes every merge (what, into what, why) to a CSV and returns how many there were."""
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=['Food Name', 'Calories', 'Merged Into', 'Merged Calories',
+                                                   'Source', 'Similarity', 'Reason'])
+            writer.writeheader()
+            writer.writerows(self.merges)
+        return len(self.merges)
+
+
+def merge_near_duplicates(records, history_ids, index=None):
+    """Drops records that are near-duplicates of history or of an earlier record in the list.
+
+    Returns (kept records, index); index.merges says what was dropped and why.
+    """
+    index = index or NearDuplicateIndex.from_history(history_ids)
+    kept = []
+    for record in records:
+        if record.food_name is not None:
+            if index.match_record(record):
+                continue
+            index.add_record(record)
+        kept.append(record)
+    return kept, index
@@ -0,0 +1,107 @@
+import json
+import re
+import sqlite3
+import threading
+import time
+
+# --- CONFIGURATION ---
+CACHE_FILE = 'nutrition_cache.db'
+TTL_DAYS = 7          # Labels older than this are scraped again
+MAX_ENTRIES = 20000   # Least recently used labels are evicted past this
+
+# Only the label fields are cached; Meal/Location/Date belong to the menu, not the food
+LABEL_FIELDS = (
+    'Calories', 'Total Fat', 'Saturated Fat', 'Cholesterol', 'Sodium',
+    'Total Carbohydrate', 'Dietary Fiber', 'Sugars', 'Protein',
+    'Serving Size', 'Serving Size (g)',
+)
+
+
+def name_fingerprint(food_name):
+    """'Buttermilk  Biscuit ' and 'buttermilk biscuit' should land on the same entry."""
+    return re.sub(r'\s+', ' ', str(food_name)).strip().lower()
+
+
+class NutritionCache:
+    """On-disk label cache keyed by NetNutrition item ID, with a food-name fallback.
+
+    Every label is stored under "id:<showNutrition id>" and
+    "name:<location>|<fingerprint>", so a biscuit scraped at Fountain on Monday
+    is a hit at Fountain on Thursday even though the menu gave it a different
+    item ID. The name key stays within one location: Clark's "Cheese Pizza" may
+    be a different recipe or serving than Fountain's, so it is read again there.
+    """
+
+    def __init__(self, path=CACHE_FILE, ttl_days=TTL_DAYS, max_entries=MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl_days * 86400
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS labels ("
+            " key TEXT PRIMARY KEY, nutrients TEXT NOT NULL,"
+            " stored_at REAL NOT NULL, used_at REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS labels_used_at ON labels (used_at)")
+        self._conn.commit()
+
+    @staticmethod
+    def _keys(item_id=None, food_name=None, location=None):
+        keys = []
+        if item_id:
+            keys.append(f"id:{item_id}")
+        if location and food_name and food_name != "N/A":
+            keys.append(f"name:{location}|{name_fingerprint(food_name)}")
+        return keys
+
+    def get(self, item_id=None, food_name=None, location=None):
+        """Cached label fields for this item, or None on a miss / expired entry."""
+        now = time.time()
+        with self._lock:
+            for key in self._keys(item_id, food_name, location):
+                row = self._conn.execute(
+                    "SELECT nutrients, stored_at FROM labels WHERE key = ?", (key,)
+                ).fetchone()
+                if row and now - row[1] <= self.ttl:
+                    self._conn.execute("UPDATE labels SET used_at = ? WHERE key = ?", (now, key))
+                    self._conn.commit()
+                    self.hits += 1
+                    return json.loads(row[0])
+            self.misses += 1
+            return None
+
+    def put(self, nutrients, item_id=None, food_name=None, location=None):
+        label = {k: nutrients[k] for k in LABEL_FIELDS if k in nutrients}
+        if 'Calories' not in label:
+            # Don't pin a half-read label for a whole week
+            return
+        now = time.time()
+        payload = json.dumps(label)
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO labels (key, nutrients, stored_at, used_at) VALUES (?, ?, ?, ?)",
+                [(key, payload, now, now) for key in self._keys(item_id, food_name, location)],
+            )
+            self._conn.commit()
+            self._puts += 1
+            if self._puts % 50 == 0:
+                self._evict(now)
+
+    def _evict(self, now):
+        self._conn.execute("DELETE FROM labels WHERE stored_at < ?", (now - self.ttl,))
+        (count,) = self._conn.execute("SELECT COUNT(*) FROM labels").fetchone()
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM labels WHERE key IN (SELECT key FROM labels ORDER BY used_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+        self._conn.commit()
+
+    def close(self):
+        print(f" Nutrition cache: {self.hits} hits, {self.misses} misses")
+        with self._lock:
+            self._conn.close()
@@ -0,0 +1,129 @@
+import html
+import re
+
+# One alternation, compiled once: every nutrient line and the serving size are
+# picked up in a single left-to-right pass over the label text. The lookahead
+# lets the engine skip positions that can't start a label word. "<1g" and
+# "less than 1g" are read as 1g, as the old per-row regexes did, and "1,200mg"
+# as 1200mg. The serving size stays on its own line, so an empty one can't
+# swallow the line after it.
+LABEL_PATTERN = re.compile(
+    r'(?=[CDPST])(?:'
+    r'Serving Size[ \t\xa0]*:?[ \t\xa0]*(?P<serving>[^\n]*)'
+    r'|(?P<field>Calories|Total Fat|Saturated Fat|Trans Fat|Cholesterol|Sodium'
+    r'|Total Carbohydrates?|Dietary Fiber|(?<!Added )(?:Total )?Sugars|Protein)'
+    r'\s*:?\s*(?:(?:<|[Ll]ess than)\s*)?(?P<value>(?:\d{1,3}(?:,\d{3})+|\d+)(?:\.\d+)?)\s*(?P<unit>mg|g|kcal)?)'
+)
+SERVING_GRAMS = re.compile(r'\(\s*(\d+(?:\.\d+)?)\s*g\s*\)|(\d+(?:\.\d+)?)\s*g\b', re.I)
+
+BLOCK_END = re.compile(r'<(?:br\s*/?|/(?:div|p|tr|td|th|li|h\d|section|header))>', re.I)
+TAG = re.compile(r'<[^>]+>')
+SPACES = re.compile(r'[ \t\xa0]+')
+LOOKS_LIKE_HTML = re.compile(r'<[a-zA-Z/!]')
+
+# Label wording -> typed field name (unit is part of the name)
+FIELDS = {
+    'calories': 'calories_kcal',
+    'total fat': 'total_fat_g',
+    'saturated fat': 'saturated_fat_g',
+    'trans fat': 'trans_fat_g',
+    'cholesterol': 'cholesterol_mg',
+    'sodium': 'sodium_mg',
+    'total carbohydrate': 'total_carbohydrate_g',
+    'total carbohydrates': 'total_carbohydrate_g',
+    'dietary fiber': 'dietary_fiber_g',
+    'sugars': 'sugars_g',
+    'total sugars': 'sugars_g',
+    'protein': 'protein_g',
+}
+
+# Typed field -> (scraper CSV column, unit suffix) for the string rows we already write
+CSV_FIELDS = {
+    'calories_kcal': ('Calories', ''),
+    'total_fat_g': ('Total Fat', 'g'),
+    'saturated_fat_g': ('Saturated Fat', 'g'),
+    'cholesterol_mg': ('Cholesterol', 'mg'),
+    'sodium_mg': ('Sodium', 'mg'),
+    'total_carbohydrate_g': ('Total Carbohydrate', 'g'),
+    'dietary_fiber_g': ('Dietary Fiber', 'g'),
+    'sugars_g': ('Sugars', 'g'),
+    'protein_g': ('Protein', 'g'),
+}
+
+
+def html_to_text(fragment):
+    """Roughly what Selenium's element.text returns: tags gone, one line per block."""
+    text = BLOCK_END.sub("\n", fragment)
+    text = html.unescape(TAG.sub(" ", text))
+    return "\n".join(line for line in (SPACES.sub(' ', l).strip() for l in text.split("\n")) if line)
+
+
+def _strip_tags(fragment):
+    """Cheaper html_to_text() for parsing: the pattern tolerates the extra whitespace."""
+    text = TAG.sub(" ", BLOCK_END.sub("\n", fragment)).replace("&nbsp;", " ")
+    return html.unescape(text) if "&" in text else text
+
+
+def _number(text):
+    value = float(text.replace(',', ''))
+    return int(value) if value.is_integer() else value
+
+
+def parse_label(source):
+    """Parse a nutrition label (its text, or the #nutritionLabel HTML) into numbers.
+
+    Returns e.g. {'calories_kcal': 190, 'total_fat_g': 9, 'sodium_mg': 480,
+    'serving_size': '1 each (57g)', 'serving_g': 57}. Fields missing from the
+    label are missing from the dict. No browser needed.
+    """
+    text = _strip_tags(source) if LOOKS_LIKE_HTML.search(source) else source
+    data = {}
+    for match in LABEL_PATTERN.finditer(text):
+        if match.group('serving') is not None:
+            serving = SPACES.sub(' ', match.group('serving')).strip()
+            if serving and 'serving_size' not in data:
+                data['serving_size'] = serving
+                grams = SERVING_GRAMS.search(serving)
+                if grams:
+                    data['serving_g'] = _number(grams.group(1) or grams.group(2))
+            continue
+
+        name = FIELDS[' '.join(match.group('field').lower().split())]
+        unit = (match.group('unit') or '').lower()
+        # "Sodium 480mg" and "Total Fat 9g" only; skip stray numbers such as a % DV
+        if name == 'calories_kcal' or name.endswith('_' + unit):
+            data.setdefault(name, _number(match.group('value')))
+    return data
+
+
+def parse_many(sources):
+    """Bulk re-parse: one dict per saved label."""
+    return [parse_label(source) for source in sources]
+
+
+def to_csv_fields(parsed):
+    """Typed label -> the '12g' / '450mg' strings the scraper's CSV has always used."""
+    row = {}
+    for name, (column, suffix) in CSV_FIELDS.items():
+        if name in parsed:
+            row[column] = f"{parsed[name]}{suffix}"
+    if 'serving_size' in parsed:
+        row['Serving Size'] = parsed['serving_size']
+        row['Serving Size (g)'] = str(parsed.get('serving_g', 1))
+    return row
+
+
+if __name__ == '__main__':
+    # Re-parse a folder of saved labels: python nutrition_parser.py saved_labels/ > labels.csv
+    import csv
+    import os
+    import sys
+
+    folder = sys.argv[1]
+    names = sorted(n for n in os.listdir(folder) if n.endswith(('.html', '.txt')))
+    columns = ['file', 'serving_size', 'serving_g'] + sorted(set(FIELDS.values()))
+    out = csv.DictWriter(sys.stdout, fieldnames=columns)
+    out.writeheader()
+    for name in names:
+        with open(os.path.join(folder, name), encoding='utf-8') as f:
+            out.writerow({'file': name, **parse_label(f.read())})
@@ -0,0 +1,180 @@
+import queue
+import threading
+import time
+
+from browser_profile import print_traffic_report, reset_traffic
+from checkpoint import ProgressManifest, StreamingWriter, archive_run
+from food_record import FoodRecord
+from metrics import write_metrics
+from ncsu_scraper import (
+    BASE_URL, OUTPUT_FILE, close_driver, create_driver, enter_location, finish_run, get_locations,
+    is_dining_hall, open_home, record_item, return_home, scrape_day,
+)
+from waits import Waiter
+
+# --- CONFIGURATION ---
+WORKERS = 3            # Headless Chrome instances running side by side
+MAX_INFLIGHT = 2       # Page loads / clicks allowed to hit the host at the same time
+UNIT_RETRIES = 1       # Times a (location, day) unit is retried on a fresh driver
+
+
+class IncompleteRun(Exception):
+    """Some work units still failed after UNIT_RETRIES; the manifest is kept for --resume."""
+
+
+def discover_work(driver, wait, all_locations=True, max_days=None, base_url=BASE_URL):
+    """Walks the locations once and returns every (location, day_index) work unit."""
+    open_home(driver, wait, base_url)
+    locations = get_locations(driver, wait)
+    print(f"Found Locations: {locations}")
+
+    units = []
+    for loc_name in locations:
+        if not all_locations and not is_dining_hall(loc_name):
+            continue
+        n_days = enter_location(driver, wait, loc_name)
+        if n_days:
+            if max_days is not None:
+                n_days = min(n_days, max_days)
+            units.extend((loc_name, i) for i in range(n_days))
+            print(f"  {loc_name}: {n_days} days")
+        return_home(driver, wait, base_url)
+    return units
+
+
+def _worker(worker_id, work, results, failed, stops, on_item, host_slot, base_url, headless, bulk, cache, manifest, fingerprints, driver=None):
+    wait = Waiter(driver, 5) if driver else None
+
+    while not stops:
+        try:
+            order, loc_name, i, attempt = work.get_nowait()
+        except queue.Empty:
+            break
+
+        rows = []
+        try:
+            if driver is None:
+                driver = create_driver(headless)
+                wait = Waiter(driver, 5)
+
+            print(f"[worker {worker_id}] {loc_name} / day {i + 1}")
+            with host_slot:
+                open_home(driver, wait, base_url)
+            with host_slot:
+                n_days = enter_location(driver, wait, loc_name)
+            if n_days is not None:
+                def collect(nutrients):
+                    rows.append(FoodRecord.from_row(nutrients))
+                    on_item(nutrients)
+                scrape_day(driver, wait, loc_name, i, collect, host_slot, bulk, cache, manifest, fingerprints)
+            results.setdefault(order, []).extend(rows)
+        except Exception as e:
+            # Most likely a dead driver: throw it away and let the unit run again.
+            # The manifest makes the retry skip the items this attempt already wrote.
+            results.setdefault(order, []).extend(rows)
+            print(f"[worker {worker_id}] {loc_name} / day {i + 1} failed: {e}")
+            try:
+                close_driver(driver)
+            except Exception:
+                pass
+            driver = None
+            if attempt < UNIT_RETRIES:
+                work.put((order, loc_name, i, attempt + 1))
+            else:
+                failed.append((loc_name, i, e))
+        except BaseException as e:
+            # The pipeline's Stopped (or Ctrl-C): not a driver problem, so no retry.
+            # Record it for the main thread and let every worker wind down.
+            results.setdefault(order, []).extend(rows)
+            stops.append(e)
+        finally:
+            work.task_done()
+
+    if driver is not None:
+        try:
+            close_driver(driver)
+        except Exception:
+            pass
+
+
+def scrape_ncsu_dining_parallel(workers=WORKERS, max_inflight=MAX_INFLIGHT, all_locations=True,
+                                max_days=None, headless=True, base_url=BASE_URL, bulk=False, cache=None, resume=False,
+                                on_row=None, fingerprints=None):
+    """Worker-pool scrape: N drivers pull (location, day) units from a shared queue."""
+    start = time.perf_counter()
+    reset_traffic()
+    print(f"Setting up {workers} Chrome workers...")
+
+    first_driver = create_driver(headless)
+    try:
+        units = discover_work(first_driver, Waiter(first_driver, 5), all_locations, max_days, base_url)
+    except BaseException:
+        close_driver(first_driver)
+        raise
+    print(f" {len(units)} work units queued")
+
+    work = queue.Queue()
+    for order, (loc_name, i) in enumerate(units):
+        work.put((order, loc_name, i, 0))
+
+    # Every worker streams into the same CSV; progress goes through record_item one at a time
+    manifest = ProgressManifest(resume=resume)
+    writer = StreamingWriter(OUTPUT_FILE, manifest.resumed)
+    results = {}
+    failed = []
+    stops = []
+    progress = []
+    progress_lock = threading.Lock()
+    def on_item(nutrients):
+        with progress_lock:
+            record_item(progress, nutrients, writer)
+        # Outside the lock, so a full downstream queue only stalls this worker
+        if on_row: on_row(nutrients)
+
+    host_slot = threading.BoundedSemaphore(max_inflight)
+    threads = []
+    try:
+        for worker_id in range(min(workers, len(units)) or 1):
+            driver = first_driver if worker_id == 0 else None
+            t = threading.Thread(
+                target=_worker,
+                args=(worker_id, work, results, failed, stops, on_item, host_slot, base_url, headless, bulk, cache, manifest, fingerprints, driver),
+                daemon=True,
+            )
+            t.start()
+            threads.append(t)
+        for t in threads:
+            t.join()
+    finally:
+        writer.close()
+        manifest.close()
+
+    if stops:
+        # Not a finished run: keep the manifest for --resume and don't archive a partial scrape
+        print(f" Stopped after {writer.count} rows; the manifest is kept for --resume.")
+        raise stops[0]
+
+    # Hand back the rows in discovery order, as a sequential run would
+    all_food_data = []
+    for order in range(len(units)):
+        all_food_data.extend(results.get(order, []))
+
+    print(f" Scraped {len(all_food_data)} items in {time.perf_counter() - start:.1f}s")
+    if failed:
+        for loc_name, i, e in failed:
+            print(f" ❌ Gave up on {loc_name} / day {i + 1}: {e}")
+        # Keep the manifest so --resume retries only what's missing; that run archives the whole CSV
+        print(f" {len(failed)} work unit(s) failed; rerun with --resume to finish the scrape.")
+    else:
+        finish_run(writer, manifest)
+        # Resumed: rows from before the crash are only in the streamed CSV, so archive all of it
+        archive_run(all_food_data, OUTPUT_FILE if manifest.resumed else None)
+    print_traffic_report()
+    write_metrics("scrape")
+    if failed:
+        raise IncompleteRun(f"{len(failed)} of {len(units)} work units failed")
+    return all_food_data
+
+
+if __name__ == '__main__':
+    scrape_ncsu_dining_parallel()
@@ -0,0 +1,226 @@
+import queue
+import threading
+import time
+
+from browser_profile import set_profile
+from checkpoint import StreamingWriter, set_archive
+from deduplicate_data import FUZZY_MATCH, HISTORY_FILE, UPLOAD_QUEUE_FILE
+from food_record import FoodRecord, canonical_id
+from history_store import HistoryStore
+from metrics import record, set_debug, write_metrics
+from ncsu_scraper import MAX_DAYS
+from near_dedupe import REPORT_FILE, NearDuplicateIndex
+
+# --- CONFIGURATION ---
+SCRAPED_QUEUE_SIZE = 50   # Scraped rows waiting for dedupe before the scraper blocks
+UPLOAD_QUEUE_SIZE = 10    # New foods waiting for the uploader before dedupe blocks
+POLL = 0.5                # Seconds between shutdown checks while blocked on a queue
+
+_DONE = object()          # End-of-stream marker passed down the queues
+
+
+class Stopped(BaseException):
+    """Raised in a stage blocked on a queue once the pipeline is shutting down.
+
+    A BaseException so the scrapers' per-item `except Exception` handlers let it
+    through and the scrape actually stops instead of moving on to the next item.
+    """
+
+
+def put(q, item, stop):
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=POLL)
+            return
+        except queue.Full:
+            pass
+    raise Stopped()
+
+
+def get(q, stop):
+    while not stop.is_set():
+        try:
+            return q.get(timeout=POLL)
+        except queue.Empty:
+            pass
+    raise Stopped()
+
+
+def scrape_stage(out_q, stop, engine, workers, scrape_kwargs):
+    on_row = lambda row: put(out_q, row, stop)
+    try:
+        if engine == "http":
+            from http_scraper import scrape_ncsu_dining_http
+            scrape_ncsu_dining_http(on_row=on_row, **scrape_kwargs)
+        elif workers > 1:
+            from parallel_scraper import scrape_ncsu_dining_parallel
+            scrape_ncsu_dining_parallel(workers=workers, on_row=on_row, **scrape_kwargs)
+        else:
+            from ncsu_scraper import scrape_ncsu_dining
+            scrape_ncsu_dining(on_row=on_row, **scrape_kwargs)
+    except Stopped:
+        return
+    except Exception as e:
+        # Whatever was scraped before the crash still flows through to the uploader
+        print(f" Scraper stopped early: {e}")
+    try: put(out_q, _DONE, stop)
+    except Stopped: pass
+
+
+def dedupe_stage(in_q, out_q, stop, history_ids, stats, near=None):
+    # Same rule as deduplicate(): skip anything in history or already seen this run,
+    # and (with a NearDuplicateIndex) anything that's only a reworded/recalculated version of it
+    seen = {canonical_id(i) for i in history_ids}
+    try:
+        while True:
+            row = get(in_q, stop)
+            if row is _DONE:
+                break
+            stats["scraped"] += 1
+            # Parsed once here; the uploader gets the FoodRecord, not the strings
+            food = FoodRecord.from_row(row)
+            if food.signature in seen:
+                continue
+            seen.add(food.signature)
+            if near is not None and food.food_name is not None:
+                if near.match_record(food):
+                    stats["merged"] += 1
+                    continue
+                near.add_record(food)
+            stats["new"] += 1
+            put(out_q, food, stop)
+        put(out_q, _DONE, stop)
+    except Stopped:
+        pass
+
+
+def upload_stage(in_q, stop, stats, started, profile=None, dry_run=False):
+    if dry_run:
+        # Nothing leaves the machine: the new foods land in to_upload.csv for uploader.py
+        writer = StreamingWriter(UPLOAD_QUEUE_FILE)
+    else:
+        from uploader import DEBUG_PORT, open_journal, setup_existing_driver, upload_journaled
+        from waits import Waiter
+        driver = setup_existing_driver()
+        if not driver:
+            stop.set()
+            return
+        wait = Waiter(driver, 10)
+        # Same claim/submitting/done bookkeeping as uploader.py, so a crash never double-submits
+        journal = open_journal()
+
+    try:
+        while True:
+            food = get(in_q, stop)
+            if food is _DONE:
+                break
+            if dry_run:
+                writer.write(food.to_row())
+                uploaded = True
+            else:
+                try:
+                    outcome = upload_journaled(driver, wait, food, journal, str(DEBUG_PORT), profile,
+                                               position=f"{stats['new']} new")
+                    uploaded = outcome == "uploaded"
+                except Exception as e:
+                    print(f" Browser is gone ({e}); stopping the pipeline.")
+                    stop.set()
+                    break
+            if uploaded:
+                stats["uploaded"] += 1
+                if stats["uploaded"] == 1:
+                    stats["first_upload_s"] = time.perf_counter() - started
+                    record("pipeline first upload", stats["first_upload_s"])
+                    print(f"\n ⏱ First upload {stats['first_upload_s']:.1f}s after the scrape started")
+    except Stopped:
+        pass
+    finally:
+        if dry_run:
+            writer.close()
+        else:
+            journal.close()
+
+
+def run_pipeline(engine="selenium", workers=1, profile=None, dry_run=False, fuzzy=FUZZY_MATCH, **scrape_kwargs):
+    """Scrape -> dedupe -> upload with each stage in its own thread and bounded queues in between.
+
+    New foods are uploaded while the scrape is still running. A full queue blocks
+    the stage feeding it, so the scraper never gets far ahead of the uploader.
+    Ctrl-C stops all three; whatever wasn't uploaded is still in the scrape CSV
+    and is picked up by the next run (or by deduplicate.py).
+    """
+    store = HistoryStore(HISTORY_FILE)
+    history_ids = store.ids()
+    store.close()
+    print(f" Loaded history: {len(history_ids)} items previously processed.")
+    near = NearDuplicateIndex.from_history(history_ids) if fuzzy else None
+
+    scraped = queue.Queue(maxsize=SCRAPED_QUEUE_SIZE)
+    to_upload = queue.Queue(maxsize=UPLOAD_QUEUE_SIZE)
+    stop = threading.Event()
+    stats = {"scraped": 0, "new": 0, "merged": 0, "uploaded": 0, "first_upload_s": None}
+    started = time.perf_counter()
+
+    stages = [
+        threading.Thread(target=scrape_stage, args=(scraped, stop, engine, workers, scrape_kwargs), name="scrape"),
+        threading.Thread(target=dedupe_stage, args=(scraped, to_upload, stop, history_ids, stats, near),
+                         name="dedupe"),
+        threading.Thread(target=upload_stage, args=(to_upload, stop, stats, started, profile, dry_run), name="upload"),
+    ]
+    for t in stages:
+        t.start()
+    try:
+        # join() with a timeout so Ctrl-C reaches this thread
+        while any(t.is_alive() for t in stages):
+            for t in stages:
+                t.join(POLL)
+    except KeyboardInterrupt:
+        print("\n Stopping pipeline...")
+        stop.set()
+        for t in stages:
+            t.join()
+
+    total = time.perf_counter() - started
+    print(f"\n Pipeline: {stats['scraped']} scraped, {stats['new']} new, "
+          f"{stats['uploaded']} {'queued' if dry_run else 'uploaded'} in {total:.1f}s")
+    if near is not None:
+        near.report(REPORT_FILE)
+        print(f" {stats['merged']} near-duplicates skipped (see '{REPORT_FILE}')")
+    write_metrics("pipeline")
+    return stats
+
+
+if __name__ == '__main__':
+    import argparse
+    parser = argparse.ArgumentParser(description="Scrape, dedupe and upload in one streaming run.")
+    parser.add_argument("--engine", choices=["selenium", "http"], default="selenium")
+    parser.add_argument("--workers", type=int, default=1, help="headless Chrome workers for the scrape")
+    parser.add_argument("--all-locations", action="store_true")
+    parser.add_argument("--max-days", type=int, default=MAX_DAYS, help="days per location (0 = every day)")
+    parser.add_argument("--headless", action="store_true")
+    parser.add_argument("--lean", action="store_true", help="lean scraper browser (see browser_profile.py)")
+    parser.add_argument("--bulk", action="store_true")
+    parser.add_argument("--profile", choices=["fast", "human"], help="uploader fill profile")
+    parser.add_argument("--dry-run", action="store_true",
+                        help=f"write new foods to {UPLOAD_QUEUE_FILE} instead of uploading them")
+    parser.add_argument("--incremental", action="store_true",
+                        help="skip meals whose item list hasn't changed since the last run")
+    parser.add_argument("--no-archive", action="store_true", help="don't append the scrape to menu_archive/")
+    parser.add_argument("--fuzzy", action="store_true",
+                        help="also skip near-duplicates of known foods (listed in near_duplicates.csv)")
+    parser.add_argument("--debug", action="store_true")
+    args = parser.parse_args()
+    if args.debug: set_debug(True)
+    if args.lean: set_profile('lean')
+    if args.no_archive: set_archive(None)
+
+    scrape_kwargs = {"all_locations": args.all_locations, "max_days": args.max_days or None}
+    if args.engine == "selenium":
+        scrape_kwargs.update(bulk=args.bulk, headless=args.headless or args.workers > 1)
+    fingerprints = None
+    if args.incremental:
+        from menu_fingerprints import MenuFingerprints
+        fingerprints = scrape_kwargs["fingerprints"] = MenuFingerprints()
+    run_pipeline(args.engine, args.workers, args.profile, args.dry_run, fuzzy=args.fuzzy or FUZZY_MATCH, **scrape_kwargs)
+    if fingerprints:
+        fingerprints.close()
@@ -0,0 +1,19 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import metrics  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def workdir(tmp_path, monkeypatch):
+    """Every test runs in its own directory, so CSVs, databases and metrics files never land in the checkout."""
+    monkeypatch.chdir(tmp_path)
+    # metrics keeps its JSONL file open once a span is recorded: start a fresh one here
+    monkeypatch.setattr(metrics, 'JSONL_FILE', str(tmp_path / 'metrics.jsonl'))
+    monkeypatch.setattr(metrics, '_jsonl', None)
+    yield tmp_path
+    if metrics._jsonl:
+        metrics._jsonl.close()
@@ -0,0 +1,113 @@
+"""The --resume path: ProgressManifest, StreamingWriter and a worker-pool run that crashes and resumes.
+
+    python -m pytest tests
+"""
+import csv
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import parallel_scraper  # noqa: E402
+from checkpoint import MANIFEST_FILE, ProgressManifest, StreamingWriter, day_key, meal_key  # noqa: E402
+
+
+def rows(path):
+    with open(path, newline='', encoding='utf-8') as f:
+        return list(csv.DictReader(f))
+
+
+def test_manifest_replays_and_compacts():
+    manifest = ProgressManifest(resume=True)
+    assert not manifest.resumed
+    lunch, dinner = meal_key('Clark', 'Monday', 'Lunch'), meal_key('Clark', 'Monday', 'Dinner')
+    manifest.mark_item(lunch, 0)
+    manifest.mark_item(lunch, 1)
+    manifest.mark_done('meals', lunch)
+    manifest.mark_item(dinner, 0)
+    manifest.close()
+    # A crash in the middle of a write leaves half a line behind
+    with open(MANIFEST_FILE, 'a', encoding='utf-8') as f:
+        f.write('["item", "Clark|Mon')
+
+    resumed = ProgressManifest(resume=True)
+    assert resumed.resumed
+    assert resumed.is_done('meals', lunch) and not resumed.item_done(lunch, 0)
+    assert resumed.item_done(dinner, 0) and not resumed.item_done(dinner, 1)
+    resumed.close()
+    # Compacted: the finished meal's item lines are gone
+    with open(MANIFEST_FILE, encoding='utf-8') as f:
+        assert f.read().splitlines() == ['["meals", "Clark|Monday|Lunch"]', '["item", "Clark|Monday|Dinner", 0]']
+
+
+def test_writer_appends_only_to_an_unfinished_run():
+    writer = StreamingWriter('menu.csv')
+    writer.write({'Food Name': 'Old Biscuit'})
+    writer.close()
+
+    # --resume with no manifest left over: nothing to continue, so the CSV starts over
+    manifest = ProgressManifest(resume=True)
+    StreamingWriter('menu.csv', manifest.resumed).close()
+    assert rows('menu.csv') == []
+
+    manifest.mark_item(meal_key('Clark', 'Monday', 'Lunch'), 0)
+    writer = StreamingWriter('menu.csv', manifest.resumed)
+    writer.write({'Food Name': 'Biscuit'})
+    writer.close()
+    manifest.close()
+    writer = StreamingWriter('menu.csv', ProgressManifest(resume=True).resumed)
+    writer.write({'Food Name': 'Pizza'})
+    writer.close()
+    assert [r['Food Name'] for r in rows('menu.csv')] == ['Biscuit', 'Pizza']
+
+
+@pytest.fixture
+def fake_browser(monkeypatch):
+    """Two locations x two days x three foods; units in `broken` fail after their first food."""
+    broken = set()
+    archived = []
+
+    def scrape_day(driver, wait, loc_name, i, collect, host_slot, bulk, cache, manifest, fingerprints):
+        key = meal_key(loc_name, f"Day {i + 1}", 'Lunch')
+        if manifest.is_done('meals', key):
+            return True
+        for index in range(3):
+            if manifest.item_done(key, index):
+                continue
+            if index == 1 and (loc_name, i) in broken:
+                raise RuntimeError("chrome not reachable")
+            collect({'Date': f"Day {i + 1}", 'Location': loc_name, 'Meal': 'Lunch',
+                     'Food Name': f"{loc_name} food {index}", 'Calories': '100'})
+            manifest.mark_item(key, index)
+        manifest.mark_done('meals', key)
+        manifest.mark_done('days', day_key(loc_name, f"Day {i + 1}"))
+        return True
+
+    monkeypatch.setattr(parallel_scraper, 'create_driver', lambda headless: object())
+    monkeypatch.setattr(parallel_scraper, 'close_driver', lambda driver: None)
+    monkeypatch.setattr(parallel_scraper, 'discover_work', lambda *args: [(l, i) for l in ('Clark', 'Oval') for i in range(2)])
+    monkeypatch.setattr(parallel_scraper, 'open_home', lambda *args: None)
+    monkeypatch.setattr(parallel_scraper, 'enter_location', lambda *args: 2)
+    monkeypatch.setattr(parallel_scraper, 'scrape_day', scrape_day)
+    monkeypatch.setattr(parallel_scraper, 'archive_run', lambda records, resumed_csv=None: archived.append(resumed_csv))
+    return broken, archived
+
+
+def test_failed_units_resume_without_duplicates(fake_browser):
+    broken, archived = fake_browser
+    broken.add(('Oval', 1))
+    with pytest.raises(parallel_scraper.IncompleteRun):
+        parallel_scraper.scrape_ncsu_dining_parallel(workers=2)
+    # The unit failed twice (UNIT_RETRIES): its first food is in the CSV, the manifest is kept, nothing archived
+    assert len(rows(parallel_scraper.OUTPUT_FILE)) == 3 * 3 + 1
+    assert os.path.exists(MANIFEST_FILE) and archived == []
+
+    broken.clear()
+    parallel_scraper.scrape_ncsu_dining_parallel(workers=2, resume=True)
+    # Every food of every unit exactly once: the retry skipped the food written before the crash
+    scraped = [(r['Location'], r['Date'], r['Food Name']) for r in rows(parallel_scraper.OUTPUT_FILE)]
+    assert len(scraped) == len(set(scraped)) == 4 * 3
+    # Finished: manifest gone, and the whole CSV (both runs) is archived
+    assert not os.path.exists(MANIFEST_FILE)
+    assert archived == [parallel_scraper.OUTPUT_FILE]
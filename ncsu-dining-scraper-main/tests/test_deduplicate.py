@@ -0,0 +1,46 @@
+"""find_new_items() against the iterrows loop deduplicate() used to run (benchmarks/bench_dedupe.py).
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pandas as pd
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(0, os.path.join(HERE, '..', 'benchmarks'))
+from bench_dedupe import legacy_dedupe, synthetic_semester  # noqa: E402
+from deduplicate_data import find_new_items, read_scrapes  # noqa: E402
+from food_record import signatures  # noqa: E402
+
+
+def legacy_ids(df, history):
+    return [f"{row['Food Name']}_{row['Calories']}" for _, row in legacy_dedupe(df, history).iterrows()]
+
+
+def test_same_new_items_as_the_legacy_loop():
+    df = synthetic_semester(3000, 400)
+    history = {f"Food {i}_{i * 7 % 600}" for i in range(0, 400, 3)}
+    expected = legacy_ids(df, history)
+
+    new_items, total = find_new_items([df], history)
+    assert total == len(df)
+    assert list(signatures(new_items)) == expected
+    # Chunked input (read_csv chunks, several files) keeps the first sighting across chunks too
+    chunked, _ = find_new_items([df[i:i + 250] for i in range(0, len(df), 250)], history)
+    assert list(signatures(chunked)) == expected
+
+
+def test_csv_rows_and_legacy_history_ids():
+    pd.DataFrame({
+        'Food Name': ['Biscuit', 'Biscuit', 'Mystery Meat', 'Pizza', 'Pizza', 'Salad'],
+        'Calories': ['190', '190', '', '290', '300', '10'],
+    }).to_csv('menu.csv', index=False)
+    # What older uploaders wrote: pandas' float formatting, and 'nan' for a blank value
+    history = ['Biscuit_190.0', 'Mystery Meat_nan', 'Pizza_290']
+
+    new_items, total = find_new_items(read_scrapes(['menu.csv']), history)
+    assert total == 6
+    # 'Biscuit_190.0' and 'Mystery Meat_nan' are the same foods as the CSV's '190' and blank
+    assert list(signatures(new_items)) == ['Pizza_300', 'Salad_10']
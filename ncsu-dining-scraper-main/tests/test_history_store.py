@@ -0,0 +1,39 @@
+"""HistoryStore and the canonical history IDs it stores.
+
+    python -m pytest tests
+"""
+import json
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from food_record import FoodRecord, canonical_id  # noqa: E402
+from history_store import HistoryStore  # noqa: E402
+
+
+def test_canonical_id():
+    assert canonical_id('Buttermilk Biscuit_190.0') == 'Buttermilk Biscuit_190'
+    assert canonical_id('Buttermilk Biscuit_190') == 'Buttermilk Biscuit_190'
+    assert canonical_id('Chicken_Tenders_5.5') == 'Chicken_Tenders_5.5'
+    assert canonical_id('Mystery Meat_nan') == 'Mystery Meat_N/A'
+    assert canonical_id('nan_190.0') == 'None_190'
+    assert canonical_id('no calories') == 'no calories'
+    # Exactly what a freshly scraped record would be recorded as
+    assert canonical_id('Biscuit_190.0') == FoodRecord.from_row({'Food Name': 'Biscuit', 'Calories': '190'}).signature
+
+
+def test_legacy_json_is_migrated_once_in_canonical_form():
+    with open('upload_history.json', 'w') as f:
+        json.dump(['Biscuit_190.0', 'Biscuit_190', 'Mystery Meat_nan'], f)
+
+    store = HistoryStore('history.db', 'upload_history.json')
+    assert store.ids() == {'Biscuit_190', 'Mystery Meat_N/A'}
+    store.add('Pizza_290')
+    store.close()
+
+    # Already migrated: the JSON isn't read again, and what was added since is still there
+    with open('upload_history.json', 'w') as f:
+        json.dump(['Salad_10'], f)
+    store = HistoryStore('history.db', 'upload_history.json')
+    assert store.ids() == {'Biscuit_190', 'Mystery Meat_N/A', 'Pizza_290'}
+    store.close()
@@ -0,0 +1,131 @@
+"""The HTTP engine against the NetNutrition stand-in (benchmarks/stand_in_server.py).
+
+    python -m pytest tests
+"""
+import asyncio
+import json
+import os
+import sys
+
+import aiohttp
+import pytest
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, '..'))
+sys.path.insert(0, os.path.join(HERE, '..', 'benchmarks'))
+import stand_in_server  # noqa: E402
+from food_record import CSV_COLUMNS, format_frame, to_frame  # noqa: E402
+from http_scraper import (NetNutritionClient, parse_items, parse_label_html, parse_menus,  # noqa: E402
+                          parse_units, scrape_http)
+
+UNITS = ['Fountain Dining Hall', 'Clark Dining Hall', 'Case Dining Hall', 'Oval Dining Hall', 'Port City Java - Talley']
+HALLS = ['Fountain Dining Hall', 'Clark Dining Hall', 'Oval Dining Hall']  # ncsu_scraper.DINING_HALLS
+DAYS = ['Monday, October 13, 2025', 'Tuesday, October 14, 2025', 'Wednesday, October 15, 2025']
+MEALS = ['Breakfast', 'Lunch', 'Dinner']
+FOODS = ['Buttermilk Biscuit', 'Cheese Pizza', 'Grilled Chicken Breast', 'Grilled Chicken Sandwich',
+         'Turkey Burger', 'Garden Salad Mix', 'Spinach', 'Cucumber Slices']
+
+BISCUIT = {
+    'Calories': '190', 'Total Fat': '9g', 'Saturated Fat': '5g', 'Cholesterol': '5mg', 'Sodium': '480mg',
+    'Total Carbohydrate': '24g', 'Dietary Fiber': '1g', 'Sugars': '2g', 'Protein': '3g',
+    'Serving Size': '1 each (57g)', 'Serving Size (g)': '57',
+}
+
+
+def start(menu_path=None):
+    server, state, url = stand_in_server.start(menu_path=menu_path)
+    return server, state, url + stand_in_server.NN_PREFIX
+
+
+@pytest.fixture(scope='module')
+def stand_in():
+    server, state, url = start()
+    yield state, url
+    server.shutdown()
+
+
+def test_parse_units(stand_in):
+    state, _ = stand_in
+    units = parse_units(state.home())
+    assert [name for name, _ in units] == UNITS
+    assert [oid for _, oid in units] == ['1', '2', '3', '4', '5']
+
+
+def test_parse_menus(stand_in):
+    state, _ = stand_in
+    days = parse_menus(state.unit_panel(1)['panels'][0]['html'])
+    assert [header for header, _ in days] == DAYS
+    assert all([meal for meal, _ in meals] == MEALS for _, meals in days)
+
+
+def test_parse_items(stand_in):
+    state, _ = stand_in
+    _, meals = parse_menus(state.unit_panel(1)['panels'][0]['html'])[0]
+    items = parse_items(state.menu_panel(int(meals[0][1]))['panels'][0]['html'])
+    assert [name for name, _ in items] == FOODS
+
+
+def test_parse_label_html():
+    with open(os.path.join(stand_in_server.FIXTURES, 'labels', 'buttermilk_biscuit.html'), encoding='utf-8') as f:
+        assert parse_label_html(f.read()) == BISCUIT
+
+
+def test_parse_label_html_less_than():
+    # "&lt;1g" / "less than 5mg" are recorded as the number, not dropped
+    with open(os.path.join(stand_in_server.FIXTURES, 'labels', 'steamed_broccoli.html'), encoding='utf-8') as f:
+        label = parse_label_html(f.read())
+    assert (label['Total Fat'], label['Dietary Fiber'], label['Sodium']) == ('1g', '1g', '5mg')
+
+
+def test_parse_label_html_from_text_recording(stand_in):
+    # cheese_pizza_slice.txt is served wrapped in the site's label markup
+    state, _ = stand_in
+    label = parse_label_html(state.items[1001])
+    assert (label['Calories'], label['Protein'], label['Serving Size (g)']) == ('290', '14g', '118')
+
+
+def test_scrape_http_rows(stand_in):
+    _, url = stand_in
+    records = asyncio.run(scrape_http(base_url=url, max_days=None))
+
+    # Dining halls only, in the site's order: every day, meal and food of each
+    assert len(records) == len(HALLS) * len(DAYS) * len(MEALS) * len(FOODS)
+    assert [r.location for r in records[::len(records) // len(HALLS)]] == HALLS
+    first = records[0].to_row()
+    assert first == dict(BISCUIT, **{'Date': DAYS[0], 'Location': HALLS[0], 'Meal': 'Breakfast',
+                                     'Food Name': 'Buttermilk Biscuit'})
+    assert list(format_frame(to_frame(records)).columns) == CSV_COLUMNS
+
+
+def test_failed_meal_is_skipped(stand_in, monkeypatch):
+    _, url = stand_in
+    menu, calls = NetNutritionClient.menu, []
+
+    async def flaky_menu(self, menu_oid):
+        calls.append(menu_oid)
+        if len(calls) == 3:
+            raise aiohttp.ClientError("connection reset")
+        return await menu(self, menu_oid)
+
+    monkeypatch.setattr(NetNutritionClient, 'menu', flaky_menu)
+    records = asyncio.run(scrape_http(base_url=url, max_days=1))
+    # Just that meal is missing, like "Could not click meal." in the browser
+    assert len(records) == (len(HALLS) * len(MEALS) - 1) * len(FOODS)
+
+
+def test_child_units_are_followed(tmp_path):
+    with open(os.path.join(stand_in_server.FIXTURES, 'netnutrition_menu.json'), encoding='utf-8') as f:
+        spec = json.load(f)
+    spec['units'] = [{'name': 'Talley Student Union', 'oid': 6,
+                      'children': [{'name': "Tuffy's Diner", 'oid': 7}, {'name': 'Oath Pizza', 'oid': 8}]}]
+    path = tmp_path / 'menu.json'
+    path.write_text(json.dumps(spec), encoding='utf-8')
+
+    server, _, url = start(str(path))
+    try:
+        records = asyncio.run(scrape_http(base_url=url, all_locations=True, max_days=1))
+    finally:
+        server.shutdown()
+    assert sorted({r.location for r in records}) == ['Talley Student Union - Oath Pizza',
+                                                      "Talley Student Union - Tuffy's Diner"]
+    assert len(records) == 2 * len(MEALS) * len(FOODS)
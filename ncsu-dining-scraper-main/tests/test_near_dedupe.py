@@ -0,0 +1,55 @@
+"""Near-duplicate merging (near_dedupe.py) and the report --fuzzy leaves behind.
+
+    python -m pytest tests
+"""
+import csv
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+from deduplicate_data import drop_near_duplicates  # noqa: E402
+from food_record import FoodRecord, to_frame  # noqa: E402
+from near_dedupe import REPORT_FILE, merge_near_duplicates, normalize_name  # noqa: E402
+
+
+def food(name, calories, protein=None):
+    return FoodRecord.from_row({'Food Name': name, 'Calories': str(calories), 'Protein': protein})
+
+
+def test_normalize_name():
+    assert normalize_name('Chicken,  Grilled Breasts!') == normalize_name('grilled chicken breast')
+    assert normalize_name('Mac & Cheese') == 'and cheese mac'
+
+
+def test_reworded_and_recalculated_foods_merge():
+    history = ['Buttermilk Biscuit_190', 'Scrambled Eggs_140']
+    records = [
+        food('Biscuit, Buttermilk', 200),      # reworded, recalculated within tolerance
+        food('Scrambled Egg', 140),            # singular
+        food('Buttermilk Biscuit', 260),       # same name, different recipe
+        food('Grilled Chicken Breast', 180, '31g'),
+        food('Grilled Chicken Breasts', 185, '30g'),
+        food('Grilled Chicken Sandwich', 180),
+    ]
+    kept, index = merge_near_duplicates(records, history)
+    assert [(r.food_name, r.calories) for r in kept] == [
+        ('Buttermilk Biscuit', 260), ('Grilled Chicken Breast', 180), ('Grilled Chicken Sandwich', 180)]
+    assert [(m['Food Name'], m['Merged Into'], m['Source']) for m in index.merges] == [
+        ('Biscuit, Buttermilk', 'Buttermilk Biscuit', 'history'),
+        ('Scrambled Egg', 'Scrambled Eggs', 'history'),
+        ('Grilled Chicken Breasts', 'Grilled Chicken Breast', 'this run'),
+    ]
+    assert index.merges[0]['Reason'] == 'same name after normalizing; calories 190 -> 200'
+
+
+def test_macros_that_disagree_do_not_merge():
+    kept, index = merge_near_duplicates([food('Grilled Chicken', 180, '31g'), food('Chicken, Grilled', 180, '12g')], [])
+    assert len(kept) == 2 and not index.merges
+
+
+def test_report_is_written_even_without_merges(capsys):
+    kept = drop_near_duplicates(to_frame([food('Garden Salad', 10)]), ['Buttermilk Biscuit_190'])
+    assert len(kept) == 1
+    assert 'Merged 0 near-duplicates' in capsys.readouterr().out
+    with open(REPORT_FILE, newline='', encoding='utf-8') as f:
+        assert list(csv.DictReader(f)) == []
@@ -0,0 +1,67 @@
+"""NutritionCache: item-ID and location-scoped name keys, TTL and LRU eviction.
+
+    python -m pytest tests
+"""
+import os
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import nutrition_cache  # noqa: E402
+from nutrition_cache import NutritionCache  # noqa: E402
+
+BISCUIT = {'Calories': '190', 'Protein': '3g', 'Serving Size': '1 each (57g)', 'Serving Size (g)': '57',
+           'Location': 'Fountain Dining Hall', 'Meal': 'Breakfast'}
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    now = SimpleNamespace(t=1_000_000.0)
+    monkeypatch.setattr(nutrition_cache, 'time', SimpleNamespace(time=lambda: now.t))
+    return now
+
+
+@pytest.fixture
+def cache(clock):
+    cache = NutritionCache('cache.db', ttl_days=7, max_entries=10)
+    yield cache
+    cache.close()
+
+
+def test_hits_by_item_id_and_by_name_within_a_location(cache):
+    cache.put(BISCUIT, item_id='showNutrition_1', food_name='Buttermilk Biscuit', location='Fountain')
+    label = cache.get(item_id='showNutrition_1')
+    # Only the label is cached, not where or when it was on the menu
+    assert label == {k: v for k, v in BISCUIT.items() if k not in ('Location', 'Meal')}
+    # Thursday's menu gives the same biscuit another item ID
+    assert cache.get('showNutrition_9', ' buttermilk  BISCUIT', 'Fountain') == label
+    assert cache.get('showNutrition_9', 'Buttermilk Biscuit', 'Clark') is None
+    assert (cache.hits, cache.misses) == (2, 1)
+
+
+def test_half_read_labels_are_not_cached(cache):
+    cache.put({'Protein': '3g'}, item_id='showNutrition_1')
+    assert cache.get(item_id='showNutrition_1') is None
+
+
+def test_entries_expire(cache, clock):
+    cache.put(BISCUIT, item_id='showNutrition_1')
+    clock.t += 6 * 86400
+    assert cache.get(item_id='showNutrition_1')
+    clock.t += 2 * 86400
+    assert cache.get(item_id='showNutrition_1') is None
+
+
+def test_least_recently_used_are_evicted(cache, clock):
+    for i in range(49):
+        clock.t += 1
+        cache.put(BISCUIT, item_id=f"showNutrition_{i}")
+    clock.t += 1
+    assert cache.get(item_id='showNutrition_0')
+    # The 50th put trims the table to max_entries, dropping the least recently used
+    clock.t += 1
+    cache.put(BISCUIT, item_id='showNutrition_49')
+    kept = [i for i in range(50) if cache.get(item_id=f"showNutrition_{i}")]
+    assert kept == [0] + list(range(41, 50))
@@ -0,0 +1,37 @@
+"""parse_label() against the saved labels in benchmarks/fixtures/labels.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+HERE = os.path.dirname(__file__)
+sys.path.insert(0, os.path.join(HERE, '..'))
+from nutrition_parser import parse_label, to_csv_fields  # noqa: E402
+
+LABELS = os.path.join(HERE, '..', 'benchmarks', 'fixtures', 'labels')
+
+
+def label(name):
+    with open(os.path.join(LABELS, name), encoding='utf-8') as f:
+        return parse_label(f.read())
+
+
+def test_thousands_separators():
+    soup = label('chicken_noodle_soup.html')
+    assert (soup['sodium_mg'], soup['serving_g']) == (1200, 340)
+    nachos = label('loaded_nachos.txt')
+    assert (nachos['calories_kcal'], nachos['sodium_mg']) == (1010, 2140)
+    assert to_csv_fields(nachos)['Sodium'] == '2140mg'
+
+
+def test_empty_serving_size_keeps_the_next_line():
+    nachos = label('loaded_nachos.txt')
+    # "Serving Size:" with nothing after it: no serving, and Calories is still read
+    assert 'serving_size' not in nachos
+    assert nachos['calories_kcal'] == 1010
+
+
+def test_serving_size_on_the_same_line():
+    parsed = parse_label("Serving Size\t1 each (57g)\nCalories 190")
+    assert (parsed['serving_size'], parsed['serving_g'], parsed['calories_kcal']) == ('1 each (57g)', 57, 190)
@@ -0,0 +1,88 @@
+"""UploadJournal states and the journaled upload every uploader path goes through.
+
+    python -m pytest tests
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+import uploader  # noqa: E402
+from food_record import FoodRecord  # noqa: E402
+from history_store import UploadJournal  # noqa: E402
+
+
+@pytest.fixture
+def journal():
+    journal = UploadJournal('journal.db')
+    yield journal
+    journal.close()
+
+
+@pytest.fixture
+def history(monkeypatch):
+    # uploader keeps one HistoryStore per process; give each test its own
+    monkeypatch.setattr(uploader, '_history', None)
+    yield uploader.history()
+    uploader.history().close()
+
+
+def food(name):
+    return FoodRecord.from_row({'Food Name': name, 'Calories': '190'})
+
+
+def test_claim_is_exclusive_within_a_run(journal):
+    assert journal.claim('Biscuit_190', 'a')
+    assert not journal.claim('Biscuit_190', 'b')
+    journal.failed('Biscuit_190')
+    # A failed upload may be tried again
+    assert journal.claim('Biscuit_190', 'b')
+
+
+def test_dead_run_claims_are_taken_over_but_saves_are_not(journal):
+    journal.claim('Biscuit_190')
+    journal.claim('Pizza_290')
+    journal.submitting('Pizza_290')
+    journal.close()
+
+    again = UploadJournal('journal.db')
+    try:
+        assert again.claim('Biscuit_190')
+        # Mid-save when the run died: maybe on MyFitnessPal already, so never retried on its own
+        assert not again.claim('Pizza_290')
+        assert again.in_doubt() == ['Pizza_290']
+        again.release('Pizza_290')
+        assert again.claim('Pizza_290')
+    finally:
+        again.close()
+
+
+def test_failed_does_not_clear_submitting(journal):
+    journal.claim('Biscuit_190')
+    journal.submitting('Biscuit_190')
+    journal.failed('Biscuit_190')
+    assert journal.counts() == {'submitting': 1}
+
+
+def test_upload_journaled_outcomes(journal, history, monkeypatch):
+    def upload_item(driver, wait, record, profile=None, is_last=False, position="", before_save=None):
+        unique_id = uploader.item_id(record)
+        if record.food_name == 'Form Timeout':
+            return None
+        before_save(unique_id)
+        if record.food_name == 'Browser Gone':
+            raise RuntimeError("no such window")
+        uploader.update_history(unique_id)
+        return unique_id
+
+    monkeypatch.setattr(uploader, 'upload_item', upload_item)
+    upload = lambda name: uploader.upload_journaled(None, None, food(name), journal, 'test')
+
+    assert upload('Biscuit') == 'uploaded'
+    assert upload('Biscuit') == 'skipped'        # in history now
+    assert upload('Form Timeout') == 'failed'
+    with pytest.raises(RuntimeError):
+        upload('Browser Gone')
+    assert journal.counts() == {'done': 1, 'failed': 1, 'submitting': 1}
+    assert 'Biscuit_190' in history
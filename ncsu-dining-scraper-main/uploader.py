@@ -1,185 +1,412 @@
-import pandas as pd
-import os
-import json
-import time
-import random
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.common.keys import Keys
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
-from webdriver_manager.chrome import ChromeDriverManager
-
-# --- CONFIGURATION ---
-UPLOAD_FILE = 'to_upload.csv'
-HISTORY_FILE = 'upload_history.json'
-DEBUG_PORT = 9222 
-
-def setup_existing_driver():
-    print(f" Connecting to Chrome on port {DEBUG_PORT}...")
-    chrome_options = Options()
-    chrome_options.add_experimental_option("debuggerAddress", f"127.0.0.1:{DEBUG_PORT}")
-    service = Service(ChromeDriverManager().install())
-    try:
-        driver = webdriver.Chrome(service=service, options=chrome_options)
-        print(" Connected!")
-        return driver
-    except:
-        print("Make sure Chrome is open with port 9222.")
-        return None
-
-def update_history(item_id):
-    history = []
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, 'r') as f: history = json.load(f)
-    history.append(item_id)
-    with open(HISTORY_FILE, 'w') as f: json.dump(history, f)
-
-def safe_type_id(driver, element_id, text, submit_after=False):
-   
-    try:
-        target_elem = driver.find_element(By.ID, element_id)
-        
-        # Scroll & Focus
-        driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", target_elem)
-        time.sleep(0.1)
-        try: target_elem.click()
-        except: pass
-        
-        # Nuclear Clear
-        target_elem.send_keys(Keys.CONTROL + "a")
-        time.sleep(0.05)
-        target_elem.send_keys(Keys.BACKSPACE)
-
-        # Type
-        if text is not None and str(text) != 'nan':
-            for char in str(text):
-                target_elem.send_keys(char)
-                time.sleep(random.uniform(0.01, 0.03))
-        
-        if submit_after:
-            time.sleep(0.5)
-            target_elem.send_keys(Keys.ENTER)
-        return True
-    except:
-        print(f"Could not find box with ID: '{element_id}'")
-        return False
-
-def force_click_create_food(driver):
-    print("   [Duplicate Check] Scanning...", end="")
-    time.sleep(2)
-    if "duplicate" not in driver.current_url and "similar" not in driver.page_source:
-        print(" No warning.")
-        return
-
-    print(" DETECTED! Clicking 'Create Food'...")
-    selectors = ["//button[contains(text(), 'Create Food')]", "input[value='Create Food']"]
-    
-    for selector in selectors:
-        try:
-            btn = driver.find_element(By.XPATH, selector)
-            driver.execute_script("arguments[0].click();", btn)
-            print("    Clicked! Waiting for Step 2...")
-            time.sleep(4)
-            return
-        except: continue
-    
-    # Fallback
-    webdriver.ActionChains(driver).send_keys(Keys.ENTER).perform()
-    time.sleep(4)
-
-def main():
-    print("\n RUNNING ID-TARGETED SCRIPT\n")
-    if not os.path.exists(UPLOAD_FILE): return
-
-    queue = pd.read_csv(UPLOAD_FILE)
-    driver = setup_existing_driver()
-    if not driver: return
-    wait = WebDriverWait(driver, 10)
-
-    for i, (index, row) in enumerate(queue.iterrows()):
-        food_name = row['Food Name']
-        if str(food_name).strip() in ['N/A', 'nan', '']:
-            print(f" Skipping Duplicate/Empty Item (Row {i+1})")
-            continue
-        calories = row['Calories']
-        if pd.isna(calories) or str(calories).strip() in ['N/A', '-', '']: continue
-            
-        unique_id = f"{food_name}_{calories}"
-        display_name = f"[NCSU] {food_name}"
-        location = str(row.get('Location', '')).replace(' Dining Hall', '')
-        brand_name = f"NC State Dining - {location}"
-
-        print(f"   Uploading ({i+1}/{len(queue)}): {display_name}...", end="")
-
-        try:
-            if "food/submit" not in driver.current_url:
-                driver.get("https://www.myfitnesspal.com/food/submit")
-
-            # STEP 1: Using IDs from X-Ray
-            try: wait.until(EC.visibility_of_element_located((By.ID, "description")))
-            except: driver.refresh(); time.sleep(2)
-            
-            safe_type_id(driver, "description", display_name) # Box #2
-            safe_type_id(driver, "brand", brand_name, submit_after=True) # Box #1
-            
-            # Duplicate Check
-            force_click_create_food(driver)
-
-            # STEP 2: Using IDs from X-Ray
-            # Wait for 'caloriesCapitalized' to confirm page load (The secret ID we found!)
-            try:
-                wait.until(EC.visibility_of_element_located((By.ID, "caloriesCapitalized")))
-            except:
-                print("  Page didn't load. Skipping.")
-                continue
-
-            serving_desc = "serving"
-            if str(row['Serving Size (g)']) not in ['N/A', '1']:
-                    serving_desc += f" ({row['Serving Size (g)']}g)"
-
-            # --- THE GOLDEN IDs ---
-            serving_value = str(row['Serving Size (g)'])
-            if serving_value in ['N/A', 'nan', '']: serving_value = "1"    
-            safe_type_id(driver, "serving", serving_value) 
-            safe_type_id(driver, "unit", "g") # Box #4
-            safe_type_id(driver, "caloriesCapitalized", calories) # Box #6 (The tricky one!)
-            safe_type_id(driver, "total_fat", row['Total Fat'] if str(row['Total Fat']) != 'nan' else 0) # Box #7
-            safe_type_id(driver, "carbohydrates", row['Total Carbohydrate'] if str(row['Total Carbohydrate']) != 'nan' else 0) # Box #17
-            safe_type_id(driver, "protein", row['Protein'] if str(row['Protein']) != 'nan' else 0) # Box #20
-
-            is_last_item = (i == len(queue) - 1)
-            if is_last_item:
-                print("    Saving Final Item...")
-                # Click "Save Changes" (Finishes the batch)
-                save_btn = driver.find_element(By.CSS_SELECTOR, "input[value='Save Changes']")
-                driver.execute_script("arguments[0].click();", save_btn)
-                update_history(unique_id)
-                print("    BATCH COMPLETE!")
-                
-            else:
-                print(" Saving & Looping...")
-                # Click "Save and Create Another" (Prepares for next item)
-                loop_btn = driver.find_element(By.CSS_SELECTOR, "input[value='Save and Create Another']")
-                driver.execute_script("arguments[0].click();", loop_btn)
-                
-                # Wait for the form to clear/reload for the next item
-                time.sleep(2) 
-                update_history(unique_id)
-                print(" Saved. Moving to next...")
-            
-            # Loop Reset
-            print(" [Test Loop]")
-            driver.get("https://www.myfitnesspal.com/food/submit")
-            time.sleep(1)
-            update_history(unique_id)
-
-        except Exception as e:
-            print(f"  Error: {e}")
-            try: driver.get("https://www.myfitnesspal.com/food/submit")
-            except: break
-
-if __name__ == "__main__":
-    main()
+import os
+import time
+import random
+import threading
+from queue import Empty, Queue
+from selenium import webdriver
+from selenium.webdriver.common.by import By
+from selenium.webdriver.common.keys import Keys
+from selenium.webdriver.chrome.options import Options
+from selenium.webdriver.support import expected_conditions as EC
+
+from food_record import format_number, read_records
+from history_store import HistoryStore, UploadJournal
+from metrics import debug, record, set_debug, span, write_metrics
+from ncsu_scraper import chrome_service
+from waits import Waiter, any_of, text_on_page, url_contains_any
+
+# --- CONFIGURATION ---
+UPLOAD_FILE = 'to_upload.csv'
+HISTORY_FILE = 'upload_history.db'
+DEBUG_PORT = 9222 
+SUBMIT_URL = "https://www.myfitnesspal.com/food/submit"
+# 'fast' sets every field with one script call; 'human' types character by character
+FILL_PROFILE = 'fast'
+# Concurrent mode: submissions per minute allowed per MyFitnessPal account, across all its sessions
+RATE_PER_MINUTE = 6
+
+def setup_existing_driver(port=DEBUG_PORT):
+    print(f" Connecting to Chrome on port {port}...")
+    chrome_options = Options()
+    chrome_options.add_experimental_option("debuggerAddress", f"127.0.0.1:{port}")
+    try:
+        # The driver path is resolved once and cached, not downloaded on every run
+        driver = webdriver.Chrome(service=chrome_service(), options=chrome_options)
+        print(" Connected!")
+        return driver
+    except:
+        print(f"Make sure Chrome is open with port {port}.")
+        return None
+
+_history = None
+_history_lock = threading.Lock()
+
+def history():
+    global _history
+    with _history_lock:
+        if _history is None: _history = HistoryStore(HISTORY_FILE)
+    return _history
+
+def update_history(item_id):
+    # One indexed INSERT instead of re-reading and rewriting the whole history
+    history().add(item_id)
+
+def safe_type_id(driver, element_id, text, submit_after=False):
+   
+    try:
+        target_elem = driver.find_element(By.ID, element_id)
+        
+        # Scroll & Focus
+        driver.execute_script("arguments[0].scrollIntoView({behavior: 'smooth', block: 'center'});", target_elem)
+        time.sleep(0.1)
+        try: target_elem.click()
+        except: pass
+        
+        # Nuclear Clear
+        target_elem.send_keys(Keys.CONTROL + "a")
+        time.sleep(0.05)
+        target_elem.send_keys(Keys.BACKSPACE)
+
+        # Type
+        if text is not None and str(text) != 'nan':
+            for char in str(text):
+                target_elem.send_keys(char)
+                time.sleep(random.uniform(0.01, 0.03))
+        
+        if submit_after:
+            time.sleep(0.5)
+            target_elem.send_keys(Keys.ENTER)
+        return True
+    except:
+        print(f"Could not find box with ID: '{element_id}'")
+        return False
+
+# Sets each field through the native value setter (so React-style forms notice),
+# then fires the events a real keystroke would. Times every field in-page.
+FILL_FIELDS_JS = """
+const values = arguments[0];
+const result = {timings: {}, missing: []};
+for (const [id, value] of Object.entries(values)) {
+    const started = performance.now();
+    const el = document.getElementById(id);
+    if (!el) { result.missing.push(id); continue; }
+    const proto = el instanceof HTMLTextAreaElement ? HTMLTextAreaElement.prototype
+                : el instanceof HTMLSelectElement ? HTMLSelectElement.prototype
+                : HTMLInputElement.prototype;
+    el.focus();
+    Object.getOwnPropertyDescriptor(proto, 'value').set.call(el, value);
+    el.dispatchEvent(new Event('input', {bubbles: true}));
+    el.dispatchEvent(new Event('change', {bubbles: true}));
+    el.blur();
+    result.timings[id] = performance.now() - started;
+}
+return result;
+"""
+
+def field_text(value):
+    # Same rule safe_type_id() has always used: None / NaN means "leave it empty"
+    return "" if value is None or str(value) == 'nan' else str(value)
+
+def fill_fields(driver, values, profile=None):
+    """Fills {element_id: value} and records how long each field took (a "fill field <id>" span each)."""
+    profile = profile or FILL_PROFILE
+    started = time.perf_counter()
+
+    if profile == 'human':
+        timings = {}
+        for element_id, value in values.items():
+            t0 = time.perf_counter()
+            safe_type_id(driver, element_id, value)
+            timings[element_id] = (time.perf_counter() - t0) * 1000
+    else:
+        result = driver.execute_script(FILL_FIELDS_JS, {k: field_text(v) for k, v in values.items()})
+        timings = result['timings']
+        for element_id in result['missing']:
+            print(f"Could not find box with ID: '{element_id}'")
+
+    # Kept in metrics.jsonl / Prometheus on every run (one span per field, so each gets its own
+    # quantiles); the breakdown line is only printed with --debug
+    for element_id, ms in timings.items():
+        record(f"fill field {element_id}", ms / 1000, field=element_id, profile=profile)
+    total = (time.perf_counter() - started) * 1000
+    fields = ", ".join(f"{k} {v:.1f}ms" for k, v in timings.items())
+    debug(f"\n      [fill:{profile}] {fields} | total {total:.1f}ms", end="")
+    return timings
+
+def submit_field(driver, element_id):
+    driver.find_element(By.ID, element_id).send_keys(Keys.ENTER)
+
+def force_click_create_food(driver, wait):
+    print("   [Duplicate Check] Scanning...", end="")
+    # Step 1 is over as soon as either the warning or the Step 2 form shows up
+    wait.settle(any_of(
+        url_contains_any("duplicate"),
+        text_on_page("similar"),
+        EC.visibility_of_element_located((By.ID, "caloriesCapitalized")),
+    ), "step 1 -> 2 or duplicate")
+    if "duplicate" not in driver.current_url and "similar" not in driver.page_source:
+        print(" No warning.")
+        return
+
+    print(" DETECTED! Clicking 'Create Food'...")
+    selectors = ["//button[contains(text(), 'Create Food')]", "input[value='Create Food']"]
+    
+    for selector in selectors:
+        try:
+            btn = driver.find_element(By.XPATH, selector)
+            driver.execute_script("arguments[0].click();", btn)
+            print("    Clicked! Waiting for Step 2...")
+            wait.settle(EC.visibility_of_element_located((By.ID, "caloriesCapitalized")), "create food -> step 2")
+            return
+        except: continue
+    
+    # Fallback
+    webdriver.ActionChains(driver).send_keys(Keys.ENTER).perform()
+    wait.settle(EC.visibility_of_element_located((By.ID, "caloriesCapitalized")), "create food -> step 2")
+
+def item_id(record):
+    """The history ID ("Food Name_Calories") of a queued FoodRecord, or None if it can't be uploaded."""
+    return record.signature if record.uploadable else None
+
+def upload_item(driver, wait, record, profile=None, is_last=False, position="", before_save=None):
+    """Submits one queued food (a FoodRecord). Returns its history ID, or None if skipped/failed.
+
+    before_save(unique_id) runs right before the save click, the point after which
+    the food may exist on MyFitnessPal even if this run dies.
+    """
+    unique_id = item_id(record)
+    if unique_id is None:
+        print(f" Skipping Duplicate/Empty Item (Row {position})")
+        return None
+        
+    display_name = f"[NCSU] {record.food_name}"
+    location = (record.location or '').replace(' Dining Hall', '')
+    brand_name = f"NC State Dining - {location}"
+
+    print(f"   Uploading ({position}): {display_name}...", end="")
+
+    try:
+        with span("upload step 1", food=unique_id):
+            if "food/submit" not in driver.current_url:
+                driver.get(SUBMIT_URL)
+
+            # STEP 1: Using IDs from X-Ray
+            try: wait.until(EC.visibility_of_element_located((By.ID, "description")), "step 1 form")
+            except:
+                driver.refresh()
+                wait.settle(EC.visibility_of_element_located((By.ID, "description")), "step 1 form (refresh)")
+            
+            fill_fields(driver, {
+                "description": display_name, # Box #2
+                "brand": brand_name, # Box #1
+            }, profile)
+            submit_field(driver, "brand")
+        
+        # Duplicate Check
+        with span("upload duplicate check", food=unique_id):
+            force_click_create_food(driver, wait)
+
+        # STEP 2: Using IDs from X-Ray
+        # Wait for 'caloriesCapitalized' to confirm page load (The secret ID we found!)
+        try:
+            with span("upload step 2 load", food=unique_id):
+                wait.until(EC.visibility_of_element_located((By.ID, "caloriesCapitalized")), "step 2 form")
+        except:
+            print("  Page didn't load. Skipping.")
+            return None
+
+        # --- THE GOLDEN IDs ---
+        # Missing nutrients are None on the record: no grams means 1 serving, no macro means 0
+        with span("upload step 2 fill", food=unique_id):
+            fill_fields(driver, {
+                "serving": format_number(record.serving_g or 1),
+                "unit": "g", # Box #4
+                "caloriesCapitalized": format_number(record.calories), # Box #6 (The tricky one!)
+                "total_fat": format_number(record.fat_g or 0), # Box #7
+                "carbohydrates": format_number(record.carbohydrate_g or 0), # Box #17
+                "protein": format_number(record.protein_g or 0), # Box #20
+            }, profile)
+
+        if is_last:
+            print("    Saving Final Item...")
+            # Click "Save Changes" (Finishes the batch)
+            with span("upload save", food=unique_id):
+                save_btn = driver.find_element(By.CSS_SELECTOR, "input[value='Save Changes']")
+                if before_save: before_save(unique_id)
+                driver.execute_script("arguments[0].click();", save_btn)
+            print("    BATCH COMPLETE!")
+            
+        else:
+            print(" Saving & Looping...")
+            # Click "Save and Create Another" (Prepares for next item)
+            with span("upload save", food=unique_id):
+                loop_btn = driver.find_element(By.CSS_SELECTOR, "input[value='Save and Create Another']")
+                if before_save: before_save(unique_id)
+                driver.execute_script("arguments[0].click();", loop_btn)
+                
+                # Wait for the form to clear/reload for the next item
+                wait.settle(EC.staleness_of(loop_btn), "save and create another")
+            print(" Saved. Moving to next...")
+        # Saved: recorded once, before the reset below can fail
+        update_history(unique_id)
+
+        # Loop Reset
+        print(" [Test Loop]")
+        with span("upload loop reset", food=unique_id):
+            driver.get(SUBMIT_URL)
+            wait.settle(EC.visibility_of_element_located((By.ID, "description")), "loop reset")
+        return unique_id
+
+    except Exception as e:
+        print(f"  Error: {e}")
+        # If even the reset fails the browser is gone; let the caller stop
+        driver.get(SUBMIT_URL)
+        return None
+
+def upload_journaled(driver, wait, record, journal, session=None, profile=None, is_last=False, position="",
+                     before_submit=None):
+    """upload_item() wrapped in the upload journal. Returns "uploaded", "failed" or "skipped".
+
+    Every way of uploading goes through here, so no path can submit a food that
+    another session, or an earlier run that died mid-save, already has.
+    before_submit() runs once the food is claimed (e.g. a RateLimiter's wait).
+    A dead browser re-raises once the item's journal state is settled.
+    """
+    unique_id = item_id(record)
+    # Unusable, already uploaded, or another session / an earlier run has it
+    if unique_id is None or unique_id in history() or not journal.claim(unique_id, session):
+        return "skipped"
+    if before_submit: before_submit()
+    try:
+        uploaded = upload_item(driver, wait, record, profile, is_last, position, before_save=journal.submitting)
+    except Exception:
+        journal.failed(unique_id)
+        raise
+    if uploaded or unique_id in history():
+        journal.done(unique_id)
+        return "uploaded"
+    journal.failed(unique_id)
+    return "failed"
+
+def open_journal():
+    journal = UploadJournal(HISTORY_FILE)
+    in_doubt = journal.in_doubt()
+    if in_doubt:
+        print(f" ⚠️ {len(in_doubt)} item(s) were mid-save when a run stopped and will be skipped;")
+        print("    check them on MyFitnessPal, then `python history_store.py release`.")
+    return journal
+
+def main(profile=None):
+    print("\n RUNNING ID-TARGETED SCRIPT\n")
+    if not os.path.exists(UPLOAD_FILE): return
+
+    queue = read_records(UPLOAD_FILE)
+    driver = setup_existing_driver()
+    if not driver: return
+    wait = Waiter(driver, 10)
+    journal = open_journal()
+
+    counts = {"uploaded": 0, "failed": 0, "skipped": 0}
+    for i, record in enumerate(queue):
+        try:
+            outcome = upload_journaled(driver, wait, record, journal, str(DEBUG_PORT), profile,
+                                       is_last=(i == len(queue) - 1), position=f"{i+1}/{len(queue)}")
+        except Exception:
+            break
+        counts[outcome] += 1
+
+    print(f"\n Uploaded {counts['uploaded']}, failed {counts['failed']}, skipped {counts['skipped']} "
+          f"(journal: {journal.counts()})")
+    journal.close()
+    write_metrics("upload")
+
+class RateLimiter:
+    """Spaces calls to wait() at least 60/per_minute seconds apart, across threads."""
+
+    def __init__(self, per_minute):
+        self.interval = 60.0 / per_minute if per_minute else 0.0
+        self._next = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next)
+            self._next = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+def parse_sessions(spec):
+    """'9222,9223=alt' -> [(9222, 'default'), (9223, 'alt')]: debug port and the account it's logged into."""
+    sessions = []
+    for part in str(spec).split(","):
+        port, _, account = part.strip().partition("=")
+        sessions.append((int(port), account or "default"))
+    return sessions
+
+def _session_worker(port, account, work, journal, limiter, profile, counts, counts_lock):
+    driver = setup_existing_driver(port)
+    if not driver: return
+    wait = Waiter(driver, 10)
+
+    while True:
+        try:
+            position, record = work.get_nowait()
+        except Empty:
+            break
+        try:
+            outcome = upload_journaled(driver, wait, record, journal, f"{port}/{account}", profile,
+                                       position=f"{position} @{port}", before_submit=limiter.wait)
+        except Exception as e:
+            print(f"\n [port {port}] Browser is gone ({e}); session stopping.")
+            break
+        with counts_lock: counts[outcome] += 1
+
+def upload_concurrent(sessions, profile=None, rate=RATE_PER_MINUTE):
+    """Spreads to_upload.csv over several attached Chrome sessions (one per debug port).
+
+    Sessions on the same account share one RateLimiter. Every item goes through
+    the upload journal, so re-running after a crash picks up where it stopped
+    and never re-submits a food whose save may already have gone through.
+    """
+    print(f"\n CONCURRENT UPLOAD: {len(sessions)} session(s), {rate}/min per account\n")
+    if not os.path.exists(UPLOAD_FILE): return
+
+    records = read_records(UPLOAD_FILE)
+    journal = open_journal()
+
+    work = Queue()
+    for i, record in enumerate(records):
+        work.put((f"{i+1}/{len(records)}", record))
+
+    limiters = {account: RateLimiter(rate) for _, account in sessions}
+    counts = {"uploaded": 0, "failed": 0, "skipped": 0}
+    counts_lock = threading.Lock()
+    threads = [
+        threading.Thread(target=_session_worker,
+                         args=(port, account, work, journal, limiters[account], profile, counts, counts_lock))
+        for port, account in sessions
+    ]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    print(f"\n Uploaded {counts['uploaded']}, failed {counts['failed']}, skipped {counts['skipped']} "
+          f"(journal: {journal.counts()})")
+    journal.close()
+    write_metrics("upload")
+
+if __name__ == "__main__":
+    import argparse
+    parser = argparse.ArgumentParser(description="Upload queued foods to MyFitnessPal.")
+    parser.add_argument("--profile", choices=["fast", "human"], default=FILL_PROFILE,
+                        help="'human' keeps the old character-by-character typing")
+    parser.add_argument("--debug", action="store_true", help="print per-field fill timings")
+    parser.add_argument("--sessions", help="upload concurrently through these debug ports, e.g. 9222,9223 "
+                                           "or 9222=main,9224=alt to name the account each is logged into")
+    parser.add_argument("--rate", type=int, default=RATE_PER_MINUTE, help="submissions per minute per account")
+    args = parser.parse_args()
+    if args.debug: set_debug(True)
+    if args.sessions:
+        upload_concurrent(parse_sessions(args.sessions), args.profile, args.rate)
+    else:
+        main(args.profile)
@@ -0,0 +1,104 @@
+import threading
+import time
+from collections import deque
+
+from selenium.common.exceptions import TimeoutException
+from selenium.webdriver.support.ui import WebDriverWait
+
+from metrics import percentile, record
+
+# --- CONFIGURATION ---
+POLL = 0.05           # Seconds between condition checks
+MIN_TIMEOUT = 1.0     # Adaptive timeouts never go below this...
+SAFETY_FACTOR = 3.0   # ...and allow this many times the slowest recent wait
+WARMUP = 5            # Samples needed before a wait's timeout starts adapting
+WINDOW = 50           # Recent samples kept per wait name
+
+# Recent successful waits per name, for the adaptive timeouts. Every wait, timeouts
+# included, is also recorded as a "wait <name>" metrics span (ok=false on a timeout).
+_recent = {}
+_recent_lock = threading.Lock()
+
+
+def _record(name, seconds, timed_out):
+    record(f"wait {name}", seconds, ok=not timed_out)
+    if not timed_out:
+        with _recent_lock:
+            _recent.setdefault(name, deque(maxlen=WINDOW)).append(seconds)
+
+
+class Waiter:
+    """Drop-in for WebDriverWait that names every wait, times it and adapts its timeout.
+
+    wait.until(EC.visibility_of_element_located(...), "modal open") blocks only
+    until the page is actually ready, instead of a fixed time.sleep(). until()
+    always allows the full timeout, since giving up there loses data. Once a
+    settle() wait has WARMUP samples its timeout shrinks toward SAFETY_FACTOR x
+    its recent p95, so a best-effort wait stops costing the full ceiling each time.
+    """
+
+    def __init__(self, driver, timeout=10):
+        self.driver = driver
+        self.timeout = timeout
+
+    def timeout_for(self, name):
+        with _recent_lock:
+            samples = list(_recent.get(name, ()))
+        if len(samples) < WARMUP:
+            return self.timeout
+        return min(self.timeout, max(MIN_TIMEOUT, percentile(samples, 0.95) * SAFETY_FACTOR))
+
+    def until(self, condition, name="wait", timeout=None):
+        return self._wait(condition, name, timeout if timeout is not None else self.timeout)
+
+    def _wait(self, condition, name, limit):
+        started = time.perf_counter()
+        try:
+            result = WebDriverWait(self.driver, limit, poll_frequency=POLL).until(condition)
+        except TimeoutException:
+            _record(name, time.perf_counter() - started, True)
+            raise
+        _record(name, time.perf_counter() - started, False)
+        return result
+
+    def settle(self, condition, name="wait", timeout=None):
+        """Like until(), but a timeout just means "carry on" (replaces best-effort sleeps)."""
+        try:
+            return self._wait(condition, name, timeout if timeout is not None else self.timeout_for(name))
+        except TimeoutException:
+            return None
+
+
+# --- CONDITIONS (callables taking the driver, like selenium's expected_conditions) ---
+
+def url_contains_any(*fragments):
+    return lambda driver: any(f in driver.current_url for f in fragments)
+
+
+def any_of(*conditions):
+    def check(driver):
+        for condition in conditions:
+            try:
+                if condition(driver):
+                    return True
+            except Exception:
+                pass
+        return False
+    return check
+
+
+def js_true(script, *args):
+    return lambda driver: bool(driver.execute_script(script, *args))
+
+
+def element_visible_js(element_id):
+    return js_true("var e = document.getElementById(arguments[0]); return !!(e && e.offsetParent !== null);", element_id)
+
+
+def element_hidden_js(element_id):
+    return js_true("var e = document.getElementById(arguments[0]); return !e || e.offsetParent === null;", element_id)
+
+
+def text_on_page(*snippets):
+    return js_true("return arguments[0].some(s => document.body && document.body.innerText.includes(s));", list(snippets))
+